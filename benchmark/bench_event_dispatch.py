@@ -0,0 +1,118 @@
+"""
+Microbenchmark chi phí dispatch 1 event OpenFlow (không tính thời gian chạy handler):
+lọc lại handler/observer cho từng event (ryu 4.34) vs bảng dispatch (ev_cls, state) đã cache
+(RyuApp.get_handlers / get_observers). Dùng bộ handler thật của SmartController + OFPHandler.
+Mỗi event: get_observers của ofp_brick (send_event_to_observers), handler của ofp_brick
+(Datapath._recv_loop), handler của app (RyuApp._event_loop).
+Chạy: python benchmark/bench_event_dispatch.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.base import app_manager
+from ryu.controller import handler, ofp_event, ofp_handler
+from ryu.controller.handler import MAIN_DISPATCHER
+from smart_controller_v2 import SmartController
+
+N_EVENTS = 200000
+REPEAT = 3
+
+# Tỉ lệ event trên s_src lúc có tải: chủ yếu packet-in, stats định kỳ, barrier sau mỗi flow mới
+EVENT_MIX = [(ofp_event.EventOFPPacketIn, 50), (ofp_event.EventOFPBarrierReply, 30),
+             (ofp_event.EventOFPFlowStatsReply, 5), (ofp_event.EventOFPPortStatsReply, 5),
+             (ofp_event.EventOFPEchoRequest, 5), (ofp_event.EventOFPPortStatus, 3),
+             (ofp_event.EventOFPFlowRemoved, 2)]
+
+
+def make_apps():
+    brick = ofp_handler.OFPHandler()
+    app = SmartController.__new__(SmartController)
+    app_manager.RyuApp.__init__(app)
+    handler.register_instance(brick)
+    handler.register_instance(app)
+    # Như AppManager._update_bricks: app đăng ký observer các event ofp_event của nó
+    for ev_cls, handlers in list(app.event_handlers.items()):
+        for m in handlers:
+            if ev_cls in brick._EVENTS:
+                brick.register_observer(ev_cls, app.name, m.callers[ev_cls].dispatchers)
+    return brick, app
+
+
+def legacy_get_handlers(app, ev, state=None):
+    ev_cls = ev.__class__
+    handlers = app.event_handlers.get(ev_cls, [])
+    if state is None:
+        return handlers
+
+    def test(h):
+        if not hasattr(h, 'callers') or ev_cls not in h.callers:
+            return True
+        states = h.callers[ev_cls].dispatchers
+        if not states:
+            return True
+        return state in states
+
+    return filter(test, handlers)
+
+
+def legacy_get_observers(app, ev, state):
+    observers = []
+    for k, v in app.observers.get(ev.__class__, {}).items():
+        if not state or not v or state in v:
+            observers.append(k)
+    return observers
+
+
+def dispatch_legacy(brick, app, events, state):
+    n = 0
+    for ev in events:
+        n += len(legacy_get_observers(brick, ev, state))
+
+        def dispatchers(x):
+            return x.callers[ev.__class__].dispatchers
+
+        n += len([h for h in legacy_get_handlers(brick, ev) if state in dispatchers(h)])
+        n += len(list(legacy_get_handlers(app, ev, state)))
+    return n
+
+
+def dispatch_cached(brick, app, events, state):
+    n = 0
+    for ev in events:
+        n += len(brick.get_observers(ev, state))
+        n += len(brick.get_handlers(ev, state))
+        n += len(app.get_handlers(ev, state))
+    return n
+
+
+def bench(func, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    random.seed(42)
+    brick, app = make_apps()
+    classes, weights = zip(*EVENT_MIX)
+    events = [ev_cls(None) for ev_cls in random.choices(classes, weights, k=N_EVENTS)]
+
+    t_old, expected = bench(dispatch_legacy, brick, app, events, MAIN_DISPATCHER)
+    t_new, result = bench(dispatch_cached, brick, app, events, MAIN_DISPATCHER)
+    assert result == expected
+    print(f"handlers: ofp_brick {sum(map(len, brick.event_handlers.values()))}, "
+          f"SmartController {sum(map(len, app.event_handlers.values()))}; {N_EVENTS} events")
+    print(f"{'dispatch':>10} | {'ns/event':>9} | {'events/s':>12}")
+    print(f"{'legacy':>10} | {t_old / N_EVENTS * 1e9:>9.0f} | {N_EVENTS / t_old:>12,.0f}")
+    print(f"{'cached':>10} | {t_new / N_EVENTS * 1e9:>9.0f} | {N_EVENTS / t_new:>12,.0f}")
+    print(f"speedup: {t_old / t_new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark thời gian chờ trong hàng đợi event của RyuApp: 1 hàng đợi FIFO (ryu 4.34) vs hàng đợi
+theo lớp ưu tiên (RyuApp.EVENT_QUEUES). Mô phỏng SmartController: mỗi chu kỳ 5 flow stats reply
+đến cùng lúc (nhiều switch / nhiều phần), handler chờ inference ~20ms (InferenceExecutor chạy ở
+thread khác nên green thread khác vẫn chạy), trong lúc đó packet-in đến đều mỗi 1ms.
+Chạy: python benchmark/bench_event_queue.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.lib import hub
+from ryu.base import app_manager
+from ryu.controller import event, handler, ofp_event
+from ryu.controller.handler import set_ev_cls, MAIN_DISPATCHER
+
+ROUNDS = 10
+STATS_PER_ROUND = 5
+INFERENCE_TIME = 0.02
+PACKET_IN_INTERVAL = 0.001
+ROUND_TIME = 0.1
+
+
+class MonitorApp(app_manager.RyuApp):
+    def __init__(self, *args, **kwargs):
+        super(MonitorApp, self).__init__(*args, **kwargs)
+        self.waits = {'packet-in': [], 'flow stats': []}    # ev.timestamp -> lúc handler chạy
+
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        self.waits['flow stats'].append(time.time() - ev.timestamp)
+        hub.sleep(INFERENCE_TIME)
+
+    @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+    def packet_in_handler(self, ev):
+        self.waits['packet-in'].append(time.time() - ev.timestamp)
+
+
+class FifoMonitorApp(MonitorApp):
+    """1 hàng đợi cho mọi event như trước"""
+    EVENT_QUEUES = [(event.EVENT_PRIORITY_NORMAL, 128, 1)]
+
+    def _send_event(self, ev, state):
+        self.events.put(event.EVENT_PRIORITY_NORMAL, (ev, state))
+
+
+def producer(app):
+    """Vai trò Datapath._recv_loop: đẩy event vào hàng đợi của app"""
+    for _ in range(ROUNDS):
+        for _ in range(STATS_PER_ROUND):
+            app._send_event(ofp_event.EventOFPFlowStatsReply(None), MAIN_DISPATCHER)
+        for _ in range(int(ROUND_TIME / PACKET_IN_INTERVAL)):
+            app._send_event(ofp_event.EventOFPPacketIn(None), MAIN_DISPATCHER)
+            hub.sleep(PACKET_IN_INTERVAL)
+
+
+def run(app_cls):
+    app = app_cls()
+    handler.register_instance(app)
+    app.start()
+    hub.spawn(producer, app).wait()
+    while not app.events.empty():
+        hub.sleep(0.01)
+    hub.sleep(INFERENCE_TIME * 2)
+    app.stop()
+    return app.waits, app.event_queue_stats()
+
+
+def main():
+    print(f"{'queues':>8} | {'event':>10} | {'count':>5} | {'avg ms':>6} | {'p99 ms':>6} | {'max ms':>6}")
+    for name, app_cls in [('fifo', FifoMonitorApp), ('priority', MonitorApp)]:
+        waits, queue_stats = run(app_cls)
+        for ev_name, w in waits.items():
+            w = sorted(w)
+            print(f"{name:>8} | {ev_name:>10} | {len(w):>5} | {sum(w) / len(w) * 1e3:>6.1f} | "
+                  f"{w[int(len(w) * 0.99)] * 1e3:>6.1f} | {w[-1] * 1e3:>6.1f}")
+        print(f"{'':>8}   event_queue_stats(): " + ", ".join(
+            f"{cls} avg {st['avg_wait_ms']:.1f}ms" for cls, st in queue_stats.items() if st['dispatched']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark phân loại flow: từng dòng (DataFrame 1 hàng / flow) vs batch (1 ma trận / reply)
+vs cây đã compile (tree_compiler.py, không cần sklearn lúc chạy).
+Chạy: python benchmark/bench_flow_classification.py [dt|rf]
+"""
+import os
+import sys
+import time
+import random
+import warnings
+
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+import joblib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from flow_features import FEATURE_NAMES, build_feature_matrix
+from tree_compiler import compile_classifier
+
+MODEL_DIR = "/home/nhathoang2612/CNM_Baitap04/model/"
+CLS_PATH = os.path.join(MODEL_DIR, "classification")
+FLOW_COUNTS = [100, 1000, 10000]
+REPEAT = 3
+PER_ROW_MAX = 500   # Cách cũ rất chậm: chỉ đo trên tối đa 500 flow (chi phí mỗi flow không đổi)
+
+
+class FakeAction:
+    def __init__(self, port):
+        self.port = port
+
+
+class FakeInstruction:
+    def __init__(self, port):
+        self.actions = [FakeAction(port)]
+
+
+class FakeFlowStats:
+    """Giả lập OFPFlowStats (chỉ các trường handler dùng tới)"""
+    def __init__(self, i):
+        self.priority = 10
+        self.duration_sec = random.randint(1, 60)
+        self.packet_count = random.randint(1, 50000)
+        self.byte_count = self.packet_count * random.choice([100, 600, 1400])
+        self.match = {'ip_proto': random.choice([6, 17]),
+                      'ipv4_src': f'10.0.0.{i % 4 + 1}', 'ipv4_dst': f'10.0.0.{i % 4 + 11}'}
+        self.instructions = [FakeInstruction(random.randint(5, 9))]
+
+
+def load_classifier(kind='dt'):
+    """Dùng model thật nếu có, nếu không thì train nhanh DT/RF trên dữ liệu giả"""
+    model_file = os.path.join(CLS_PATH, 'best_classifier_model.pkl')
+    scaler_file = os.path.join(CLS_PATH, 'classifier_scaler.pkl')
+    if os.path.exists(model_file) and os.path.exists(scaler_file):
+        return joblib.load(model_file), joblib.load(scaler_file)
+
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
+    _, X = build_feature_matrix([FakeFlowStats(i) for i in range(5000)])
+    # Nhãn theo kích thước gói (giống dữ liệu thật: video gói to, voip gói nhỏ)
+    y = np.digitize(X[:, 6], [200, 1000]) + (X[:, 0] == 6)
+    df = pd.DataFrame(X, columns=FEATURE_NAMES)
+    scaler = StandardScaler().fit(df)
+    if kind == 'rf':
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    else:
+        model = DecisionTreeClassifier(max_depth=10, random_state=42)
+    model.fit(scaler.transform(df), y)
+    return model, scaler
+
+
+def classify_per_row(body, model, scaler):
+    """Cách cũ: mỗi flow 1 DataFrame, 1 lần transform, 1 lần predict"""
+    labels = []
+    for stat in body:
+        if stat.priority != 10 or stat.duration_sec == 0: continue
+        byte_count = stat.byte_count
+        packet_count = stat.packet_count
+        avg_packet_size = byte_count / packet_count if packet_count > 0 else 0
+        byte_rate = byte_count / stat.duration_sec
+        packet_rate = packet_count / stat.duration_sec
+        ip_proto = stat.match.get('ip_proto', 17)
+        features_df = pd.DataFrame([[ip_proto, packet_count, byte_count,
+                                     stat.duration_sec, byte_rate, packet_rate, avg_packet_size]],
+                                   columns=FEATURE_NAMES)
+        labels.append(model.predict(scaler.transform(features_df))[0])
+    return labels
+
+
+def classify_batch(body, model, scaler):
+    """Cách mới: 1 ma trận cho cả reply"""
+    stats, features = build_feature_matrix(body)
+    if not stats: return []
+    return model.predict(scaler.transform(pd.DataFrame(features, columns=FEATURE_NAMES)))
+
+
+def classify_compiled(body, compiled, _scaler):
+    """Cây đã compile: scaler gộp vào threshold, không qua pandas/sklearn"""
+    stats, features = build_feature_matrix(body)
+    if not stats: return []
+    return compiled.predict(features)
+
+
+def bench(func, body, model, scaler):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(body, model, scaler)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    kind = sys.argv[1] if len(sys.argv) > 1 else 'dt'
+    model, scaler = load_classifier(kind)
+    compiled = compile_classifier(model, scaler)
+    print(f"model: {type(model).__name__}")
+    print(f"{'flows':>8} | {'per-row (flows/s)':>18} | {'batch (flows/s)':>16} | {'compiled (flows/s)':>18}")
+    for n in FLOW_COUNTS:
+        body = [FakeFlowStats(i) for i in range(n)]
+        expected = list(classify_per_row(body[:50], model, scaler))
+        assert expected == list(classify_batch(body[:50], model, scaler))
+        assert expected == list(classify_compiled(body[:50], compiled, None))
+
+        n_row = min(n, PER_ROW_MAX)
+        t_row = bench(classify_per_row, body[:n_row], model, scaler) * n / n_row
+        t_batch = bench(classify_batch, body, model, scaler)
+        t_comp = bench(classify_compiled, body, compiled, None)
+        print(f"{n:>8} | {n / t_row:>18,.0f} | {n / t_batch:>16,.0f} | {n / t_comp:>18,.0f}")
+
+
+if __name__ == '__main__':
+    main()
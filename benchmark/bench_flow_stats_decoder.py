@@ -0,0 +1,98 @@
+"""
+Benchmark decode flow stats reply (OFPMP_FLOW): parser đầy đủ của ryu (OFPFlowStats + OFPMatch
++ instruction/action cho từng flow) vs decoder dạng cột (ryu/ofproto/ofproto_v1_3_columns.py).
+Chạy: python benchmark/bench_flow_stats_decoder.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.ofproto import ofproto_v1_3 as ofproto, ofproto_v1_3_parser as parser, ofproto_parser
+from ryu.ofproto import ofproto_v1_3_columns
+from ryu.lib.pack_utils import msg_pack_into
+from flow_features import build_feature_matrix, build_feature_matrix_columns
+
+FLOW_COUNTS = [10, 100, 500]   # 1 reply tối đa 64KB (~600 flow AI), bảng lớn hơn bị chia nhiều phần
+REPEAT = 20
+
+
+class FakeDatapath:
+    ofproto = ofproto
+    ofproto_parser = parser
+    id = 1
+    decoder = None      # như Datapath.columnar_decoder khi mọi handler đã opt-in columnar_flow_stats
+
+    def columnar_decoder(self, msg_cls):
+        return self.decoder if msg_cls is parser.OFPFlowStatsReply else None
+
+
+def make_entry(i):
+    """1 flow AI giống trên s_src: match 5 trường, 1 action output hoặc group"""
+    match = parser.OFPMatch(in_port=i % 4 + 1, eth_type=0x800, ipv4_src=f'10.0.0.{i % 4 + 1}',
+                            ipv4_dst=f'10.0.0.{i % 4 + 11}', ip_proto=random.choice([6, 17]))
+    actions = [parser.OFPActionGroup(1)] if i % 3 == 0 else [parser.OFPActionOutput(5 + i % 5)]
+    match_buf, inst_buf, buf = bytearray(), bytearray(), bytearray()
+    match.serialize(match_buf, 0)
+    parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions).serialize(inst_buf, 0)
+    length = ofproto.OFP_FLOW_STATS_0_SIZE + len(match_buf) + len(inst_buf)
+    packets = random.randint(1, 50000)
+    msg_pack_into(ofproto.OFP_FLOW_STATS_0_PACK_STR, buf, 0, length, 0, random.randint(1, 60), 0,
+                  10, 5, 0, 1, i, packets, packets * random.choice([100, 600, 1400]))
+    return bytes(buf + match_buf + inst_buf)
+
+
+def make_reply(n):
+    body = b''.join(make_entry(i) for i in range(n))
+    msg_len = ofproto.OFP_MULTIPART_REPLY_SIZE + len(body)
+    header = bytearray()
+    msg_pack_into(ofproto.OFP_HEADER_PACK_STR, header, 0, ofproto.OFP_VERSION,
+                  ofproto.OFPT_MULTIPART_REPLY, msg_len, 1)
+    msg_pack_into(ofproto.OFP_MULTIPART_REPLY_PACK_STR, header, ofproto.OFP_HEADER_SIZE, ofproto.OFPMP_FLOW, 0)
+    return bytes(header) + body, msg_len
+
+
+def parse(buf, msg_len):
+    return ofproto_parser.msg(FakeDatapath(), ofproto.OFP_VERSION, ofproto.OFPT_MULTIPART_REPLY, msg_len, 1, buf)
+
+
+def decode_full(buf, msg_len):
+    return build_feature_matrix(parse(buf, msg_len).body)
+
+
+def decode_columns(buf, msg_len):
+    return build_feature_matrix_columns(parse(buf, msg_len).columns)
+
+
+def bench(func, buf, msg_len):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(buf, msg_len)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def set_columnar(enabled):
+    FakeDatapath.decoder = ofproto_v1_3_columns.FlowStatsColumns if enabled else None
+
+
+def main():
+    random.seed(42)
+    print(f"{'flows':>8} | {'full parser (flows/s)':>22} | {'columnar (flows/s)':>19} | {'speedup':>8}")
+    for n in FLOW_COUNTS:
+        buf, msg_len = make_reply(n)
+        set_columnar(False)
+        _, expected = decode_full(buf, msg_len)
+        t_full = bench(decode_full, buf, msg_len)
+        set_columnar(True)
+        _, features = decode_columns(buf, msg_len)
+        assert (features == expected).all()
+        t_cols = bench(decode_columns, buf, msg_len)
+        print(f"{n:>8} | {n / t_full:>22,.0f} | {n / t_cols:>19,.0f} | {t_full / t_cols:>7.1f}x")
+    set_columnar(False)
+
+
+if __name__ == '__main__':
+    main()
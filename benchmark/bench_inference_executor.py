@@ -0,0 +1,83 @@
+"""
+Kiểm tra InferenceExecutor không chặn eventlet hub: patch giống ryu-manager (hub.patch(thread=True)),
+gửi job CPU ~1s (vòng Python giữ GIL, numpy nhả GIL, joblib.load model sklearn như lúc load/reload
+model) rồi đo khoảng dừng lớn nhất của 1 green thread tick mỗi 1ms. Hub bị chặn (job chạy trên green thread) -> khoảng dừng ~ thời gian job.
+Chạy: python benchmark/bench_inference_executor.py
+"""
+import os
+import sys
+
+from ryu.lib import hub
+hub.patch(thread=True)
+
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from inference_executor import InferenceExecutor
+
+JOB_TIME = 1.0
+TICK = 0.001
+MAX_PAUSE = 0.1     # ngưỡng chấp nhận: hub dừng lâu hơn -> job đang chạy trên hub
+
+
+def python_job():
+    end = time.perf_counter() + JOB_TIME
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def numpy_job():
+    a = np.random.rand(600, 600)
+    end = time.perf_counter() + JOB_TIME
+    while time.perf_counter() < end:
+        a = np.tanh(a @ a.T / 600)
+    return float(a.sum())
+
+
+def make_load_job():
+    """Pickle 1 RandomForest như best_classifier_model.pkl, job = joblib.load lặp lại ~JOB_TIME"""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = np.random.rand(5000, 7), np.random.randint(0, 4, 5000)
+    path = os.path.join(tempfile.mkdtemp(), 'best_classifier_model.pkl')
+    joblib.dump(RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y), path)
+
+    def load_job():
+        end = time.perf_counter() + JOB_TIME
+        n = 0
+        while time.perf_counter() < end:
+            joblib.load(path)
+            n += 1
+        return n
+    return load_job
+
+
+def max_pause_while(executor, func):
+    done = []
+    executor.submit(func.__name__, func, callback=done.append, max_age=10)
+    last, pause = time.perf_counter(), 0.0
+    while not done:
+        hub.sleep(TICK)
+        now = time.perf_counter()
+        pause, last = max(pause, now - last), now
+    return pause
+
+
+def main():
+    executor = InferenceExecutor(max_workers=2)
+    ok = True
+    for func in (python_job, numpy_job, make_load_job()):
+        pause = max_pause_while(executor, func)
+        ok &= pause < MAX_PAUSE
+        print(f"{func.__name__:>12}: job {JOB_TIME:.1f}s, hub max pause {pause * 1000:.1f}ms "
+              f"({'OK' if pause < MAX_PAUSE else 'BLOCKED'})")
+    executor.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark LSTM forecaster: Keras (TensorFlow) vs NumPy runtime (numpy_lstm.py).
+Mỗi runtime chạy trong 1 process riêng để đo đúng import time và RSS.
+Chạy: python benchmark/bench_lstm_runtime.py [thư_mục_traffic_predict]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import resource
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'controller'))
+
+PRED_PATH = "/home/nhathoang2612/CNM_Baitap04/model/traffic_predict"
+BATCH_SIZES = [5, 50, 500]
+REPEAT = 50
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(runtime, npz_path, keras_path, input_path):
+    """Chạy trong process con: import, load, đo latency, lưu output"""
+    start = time.perf_counter()
+    import numpy as np
+    if runtime == 'keras':
+        os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+        os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+        from tensorflow.keras.models import Sequential, load_model
+        from tensorflow.keras.layers import LSTM, Dense, Input
+    else:
+        from numpy_lstm import NumpyLSTM
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if runtime == 'keras':
+        if os.path.exists(keras_path):
+            model = load_model(keras_path)
+        else:
+            # Không có model thật: dựng lại kiến trúc notebook và nạp trọng số từ file .npz
+            data = np.load(npz_path)
+            model = Sequential([Input(shape=(int(data['seq_length']), 1)),
+                                LSTM(data['recurrent_kernel'].shape[0]), Dense(1)])
+            model.set_weights([data['kernel'], data['recurrent_kernel'], data['bias'],
+                               data['dense_kernel'], data['dense_bias']])
+    else:
+        model = NumpyLSTM.load(npz_path)
+    load_s = time.perf_counter() - start
+
+    X_all = np.load(input_path)
+    latency = {}
+    for n in BATCH_SIZES:
+        X = X_all[:n]
+        model(X, training=False)   # warm-up
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            model(X, training=False)
+        latency[n] = (time.perf_counter() - start) / REPEAT * 1000
+
+    np.save(input_path + f'.{runtime}.npy', np.asarray(model(X_all, training=False)))
+    print(json.dumps({'import_s': import_s, 'load_s': load_s, 'rss_mb': rss_mb(), 'latency_ms': latency}))
+
+
+def make_synthetic_npz(path, seq_length=10, units=64, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    np.savez(path,
+             kernel=rng.normal(0, 0.3, (1, 4 * units)).astype(np.float32),
+             recurrent_kernel=rng.normal(0, 0.1, (units, 4 * units)).astype(np.float32),
+             bias=rng.normal(0, 0.1, 4 * units).astype(np.float32),
+             dense_kernel=rng.normal(0, 0.1, (units, 1)).astype(np.float32),
+             dense_bias=np.zeros(1, dtype=np.float32),
+             seq_length=np.int32(seq_length))
+
+
+def main():
+    import numpy as np
+    from numpy_lstm import TOLERANCE
+
+    pred_path = sys.argv[1] if len(sys.argv) > 1 else PRED_PATH
+    npz_path = os.path.join(pred_path, 'best_prediction_model.npz')
+    keras_path = os.path.join(pred_path, 'best_prediction_model.keras')
+    tmp_dir = tempfile.mkdtemp(prefix='bench_lstm_')
+    if not os.path.exists(npz_path):
+        print("(Không tìm thấy model thật -> dùng trọng số ngẫu nhiên)")
+        npz_path = os.path.join(tmp_dir, 'synthetic.npz')
+        keras_path = os.path.join(tmp_dir, 'missing.keras')
+        make_synthetic_npz(npz_path)
+
+    seq_length = int(np.load(npz_path)['seq_length'])
+    input_path = os.path.join(tmp_dir, 'input.npy')
+    np.save(input_path, np.random.default_rng(1).random((max(BATCH_SIZES), seq_length, 1)).astype(np.float32))
+
+    results = {}
+    for runtime in ['numpy', 'keras']:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', runtime,
+                               npz_path, keras_path, input_path], capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[{runtime}] FAILED:\n{proc.stderr.strip().splitlines()[-1]}")
+            continue
+        results[runtime] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    header = f"{'runtime':>8} | {'import':>8} | {'load':>8} | {'RSS':>8} | " + \
+             " | ".join(f"{'batch ' + str(n):>10}" for n in BATCH_SIZES)
+    print(header)
+    for runtime, r in results.items():
+        lat = " | ".join(f"{r['latency_ms'][str(n)]:>8.3f}ms" for n in BATCH_SIZES)
+        print(f"{runtime:>8} | {r['import_s']:>7.2f}s | {r['load_s']:>7.2f}s | {r['rss_mb']:>6.0f}MB | {lat}")
+
+    if len(results) == 2:
+        error = np.max(np.abs(np.load(input_path + '.numpy.npy') - np.load(input_path + '.keras.npy')))
+        status = 'OK' if error <= TOLERANCE else 'FAIL'
+        print(f"max abs error = {error:.2e} (tolerance {TOLERANCE}) -> {status}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(*sys.argv[2:6])
+    else:
+        main()
@@ -0,0 +1,197 @@
+"""
+Benchmark vòng nhận OpenFlow (Datapath._recv_loop): vòng cũ (recv header rồi recv phần còn lại,
+cắt buf[msg_len:] sau mỗi message) vs vòng mới (mỗi recv lấy tới socket-recv-buffer-size byte,
+message là slice của buf, chỉ giữ lại phần message dở dang).
+Luồng byte switch -> controller được phát lại qua socketpair; mặc định tự sinh giống 1 đợt
+reroute trên s_src (packet-in, flow stats reply nhiều phần, port stats, barrier reply, echo).
+Có thể phát lại capture thật: file raw của luồng TCP switch -> controller
+(Wireshark: Follow TCP Stream -> Show data as Raw -> Save).
+Chạy: python benchmark/bench_ofp_recv_loop.py [capture.raw]
+"""
+import os
+import sys
+import time
+import socket
+import struct
+import threading
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.ofproto import ofproto_common, ofproto_parser, ofproto_protocol
+from ryu.ofproto import ofproto_v1_3 as ofproto, ofproto_v1_3_parser as parser, ofproto_v1_3_columns
+from ryu.lib.pack_utils import msg_pack_into
+from ryu.lib.packet import packet, ethernet, ipv4, tcp
+from ryu.base import app_manager  # noqa: nạp trước controller (import vòng app_manager <-> controller)
+from ryu.controller import controller, ofp_event
+from ryu.controller.handler import MAIN_DISPATCHER
+from bench_flow_stats_decoder import make_reply as make_flow_stats_reply
+
+N_ROUNDS = 200          # mỗi vòng: 1 đợt stats + packet-in
+REPEAT = 3
+
+
+class ReplaySocket:
+    """Đầu nhận của 1 socketpair; 1 thread ghi luồng capture vào đầu kia (syscall thật)"""
+
+    def __init__(self, stream):
+        self.sock, peer = socket.socketpair()
+        self.calls = 0
+        self.writer = threading.Thread(target=self._replay, args=(peer, stream))
+        self.writer.start()
+
+    @staticmethod
+    def _replay(peer, stream):
+        with peer:
+            peer.sendall(stream)
+
+    def recv(self, n):
+        self.calls += 1
+        return self.sock.recv(n)
+
+    def close(self):
+        self.writer.join()
+        self.sock.close()
+
+
+class CountingBrick:
+    def __init__(self):
+        self.messages = []
+
+    def send_event_to_observers(self, ev, state=None):
+        if isinstance(ev, ofp_event.EventOFPMsgBase):
+            self.messages.append((ev.msg.msg_type, ev.msg.xid, ev.msg.msg_len))
+
+    def get_handlers(self, ev, state=None):
+        return []
+
+
+def make_datapath(stream):
+    dp = controller.Datapath.__new__(controller.Datapath)
+    ofproto_protocol.ProtocolDesc.__init__(dp, ofproto.OFP_VERSION)
+    dp.socket = ReplaySocket(stream)
+    dp.address = ('127.0.0.1', 6653)
+    dp.recv_buffer_size = controller.CONF.socket_recv_buffer_size
+    dp.ofp_brick = CountingBrick()
+    # như SmartController: handler flow stats duy nhất đã opt-in columnar_flow_stats
+    dp.columnar_decoder = lambda msg_cls: (ofproto_v1_3_columns.FlowStatsColumns
+                                           if msg_cls is parser.OFPFlowStatsReply else None)
+    dp.state = MAIN_DISPATCHER
+    dp.id = 1
+    return dp
+
+
+def legacy_recv_loop(self):
+    """Datapath._recv_loop trước khi đổi (ryu 4.34), bỏ phần xử lý timeout/lỗi socket"""
+    buf = bytearray()
+    min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+    while True:
+        read_len = min_read_len
+        if remaining_read_len > min_read_len:
+            read_len = remaining_read_len
+        ret = self.socket.recv(read_len)
+        if not ret:
+            break
+        buf += ret
+        buf_len = len(buf)
+        while buf_len >= min_read_len:
+            (version, msg_type, msg_len, xid) = struct.unpack_from(
+                ofproto_common.OFP_HEADER_PACK_STR, bytes(buf))
+            if msg_len < min_read_len:
+                msg_len = min_read_len
+            if buf_len < msg_len:
+                remaining_read_len = (msg_len - buf_len)
+                break
+            msg = ofproto_parser.msg(self, version, msg_type, msg_len, xid, buf[:msg_len])
+            if msg:
+                ev = ofp_event.ofp_msg_to_ev(msg)
+                self.ofp_brick.send_event_to_observers(ev, self.state)
+                for handler in [h for h in self.ofp_brick.get_handlers(ev)
+                                if self.state in h.callers[ev.__class__].dispatchers]:
+                    handler(ev)
+            buf = buf[msg_len:]
+            buf_len = len(buf)
+            remaining_read_len = min_read_len
+
+
+def new_recv_loop(self):
+    controller.Datapath._recv_loop(self)
+
+
+def header(msg_type, length, xid):
+    buf = bytearray()
+    msg_pack_into(ofproto.OFP_HEADER_PACK_STR, buf, 0, ofproto.OFP_VERSION, msg_type, length, xid)
+    return buf
+
+
+def make_packet_in(i):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst='00:00:00:00:00:0b', src='00:00:00:00:00:01'))
+    pkt.add_protocol(ipv4.ipv4(src=f'10.0.0.{i % 4 + 1}', dst=f'10.0.0.{i % 4 + 11}', proto=6))
+    pkt.add_protocol(tcp.tcp(src_port=1024 + i % 60000, dst_port=5001))
+    pkt.serialize()
+    match = bytearray()
+    length = parser.OFPMatch(in_port=i % 4 + 1).serialize(match, 0)
+    body = bytearray()
+    msg_pack_into(ofproto.OFP_PACKET_IN_PACK_STR, body, 0, ofproto.OFP_NO_BUFFER, len(pkt.data),
+                  ofproto.OFPR_NO_MATCH, 0, 0)
+    body += match[:length] + bytes(-length % 8) + bytes(2) + pkt.data
+    return bytes(header(ofproto.OFPT_PACKET_IN, ofproto.OFP_HEADER_SIZE + len(body), i) + body)
+
+
+def make_port_stats_reply(n_ports):
+    body = bytearray()
+    for port in range(1, n_ports + 1):
+        entry = bytearray()
+        msg_pack_into(ofproto.OFP_PORT_STATS_PACK_STR, entry, 0, port, *([random.randint(0, 1 << 30)] * 12),
+                      10, 0)
+        body += entry
+    reply = header(ofproto.OFPT_MULTIPART_REPLY, ofproto.OFP_MULTIPART_REPLY_SIZE + len(body), 2)
+    msg_pack_into(ofproto.OFP_MULTIPART_REPLY_PACK_STR, reply, ofproto.OFP_HEADER_SIZE, ofproto.OFPMP_PORT_STATS, 0)
+    return bytes(reply + body)
+
+
+def make_stream():
+    """1 đợt giám sát + reroute trên s_src: flow stats 2 phần, port stats, packet-in, barrier, echo"""
+    flow_stats, _ = make_flow_stats_reply(500)
+    first = bytearray(flow_stats)
+    struct.pack_into('!H', first, ofproto.OFP_HEADER_SIZE + 2, ofproto.OFPMPF_REPLY_MORE)
+    round_ = [bytes(first), flow_stats, make_port_stats_reply(9)]
+    round_ += [make_packet_in(i) for i in range(50)]
+    round_ += [bytes(header(ofproto.OFPT_BARRIER_REPLY, ofproto.OFP_HEADER_SIZE, i)) for i in range(50)]
+    round_ += [bytes(header(ofproto.OFPT_ECHO_REQUEST, ofproto.OFP_HEADER_SIZE, 0))]
+    return b''.join(round_) * N_ROUNDS
+
+
+def bench(loop, stream):
+    best, messages, calls = float('inf'), None, 0
+    for _ in range(REPEAT):
+        dp = make_datapath(stream)
+        start = time.perf_counter()
+        loop(dp)
+        dp.socket.close()
+        best = min(best, time.perf_counter() - start)
+        messages, calls = dp.ofp_brick.messages, dp.socket.calls
+    return best, messages, calls
+
+
+def main():
+    random.seed(42)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            stream = f.read()
+    else:
+        stream = make_stream()
+    mb = len(stream) / 1e6
+    t_old, expected, calls_old = bench(legacy_recv_loop, stream)
+    t_new, messages, calls_new = bench(new_recv_loop, stream)
+    assert messages == expected
+    n = len(messages)
+    print(f"stream: {mb:.1f} MB, {n} messages")
+    print(f"{'loop':>10} | {'msgs/s':>10} | {'MB/s':>8} | {'recv calls':>10}")
+    print(f"{'recv':>10} | {n / t_old:>10,.0f} | {mb / t_old:>8.1f} | {calls_old:>10,}")
+    print(f"{'recv 256K':>10} | {n / t_new:>10,.0f} | {mb / t_new:>8.1f} | {calls_new:>10,}")
+    print(f"speedup: {t_old / t_new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
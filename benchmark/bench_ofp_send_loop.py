@@ -0,0 +1,128 @@
+"""
+Benchmark đường gửi OpenFlow (Datapath.send_msg -> _send_loop) lúc cài proactive / reroute hàng loạt:
+vòng cũ (hub.Queue(16), 1 sendall cho mỗi message) vs gộp các message đang chờ thành 1 lần ghi
+(hàng đợi giới hạn theo số message + byte). Kết nối TCP loopback thật, 1 green thread đọc phía switch.
+Chạy: python benchmark/bench_ofp_send_loop.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.lib import hub
+from ryu.base import app_manager
+from ryu.controller import controller
+from ryu.controller.handler import DEAD_DISPATCHER
+from ryu.ofproto import ofproto_v1_3 as ofproto, ofproto_v1_3_parser as parser
+
+BURSTS = [1, 100, 500, 2000]    # số FlowMod mỗi đợt (+1 barrier)
+N_BURSTS = 10
+
+
+class NullBrick:
+    def send_event_to_observers(self, ev, state=None):
+        pass
+
+
+class LegacyDatapath(controller.Datapath):
+    """Đường gửi trước khi đổi (ryu 4.34)"""
+
+    def __init__(self, *args):
+        super(LegacyDatapath, self).__init__(*args)
+        self.send_q = hub.Queue(16)
+        self._send_q_sem = hub.BoundedSemaphore(self.send_q.maxsize)
+        self.writes = 0
+
+    def _send_loop(self):
+        try:
+            while self.state != DEAD_DISPATCHER:
+                buf, close_socket = self.send_q.get()
+                self._send_q_sem.release()
+                self.socket.sendall(buf)
+                self.writes += 1
+                if close_socket:
+                    break
+        except IOError:
+            pass
+
+    def send(self, buf, close_socket=False):
+        self._send_q_sem.acquire()
+        if self.send_q:
+            self.send_q.put((buf, close_socket))
+            return True
+        self._send_q_sem.release()
+        return False
+
+
+def flow_mods(datapath, n):
+    """FlowMod giống ProactiveProgrammer / reroute: match IPv4 đích -> output"""
+    msgs = []
+    for i in range(n):
+        match = parser.OFPMatch(eth_type=0x800, ipv4_dst=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}')
+        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, [parser.OFPActionOutput(5 + i % 5)])]
+        msgs.append(parser.OFPFlowMod(datapath=datapath, priority=5, match=match, instructions=inst))
+    return msgs
+
+
+def reader(sock, total, done):
+    received = 0
+    while received < total:
+        data = sock.recv(1 << 16)
+        if not data:
+            break
+        received += len(data)
+    done.set()
+
+
+def run(dp_cls, burst):
+    server = hub.listen(('127.0.0.1', 0))
+    client = hub.connect(server.getsockname())
+    switch_sock, addr = server.accept()
+    dp = dp_cls(client, addr)
+    dp.set_version(ofproto.OFP_VERSION)
+    send_thr = hub.spawn(dp._send_loop)
+
+    bursts = []
+    for _ in range(N_BURSTS):
+        msgs = flow_mods(dp, burst) + [parser.OFPBarrierRequest(dp)]
+        for msg in msgs:
+            dp.set_xid(msg)
+            msg.serialize()
+        bursts.append(msgs)
+    total = sum(len(msg.buf) for msgs in bursts for msg in msgs)
+
+    done = hub.Event()
+    read_thr = hub.spawn(reader, switch_sock, total, done)
+    start = time.perf_counter()
+    for msgs in bursts:
+        for msg in msgs:
+            dp.send(msg.buf)
+        hub.sleep(0)
+    done.wait()
+    elapsed = time.perf_counter() - start
+
+    dp.state = DEAD_DISPATCHER
+    hub.kill(send_thr)
+    hub.kill(read_thr)
+    for sock in (client, switch_sock, server):
+        sock.close()
+    n = sum(len(msgs) for msgs in bursts)
+    writes = dp.writes if isinstance(dp, LegacyDatapath) else dp.send_stats()['writes']
+    return n / elapsed, writes, dp
+
+
+def main():
+    app_manager.SERVICE_BRICKS['ofp_event'] = NullBrick()
+    print(f"{'burst':>6} | {'legacy msgs/s':>13} | {'writes':>7} | {'coalesced msgs/s':>16} | {'writes':>7} | "
+          f"{'msgs/write':>10} | {'stalls':>6} | {'stall ms':>8} | {'speedup':>7}")
+    for burst in BURSTS:
+        rate_old, writes_old, _ = run(LegacyDatapath, burst)
+        rate_new, writes_new, dp = run(controller.Datapath, burst)
+        st = dp.send_stats()
+        print(f"{burst:>6} | {rate_old:>13,.0f} | {writes_old:>7} | {rate_new:>16,.0f} | {writes_new:>7} | "
+              f"{st['msgs_per_write']:>10.1f} | {st['stalls']:>6} | {st['stall_time'] * 1e3:>8.1f} | "
+              f"{rate_new / rate_old:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
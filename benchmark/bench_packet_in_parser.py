@@ -0,0 +1,78 @@
+"""
+Benchmark parse packet-in: ryu.lib.packet (Packet + get_protocol như handler cũ)
+vs parser nhanh struct/memoryview (packet_parser.py).
+Chạy: python benchmark/bench_packet_in_parser.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, arp, ether_types
+from packet_parser import parse_headers, parse_headers_full
+
+N_PACKETS = 20000
+REPEAT = 3
+
+
+def make_packet(i):
+    """Gói giống packet-in trên s_src: TCP/UDP giữa 10.0.0.x và 10.0.0.1x, thỉnh thoảng ARP"""
+    src_mac, dst_mac = f'00:00:00:00:00:0{i % 4 + 1}', f'00:00:00:00:00:{i % 4 + 11:02x}'
+    pkt = packet.Packet()
+    if i % 50 == 0:
+        pkt.add_protocol(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=src_mac, ethertype=ether_types.ETH_TYPE_ARP))
+        pkt.add_protocol(arp.arp(src_mac=src_mac, src_ip=f'10.0.0.{i % 4 + 1}', dst_ip=f'10.0.0.{i % 4 + 11}'))
+    else:
+        proto = random.choice([6, 17])
+        pkt.add_protocol(ethernet.ethernet(dst=dst_mac, src=src_mac, ethertype=ether_types.ETH_TYPE_IP))
+        pkt.add_protocol(ipv4.ipv4(src=f'10.0.0.{i % 4 + 1}', dst=f'10.0.0.{i % 4 + 11}', proto=proto))
+        sport, dport = random.randint(1024, 65535), random.choice([80, 443, 5001, 5060])
+        pkt.add_protocol(tcp.tcp(src_port=sport, dst_port=dport) if proto == 6
+                         else udp.udp(src_port=sport, dst_port=dport))
+        pkt.add_protocol(bytes(random.choice([0, 64, 1400])))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def parse_old(data):
+    """Như handler cũ: parse mọi lớp rồi get_protocol 2 lần"""
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocol(ethernet.ethernet)
+    if eth.ethertype == ether_types.ETH_TYPE_IP:
+        ip = pkt.get_protocol(ipv4.ipv4)
+        return eth.src, ip.src, ip.dst, ip.proto
+    return eth.src, None, None, None
+
+
+def parse_new(data):
+    return parse_headers(data) or parse_headers_full(data)
+
+
+def bench(func, packets):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for data in packets:
+            func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    random.seed(42)
+    packets = [make_packet(i) for i in range(N_PACKETS)]
+    for data in packets[:500]:
+        assert parse_headers(data) == parse_headers_full(data)
+
+    t_old = bench(parse_old, packets)
+    t_full = bench(parse_headers_full, packets)
+    t_new = bench(parse_new, packets)
+    print(f"{'parser':>24} | {'packet-in/s':>12} | {'us/packet':>10}")
+    for name, t in [('ryu Packet (old)', t_old), ('ryu Packet (fallback)', t_full), ('struct fast path', t_new)]:
+        print(f"{name:>24} | {N_PACKETS / t:>12,.0f} | {t / N_PACKETS * 1e6:>10.2f}")
+    print(f"speedup vs old: {t_old / t_new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,10 @@ from ryu.controller.handler import set_ev_cls
 from ryu.lib import hub
 from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, ether_types
 
+from flow_state import FlowStateStore
+
+FLOW_MAX_IDLE = 60  # Flow không xuất hiện quá 60s -> giải phóng slot trạng thái
+
 class TrafficCollector(simple_switch_13.SimpleSwitch13):
     def __init__(self, *args, **kwargs):
         super(TrafficCollector, self).__init__(*args, **kwargs)
@@ -35,7 +39,7 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
             ])
             self.csv_file.flush()
             
-        self.previous_stats = {} 
+        self.flow_state = FlowStateStore(history_len=1)  # Bộ đếm lần trước của mỗi flow (để tính rate)
         print(f"TrafficCollector started. Logging to {self.file_name}")
 
     @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
@@ -185,6 +189,7 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
         # Lọc các flow IP (priority 10 đã set ở trên)
         sorted_flows = sorted([flow for flow in body if flow.priority == 10],
                               key=lambda flow: (flow.match.get('in_port', 0), flow.match.get('eth_dst', '')))
+        rows = []
 
         for stat in sorted_flows:
             # Lấy thông tin cơ bản
@@ -206,31 +211,6 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
             # Tạo Key duy nhất cho Flow này
             flow_key = (ev.msg.datapath.id, ip_src, ip_dst, ip_proto, tp_src, tp_dst)
             
-            # Tính toán tốc độ (Rate)
-            byte_rate = 0.0
-            packet_rate = 0.0
-            
-            if flow_key in self.previous_stats:
-                prev_stat = self.previous_stats[flow_key]
-                delta_bytes = stat.byte_count - prev_stat['byte_count']
-                delta_packets = stat.packet_count - prev_stat['packet_count']
-                delta_sec = stat.duration_sec - prev_stat['duration_sec']
-                delta_nsec = stat.duration_nsec - prev_stat['duration_nsec']
-                
-                total_delta_time = delta_sec + (delta_nsec / 1000000000.0)
-
-                if total_delta_time > 0.01: # Tránh chia cho số quá nhỏ
-                    byte_rate = delta_bytes / total_delta_time
-                    packet_rate = delta_packets / total_delta_time
-            
-            # Lưu trạng thái hiện tại
-            self.previous_stats[flow_key] = {
-                'byte_count': stat.byte_count,
-                'packet_count': stat.packet_count,
-                'duration_sec': stat.duration_sec,
-                'duration_nsec': stat.duration_nsec
-            }
-
             # --- LOGIC GÁN NHÃN (LABELING) ---
             # Logic này phải khớp với kịch bản Mininet (Port của iperf server)
             label = 'unknown'
@@ -243,6 +223,21 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
             else:
                 label = 'background' # Các lưu lượng khác (ARP, ICMP, Noise...)
 
+            rows.append((stat, flow_key, ip_src, ip_dst, ip_proto, tp_src, tp_dst, label))
+
+        if not rows: return
+
+        # Tính toán tốc độ (Rate) cho mọi flow cùng lúc; khoảng thời gian <= 0.01s -> rate 0
+        _, byte_rates, packet_rates = self.flow_state.update(
+            [row[1] for row in rows],
+            [row[0].byte_count for row in rows],
+            [row[0].packet_count for row in rows],
+            [row[0].duration_sec + row[0].duration_nsec / 1000000000.0 for row in rows],
+            now=timestamp, min_interval=0.01)
+        self.flow_state.expire(timestamp, FLOW_MAX_IDLE)
+
+        for (stat, flow_key, ip_src, ip_dst, ip_proto, tp_src, tp_dst, label), byte_rate, packet_rate \
+                in zip(rows, byte_rates, packet_rates):
             # Chỉ ghi file nếu có dữ liệu truyền qua (byte_rate > 0 hoặc mới xuất hiện)
             # Giúp file CSV gọn hơn, tránh ghi dòng toàn số 0
             if stat.byte_count > 0:
@@ -0,0 +1,47 @@
+# Cookie 64 bit cho flow do controller cài:
+#     63..48  APP_TAG     đánh dấu flow của AI controller (lọc stats bằng cookie_mask)
+#     47..40  class id    nhãn lúc cài (UNCLASSIFIED nếu chưa phân loại)
+#     39..32  path        cổng ra lúc cài
+#     31..0   generation  tăng mỗi lần cài -> phân biệt flow cài lại cùng match
+# OpenFlow 1.3 không đổi cookie khi OFPFC_MODIFY, nên class/path là giá trị lúc cài;
+# generation dùng để MODIFY_STRICT đúng flow đã đọc stats (flow hết hạn rồi cài lại thì bỏ qua).
+#
+# Rule proactive / theo cặp (ProactiveProgrammer):
+#     63..48  PROACTIVE_TAG
+#     31..0   version topology lúc cài -> topology đổi thì xóa rule version cũ bằng cookie_mask
+
+APP_TAG = 0x5C01
+APP_MASK = 0xFFFF << 48
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+UNCLASSIFIED = 0xFF
+PROACTIVE_TAG = 0x5C02
+PROACTIVE_MASK = (0xFFFF << 48) | 0xFFFFFFFF    # tag + version
+
+
+def make_cookie(class_id, path, generation):
+    return (APP_TAG << 48) | ((class_id & 0xFF) << 40) | ((path & 0xFF) << 32) | (generation & 0xFFFFFFFF)
+
+
+def make_proactive_cookie(version):
+    return (PROACTIVE_TAG << 48) | (version & 0xFFFFFFFF)
+
+
+def parse_cookie(cookie):
+    """cookie -> (class_id, path, generation); không phải flow của AI controller -> None"""
+    if not is_ai_cookie(cookie): return None
+    return (cookie >> 40) & 0xFF, (cookie >> 32) & 0xFF, cookie & 0xFFFFFFFF
+
+
+def is_ai_cookie(cookie):
+    return (cookie & APP_MASK) == (APP_TAG << 48)
+
+
+class CookieAllocator(object):
+    """Cấp cookie với generation tăng dần (quay vòng ở 2^32)"""
+
+    def __init__(self):
+        self.generation = 0
+
+    def next(self, class_id=UNCLASSIFIED, path=0):
+        self.generation = (self.generation + 1) & 0xFFFFFFFF
+        return make_cookie(class_id, path, self.generation)
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Tên các đặc trưng (Phải khớp chính xác với lúc train trong notebook)
+FEATURE_NAMES = ['ip_proto', 'packet_count', 'byte_count',
+                 'duration_sec', 'byte_rate', 'packet_rate', 'avg_packet_size']
+
+AI_FLOW_PRIORITY = 10
+OFPXMT_OFB_IP_PROTO = 10     # ofproto_v1_3.OFPXMT_OFB_IP_PROTO
+
+
+def get_out_port(stat):
+    """Lấy cổng ra (action Output cuối cùng) của một flow entry, 0 nếu không có"""
+    out_port = 0
+    if stat.instructions:
+        for action in stat.instructions[0].actions:
+            if hasattr(action, 'port'): out_port = action.port
+    return out_port
+
+
+def build_feature_matrix(body, priority=AI_FLOW_PRIORITY):
+    """
+    Chuyển toàn bộ FlowStatsReply thành 1 ma trận đặc trưng (n_flows, 7).
+    Trả về (stats, features): stats[i] là flow entry ứng với hàng i.
+    """
+    stats = [s for s in body if s.priority == priority and s.duration_sec > 0]
+    if not stats:
+        return stats, np.empty((0, len(FEATURE_NAMES)), dtype=np.float64)
+
+    n = len(stats)
+    ip_proto = np.fromiter((s.match.get('ip_proto', 17) for s in stats), dtype=np.float64, count=n)
+    packet_count = np.fromiter((s.packet_count for s in stats), dtype=np.float64, count=n)
+    byte_count = np.fromiter((s.byte_count for s in stats), dtype=np.float64, count=n)
+    duration = np.fromiter((s.duration_sec for s in stats), dtype=np.float64, count=n)
+    return stats, _feature_matrix(ip_proto, packet_count, byte_count, duration)
+
+
+def build_feature_matrix_columns(columns, priority=AI_FLOW_PRIORITY):
+    """
+    Như build_feature_matrix nhưng từ FlowStatsColumns (decoder columnar của ryu), không qua object từng flow.
+    Trả về (flows, features): flows là FlowStatsColumns đã lọc, hàng i ứng với flows[i].
+    """
+    flows = columns.take((columns.priority == priority) & (columns.duration_sec > 0))
+    ip_proto = np.where(flows.has(OFPXMT_OFB_IP_PROTO), flows.ip_proto, 17)
+    return flows, _feature_matrix(ip_proto.astype(np.float64), flows.packet_count.astype(np.float64),
+                                  flows.byte_count.astype(np.float64), flows.duration_sec.astype(np.float64))
+
+
+def _feature_matrix(ip_proto, packet_count, byte_count, duration):
+    n = len(ip_proto)
+    # Tính rate cho tất cả flow cùng lúc (duration > 0 đã được lọc ở trên)
+    byte_rate = byte_count / duration
+    packet_rate = packet_count / duration
+    avg_packet_size = np.divide(byte_count, packet_count,
+                                out=np.zeros(n), where=packet_count > 0)
+
+    return np.column_stack((ip_proto, packet_count, byte_count, duration,
+                            byte_rate, packet_rate, avg_packet_size))
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class FlowStateStore(object):
+    """
+    Trạng thái theo flow lưu trong các cột NumPy cấp phát sẵn thay vì dict-of-dicts.
+    - Mỗi khóa flow (tuple) được gán 1 slot số nguyên; slot của flow hết hạn được đưa vào
+      free list để tái sử dụng -> bộ nhớ không tăng mãi khi có nhiều flow ngắn hạn.
+    - Bộ đếm (byte/packet), thời điểm của bộ đếm, lần thấy cuối và lịch sử tốc độ (ring buffer
+      history_len phần tử) đều là mảng -> tính tốc độ cho mọi flow trong 1 phép toán vector.
+    - Hết chỗ thì tăng gấp đôi dung lượng.
+    """
+
+    def __init__(self, capacity=1024, history_len=10):
+        self.slots = {}         # khóa flow -> slot
+        self.free = []          # slot trống (tái sử dụng trước khi cấp slot mới)
+        self.next_slot = 0
+        self.history_len = history_len
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.byte_count = np.zeros(capacity, dtype=np.int64)
+        self.packet_count = np.zeros(capacity, dtype=np.int64)
+        self.timestamp = np.zeros(capacity, dtype=np.float64)   # thời điểm của bộ đếm (giây)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.valid = np.zeros(capacity, dtype=bool)             # đã có bộ đếm trước đó chưa
+        self.history = np.zeros((capacity, self.history_len), dtype=np.float64)
+        self.history_count = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        old = (self.byte_count, self.packet_count, self.timestamp, self.last_seen,
+               self.valid, self.history, self.history_count)
+        n = self.capacity
+        self._allocate(n * 2)
+        for new, prev in zip((self.byte_count, self.packet_count, self.timestamp, self.last_seen,
+                              self.valid, self.history, self.history_count), old):
+            new[:n] = prev
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    @property
+    def nbytes(self):
+        return (self.byte_count.nbytes + self.packet_count.nbytes + self.timestamp.nbytes +
+                self.last_seen.nbytes + self.valid.nbytes + self.history.nbytes + self.history_count.nbytes)
+
+    def slot_of(self, key):
+        """Slot của khóa, cấp mới nếu chưa có"""
+        slot = self.slots.get(key)
+        if slot is not None: return slot
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.next_slot == self.capacity: self._grow()
+            slot = self.next_slot
+            self.next_slot += 1
+        self.slots[key] = slot
+        self.valid[slot] = False
+        self.history_count[slot] = 0
+        return slot
+
+    def slots_of(self, keys):
+        return np.fromiter((self.slot_of(k) for k in keys), dtype=np.intp, count=len(keys))
+
+    def update(self, keys, byte_count, packet_count, timestamp, now=None, min_interval=0.0):
+        """
+        Ghi bộ đếm mới cho 1 batch flow, trả về (slots, byte_rate, packet_rate).
+        Tốc độ = chênh lệch bộ đếm / chênh lệch timestamp; flow mới hoặc khoảng thời gian
+        <= min_interval cho tốc độ 0.
+        """
+        slots = self.slots_of(keys)
+        byte_count = np.asarray(byte_count, dtype=np.int64)
+        packet_count = np.asarray(packet_count, dtype=np.int64)
+        timestamp = np.broadcast_to(np.asarray(timestamp, dtype=np.float64), slots.shape)
+
+        d_time = timestamp - self.timestamp[slots]
+        ok = self.valid[slots] & (d_time > min_interval)
+        safe_time = np.where(ok, d_time, 1.0)
+        byte_rate = np.where(ok, (byte_count - self.byte_count[slots]) / safe_time, 0.0)
+        packet_rate = np.where(ok, (packet_count - self.packet_count[slots]) / safe_time, 0.0)
+
+        self.byte_count[slots] = byte_count
+        self.packet_count[slots] = packet_count
+        self.timestamp[slots] = timestamp
+        self.last_seen[slots] = timestamp if now is None else now
+        self.valid[slots] = True
+        return slots, byte_rate, packet_rate
+
+    def push_history(self, slots, values, repeat=1):
+        """Thêm giá trị vào ring buffer lịch sử của mỗi slot, lặp lại repeat lần (nhiều mẫu cùng giá trị)"""
+        for _ in range(min(repeat, self.history_len)):
+            pos = self.history_count[slots] % self.history_len
+            self.history[slots, pos] = values
+            self.history_count[slots] += 1
+
+    def get_history(self, slots, length=None):
+        """
+        (values, counts): values (n, length) từ cũ -> mới; slot chưa đủ dữ liệu được
+        đệm bằng giá trị mới nhất (slot chưa có dữ liệu -> 0), counts = số giá trị thật.
+        """
+        length = self.history_len if length is None else min(length, self.history_len)
+        slots = np.asarray(slots, dtype=np.intp)
+        count = self.history_count[slots]
+        steps = np.arange(length) - length                          # -length .. -1
+        pos = (count[:, None] + steps) % self.history_len
+        values = self.history[slots[:, None], pos]
+        latest = self.history[slots, (count - 1) % self.history_len]
+        missing = steps < -np.minimum(count, length)[:, None]
+        values = np.where(missing, latest[:, None], values)
+        values[count == 0] = 0.0
+        return values, np.minimum(count, length)
+
+    def resize_history(self, history_len):
+        """Đổi độ dài lịch sử (vd. model mới có seq_length khác), giữ lại các giá trị mới nhất"""
+        if history_len == self.history_len: return
+        values, counts = self.get_history(np.arange(self.capacity))
+        keep = np.minimum(counts, history_len)
+        # Giá trị thật nằm ở cuối mỗi hàng -> dồn về đầu ring buffer mới (vị trí 0..keep-1)
+        cols = values.shape[1] - keep[:, None] + np.arange(history_len)
+        self.history = np.where(np.arange(history_len) < keep[:, None],
+                                np.take_along_axis(values, np.minimum(cols, values.shape[1] - 1), axis=1), 0.0)
+        self.history_len = history_len
+        self.history_count = keep
+
+    def release(self, key):
+        slot = self.slots.pop(key, None)
+        if slot is not None: self.free.append(slot)
+
+    def expire(self, now, max_idle):
+        """Giải phóng mọi flow không xuất hiện trong max_idle giây, trả về số flow bị xóa"""
+        if not self.slots: return 0
+        keys = list(self.slots)
+        slots = np.fromiter(self.slots.values(), dtype=np.intp, count=len(keys))
+        stale = np.flatnonzero(self.last_seen[slots] < now - max_idle)
+        for i in stale:
+            self.release(keys[i])
+        return len(stale)
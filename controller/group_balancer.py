@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class GroupBalancer(object):
+    """
+    Cân bằng tải trong data plane bằng 1 group OFPGT_SELECT, mỗi cổng uplink 1 bucket.
+    - Trọng số bucket tỉ lệ với dung lượng còn trống dự đoán của mỗi đường (capacity - load),
+      mỗi đường giữ tối thiểu min_share để không bị bỏ đói.
+    - Chỉ gửi OFPGC_MODIFY khi trọng số đổi >= min_change: đổi bucket có thể làm switch
+      hash lại flow đang chạy, không nên sửa mỗi chu kỳ.
+    """
+
+    def __init__(self, ports, group_id=1, capacity=2_500_000.0, total_weight=100,
+                 min_share=0.05, min_change=5):
+        self.ports = list(ports)
+        self.group_id = group_id
+        self.capacity = capacity        # bytes/s mỗi đường
+        self.total_weight = total_weight
+        self.min_share = min_share
+        self.min_change = min_change
+        equal = total_weight // len(self.ports)
+        self.weights = [equal] * len(self.ports)
+        self.updates = 0
+
+    def compute_weights(self, loads):
+        spare = np.maximum(self.capacity - np.asarray(loads, dtype=np.float64), self.capacity * self.min_share)
+        weights = np.maximum(np.rint(spare / spare.sum() * self.total_weight), 1).astype(int)
+        return weights.tolist()
+
+    def _group_mod(self, datapath, command, weights):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        buckets = [parser.OFPBucket(weight=w, watch_port=port, actions=[parser.OFPActionOutput(port)])
+                   for port, w in zip(self.ports, weights)]
+        return parser.OFPGroupMod(datapath, command, ofproto.OFPGT_SELECT, self.group_id, buckets)
+
+    def install(self, datapath, modify=False):
+        """
+        Gọi khi switch kết nối: xóa group cũ (nếu controller khởi động lại) rồi tạo mới.
+        modify=True khi topology được tính lại và group đã có trên switch: chỉ thay bucket,
+        vì xóa group trong OpenFlow xóa luôn mọi flow trỏ tới group (flow AI, fast-path).
+        """
+        ofproto = datapath.ofproto
+        if modify:
+            datapath.send_msg(self._group_mod(datapath, ofproto.OFPGC_MODIFY, self.weights))
+            return
+        remove_group(datapath, self.group_id)
+        datapath.send_msg(self._group_mod(datapath, ofproto.OFPGC_ADD, self.weights))
+
+    def update(self, datapath, loads):
+        """Cập nhật trọng số theo tải (bytes/s mỗi cổng); trả về True nếu đã gửi GroupMod"""
+        weights = self.compute_weights(loads)
+        if max(abs(a - b) for a, b in zip(weights, self.weights)) < self.min_change: return False
+        self.weights = weights
+        self.updates += 1
+        if datapath is not None:
+            datapath.send_msg(self._group_mod(datapath, datapath.ofproto.OFPGC_MODIFY, weights))
+        return True
+
+    def action(self, parser):
+        return parser.OFPActionGroup(self.group_id)
+
+
+def remove_group(datapath, group_id):
+    """Xóa group SELECT (switch xóa luôn các flow trỏ tới nó)"""
+    ofproto = datapath.ofproto
+    parser = datapath.ofproto_parser
+    datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_DELETE, ofproto.OFPGT_SELECT, group_id))
@@ -0,0 +1,152 @@
+import time
+from collections import deque
+
+from eventlet import patcher
+from ryu.lib import hub
+
+# ryu-manager gọi hub.patch(thread=True): threading/queue (và ThreadPoolExecutor) thành green thread.
+# Worker phải là thread OS thật -> lấy module gốc chưa bị patch.
+_threading = patcher.original('threading')
+_queue = patcher.original('queue')
+
+
+class _Job(object):
+    __slots__ = ('key', 'seq', 'func', 'args', 'callback', 'max_age', 'submit_time', 'start_time')
+
+    def __init__(self, key, seq, func, args, callback, max_age):
+        self.key = key
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.max_age = max_age
+        self.submit_time = time.monotonic()
+        self.start_time = None
+
+
+class InferenceExecutor(object):
+    """
+    Chạy inference (sklearn / TensorFlow) và load model trên thread OS thật thay vì trên eventlet hub.
+    - Worker, lock và hàng đợi lấy từ threading/queue gốc (eventlet.patcher.original), vì ryu-manager
+      patch thread=True: thread của threading/ThreadPoolExecutor lúc đó chỉ là green thread, job CPU
+      sẽ chặn cả hub. numpy/TF nhả GIL khi tính toán -> hub vẫn nhận packet-in, echo, stats reply.
+    - Kết quả được đưa về hub qua hàng đợi, callback luôn chạy trong green thread
+      (an toàn để gọi datapath.send_msg).
+    - Mỗi key chỉ giữ request mới nhất: request cũ chưa chạy bị gộp (bỏ),
+      kết quả cũ hơn kết quả đã áp dụng hoặc quá max_age giây cũng bị bỏ.
+    """
+
+    def __init__(self, max_workers=2, max_age=2.0, poll_interval=0.01):
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.jobs = _queue.Queue()
+        self.results = _queue.Queue()
+        self.lock = _threading.Lock()
+        self.workers = [_threading.Thread(target=self._worker, name=f'ai-infer-{i}', daemon=True)
+                        for i in range(max_workers)]
+        for worker in self.workers:
+            worker.start()
+
+        self.seq = 0
+        self.latest = {}    # key -> seq của request mới nhất đã submit
+        self.applied = {}   # key -> seq của kết quả mới nhất đã áp dụng
+        self.queued = 0     # số job đang chờ worker
+
+        self.submitted = 0
+        self.completed = 0
+        self.merged = 0     # request bị thay thế trước khi chạy
+        self.dropped = 0    # kết quả quá hạn / lỗi thời bị bỏ
+        self.errors = 0
+        self.wait_time = deque(maxlen=100)     # thời gian chờ trong hàng đợi (giây)
+        self.latency = deque(maxlen=100)       # submit -> áp dụng kết quả (giây)
+
+        self.drain_thread = hub.spawn(self._drain_loop)
+
+    def submit(self, key, func, args=(), callback=None, max_age=None):
+        """
+        Gửi 1 batch inference. Gọi từ hub; callback(result) sẽ chạy lại trên hub.
+        max_age=None dùng giá trị mặc định của executor (job dài như load model nên truyền lớn hơn).
+        """
+        with self.lock:
+            self.seq += 1
+            job = _Job(key, self.seq, func, args, callback,
+                       self.max_age if max_age is None else max_age)
+            self.latest[key] = job.seq
+            self.queued += 1
+            self.submitted += 1
+        self.jobs.put(job)
+        return job.seq
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None: return
+            self._run(job)
+
+    def _run(self, job):
+        # Chạy trong worker thread
+        with self.lock:
+            self.queued -= 1
+            superseded = self.latest.get(job.key) != job.seq
+            if superseded: self.merged += 1
+        if superseded: return
+
+        job.start_time = time.monotonic()
+        try:
+            result = job.func(*job.args)
+            error = None
+        except Exception as e:
+            result, error = None, e
+        self.results.put((job, result, error))
+
+    def _drain_loop(self):
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except _queue.Empty:
+                hub.sleep(self.poll_interval)
+                continue
+            self._apply(job, result, error)
+
+    def _apply(self, job, result, error):
+        now = time.monotonic()
+        self.wait_time.append(job.start_time - job.submit_time)
+
+        if error is not None:
+            self.errors += 1
+            print(f"!!! [AI EXECUTOR] {job.key} failed: {error}")
+            return
+        if job.seq < self.applied.get(job.key, 0) or now - job.submit_time > job.max_age:
+            self.dropped += 1
+            return
+
+        self.applied[job.key] = job.seq
+        self.completed += 1
+        self.latency.append(now - job.submit_time)
+        if job.callback is not None:
+            try:
+                job.callback(result)
+            except Exception as e:
+                self.errors += 1
+                print(f"!!! [AI EXECUTOR] callback {job.key} failed: {e}")
+
+    def stats(self):
+        """Độ sâu hàng đợi, độ trễ và số request bị gộp/bỏ (dùng cho log/metrics)"""
+        def avg_ms(values):
+            return (sum(values) / len(values) * 1000) if values else 0.0
+        return {
+            'queue_depth': self.queued + self.results.qsize(),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'merged': self.merged,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'avg_wait_ms': avg_ms(self.wait_time),
+            'avg_latency_ms': avg_ms(self.latency),
+            'max_latency_ms': max(self.latency) * 1000 if self.latency else 0.0,
+        }
+
+    def shutdown(self):
+        hub.kill(self.drain_thread)
+        for _ in self.workers:
+            self.jobs.put(None)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+
+import numpy as np
+
+from flow_features import FEATURE_NAMES
+from numpy_lstm import NumpyLSTM
+from tree_compiler import CompiledForest
+
+
+class ModelBundle(object):
+    """
+    1 bộ model hoàn chỉnh (classifier + forecaster + cấu hình).
+    Controller chỉ giữ 1 tham chiếu self.models -> đổi model = gán lại 1 biến (atomic trên hub).
+    """
+
+    def __init__(self, version='default'):
+        self.version = version
+        self.cls_model = None
+        self.cls_scaler = None      # None nếu classifier đã compile (scaler gộp vào threshold)
+        self.pred_model = None
+        self.pred_scaler = None
+        self.pred_type = 'LSTM'
+        self.seq_length = 10
+        self.timings = {}
+
+    def classify(self, features):
+        """features: ma trận (n_flows, 7) thô -> mảng nhãn (int)"""
+        if self.cls_scaler is None:
+            return self.cls_model.predict(features)
+        # --- FIX: Dùng DataFrame để có tên cột, tránh warning ---
+        import pandas as pd     # Chỉ cần cho classifier sklearn (chưa compile)
+        features_df = pd.DataFrame(features, columns=FEATURE_NAMES)
+        return self.cls_model.predict(self.cls_scaler.transform(features_df))
+
+    def forecast(self, history, has_data):
+        """history: (n_ports, seq_length) bytes/s -> tải dự đoán mỗi cổng (0 nếu chưa có dữ liệu)"""
+        preds = np.zeros(len(history))
+        if not has_data.any(): return preds
+        if self.pred_type == 'LSTM':
+            data_raw = history[has_data].reshape(-1, 1)
+            X_input = self.pred_scaler.transform(data_raw).reshape(-1, self.seq_length, 1)
+            # Gọi model trực tiếp thay vì predict() (tránh chi phí cố định mỗi lần gọi)
+            pred = np.asarray(self.pred_model(X_input.astype(np.float32), training=False))
+            preds[has_data] = self.pred_scaler.inverse_transform(pred.reshape(-1, 1)).ravel()
+        else:
+            preds[has_data] = history[has_data, -1]
+        return preds
+
+    def warm_up(self):
+        """Chạy thử 1 batch để lần gọi thật đầu tiên không bị chậm (lazy init của TF/NumPy)"""
+        self.classify(np.ones((1, len(FEATURE_NAMES))))
+        self.forecast(np.zeros((1, self.seq_length)), np.ones(1, dtype=bool))
+
+
+def _read_pred_config(bundle, pred_path):
+    json_config = os.path.join(pred_path, 'model_config.json')
+    txt_config = os.path.join(pred_path, 'model_config.txt')
+    if os.path.exists(json_config):
+        with open(json_config, 'r') as f:
+            config = json.load(f)
+            bundle.pred_type = config.get('best_model_type', 'LSTM')
+            bundle.seq_length = int(config.get('sequence_length', 10))
+    elif os.path.exists(txt_config):
+        with open(txt_config, 'r') as f:
+            bundle.seq_length = int(f.read().strip())
+
+
+def load_bundle(cls_path, pred_path, version='default'):
+    """Load + warm-up toàn bộ model. Chạy được ngoài hub (worker thread). Lỗi -> raise."""
+    bundle = ModelBundle(version)
+
+    start = time.perf_counter()
+    # Ưu tiên bản compile (scaler đã gộp vào threshold, không cần sklearn)
+    compiled_path = os.path.join(cls_path, 'best_classifier_compiled.npz')
+    if os.path.exists(compiled_path):
+        bundle.cls_model = CompiledForest.load(compiled_path)
+    else:
+        import joblib
+        bundle.cls_model = joblib.load(os.path.join(cls_path, 'best_classifier_model.pkl'))
+        bundle.cls_scaler = joblib.load(os.path.join(cls_path, 'classifier_scaler.pkl'))
+    bundle.timings['classifier'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _read_pred_config(bundle, pred_path)
+    npz_path = os.path.join(pred_path, 'best_prediction_model.npz')
+    if bundle.pred_type == 'LSTM' and os.path.exists(npz_path):
+        # Ưu tiên NumPy runtime: không cần import TensorFlow
+        bundle.pred_model = NumpyLSTM.load(npz_path)
+        bundle.pred_scaler = bundle.pred_model.scaler
+    elif bundle.pred_type == 'LSTM':
+        import joblib
+        from tensorflow.keras.models import load_model
+        bundle.pred_scaler = joblib.load(os.path.join(pred_path, 'prediction_scaler.pkl'))
+        bundle.pred_model = load_model(os.path.join(pred_path, 'best_prediction_model.keras'))
+    else:
+        import joblib
+        bundle.pred_scaler = joblib.load(os.path.join(pred_path, 'prediction_scaler.pkl'))
+        bundle.pred_model = joblib.load(os.path.join(pred_path, 'arima_model.pkl'))
+    bundle.timings['forecaster'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bundle.warm_up()
+    bundle.timings['warmup'] = time.perf_counter() - start
+    return bundle
+
+
+def describe(bundle):
+    """Chuỗi log ngắn: loại model + thời gian load"""
+    cls_name = 'compiled' if bundle.cls_scaler is None else type(bundle.cls_model).__name__
+    pred_name = type(bundle.pred_model).__name__
+    t = bundle.timings
+    return (f"classifier={cls_name} ({t.get('classifier', 0):.2f}s), "
+            f"forecaster={bundle.pred_type}/{pred_name} ({t.get('forecaster', 0):.2f}s), "
+            f"warm-up {t.get('warmup', 0) * 1000:.0f}ms")
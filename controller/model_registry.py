@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+from flow_features import FEATURE_NAMES
+
+REGISTRY_DIR = 'registry'
+CURRENT_FILE = 'CURRENT'
+LEGACY_VERSION = 'legacy'
+
+# Batch canary mặc định (đặc trưng thô như build_feature_matrix) khi chưa có flow thật:
+# video (UDP gói to), voip (UDP gói nhỏ), web (TCP), background
+DEFAULT_CANARY = np.array([
+    # ip_proto, packet_count, byte_count, duration_sec, byte_rate, packet_rate, avg_packet_size
+    [17, 7000, 9800000, 10, 980000, 700, 1400],
+    [17, 5000, 500000, 10, 50000, 500, 100],
+    [6, 3000, 2400000, 10, 240000, 300, 800],
+    [17, 200, 120000, 20, 6000, 10, 600],
+], dtype=np.float64)
+
+
+class ModelRegistry(object):
+    """
+    Thư mục model có phiên bản:
+        <model_dir>/registry/<version>/classification/...
+        <model_dir>/registry/<version>/traffic_predict/...
+        <model_dir>/registry/CURRENT        <- tên version đang dùng
+    Chưa có registry -> dùng thư mục cũ (<model_dir>/classification, traffic_predict), version 'legacy'.
+    """
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.root = os.path.join(model_dir, REGISTRY_DIR)
+        self.current_file = os.path.join(self.root, CURRENT_FILE)
+
+    def versions(self):
+        if not os.path.isdir(self.root): return []
+        return sorted(v for v in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, v)))
+
+    def has_version(self, version):
+        return version == LEGACY_VERSION or version in self.versions()
+
+    def current_version(self):
+        """Version trong file CURRENT; không có thì lấy version mới nhất; không có registry -> legacy"""
+        try:
+            with open(self.current_file, 'r') as f:
+                version = f.read().strip()
+            if self.has_version(version): return version
+        except IOError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else LEGACY_VERSION
+
+    def set_current(self, version):
+        """Ghi file CURRENT theo kiểu atomic (ghi file tạm rồi rename)"""
+        if version == LEGACY_VERSION or not os.path.isdir(self.root): return
+        tmp_file = self.current_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_file, self.current_file)
+
+    def paths(self, version):
+        """(cls_path, pred_path) của 1 version"""
+        base = self.model_dir if version == LEGACY_VERSION else os.path.join(self.root, version)
+        return os.path.join(base, 'classification'), os.path.join(base, 'traffic_predict')
+
+
+def canary_check(bundle, features, valid_classes):
+    """
+    Chạy thử bộ model mới trên batch canary trước khi swap. Lỗi -> raise ValueError.
+    Gọi trong job load của InferenceExecutor (thread OS, ngoài hub): chỉ đọc bundle mới và features.
+    - Classifier: đủ nhãn, mọi nhãn phải nằm trong valid_classes.
+    - Forecaster: output hữu hạn với lịch sử tải 0 và tải cao.
+    """
+    if features is None or len(features) == 0: features = DEFAULT_CANARY
+    features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+
+    labels = np.asarray(bundle.classify(features))
+    if len(labels) != len(features):
+        raise ValueError(f"classifier returned {len(labels)} labels for {len(features)} flows")
+    unknown = set(labels.tolist()) - set(valid_classes)
+    if unknown:
+        raise ValueError(f"classifier returned unknown classes {sorted(unknown)}")
+
+    history = np.array([[0.0] * bundle.seq_length, [2_500_000.0] * bundle.seq_length])
+    preds = bundle.forecast(history, np.ones(len(history), dtype=bool))
+    if not np.all(np.isfinite(preds)):
+        raise ValueError("forecaster returned non-finite values")
+    return labels
@@ -0,0 +1,73 @@
+import time
+from collections import deque
+
+OFPMPF_REPLY_MORE = 1   # ofproto_v1_3.OFPMPF_REPLY_MORE
+
+
+class _Pending(object):
+    __slots__ = ('start', 'bodies')
+
+    def __init__(self, start):
+        self.start = start
+        self.bodies = []
+
+
+class MultipartAggregator(object):
+    """
+    Gộp các phần của 1 multipart reply (cờ OFPMPF_REPLY_MORE) theo (dpid, xid) thành 1 snapshot.
+    - add(msg) trả về (body, số phần) khi nhận phần cuối, còn thiếu phần thì trả về None.
+    - Reply chưa đủ quá timeout giây bị bỏ (switch ngắt kết nối / mất gói giữa chừng).
+    - get_part(msg) lấy phần dữ liệu của 1 message (mặc định msg.body), join(parts) ghép các phần
+      (mặc định nối list); vd. get_part=attrgetter('columns'), join=FlowStatsColumns.concat.
+    """
+
+    def __init__(self, timeout=5.0, get_part=None, join=None):
+        self.timeout = timeout
+        self.get_part = get_part or (lambda msg: msg.body)
+        self.join = join or (lambda parts: [stat for part in parts for stat in part])
+        self.pending = {}               # (dpid, xid) -> _Pending
+        self.completed = 0
+        self.timed_out = 0
+        self.parts = deque(maxlen=100)  # số phần của các reply gần nhất
+
+    def add(self, msg):
+        now = time.monotonic()
+        if self.pending: self.expire(now)
+        key = (msg.datapath.id, msg.xid)
+
+        if msg.flags & OFPMPF_REPLY_MORE:
+            pending = self.pending.get(key)
+            if pending is None: pending = self.pending[key] = _Pending(now)
+            pending.bodies.append(self.get_part(msg))
+            return None
+
+        pending = self.pending.pop(key, None)
+        self.completed += 1
+        if pending is None:
+            # Trường hợp thường gặp: reply chỉ có 1 phần, không copy
+            self.parts.append(1)
+            return self.get_part(msg), 1
+        pending.bodies.append(self.get_part(msg))
+        self.parts.append(len(pending.bodies))
+        return self.join(pending.bodies), len(pending.bodies)
+
+    def expire(self, now):
+        stale = [key for key, pending in self.pending.items() if now - pending.start > self.timeout]
+        for key in stale:
+            del self.pending[key]
+        self.timed_out += len(stale)
+
+    def drop_datapath(self, dpid):
+        """Switch ngắt kết nối -> bỏ các reply đang gộp dở của nó"""
+        for key in [key for key in self.pending if key[0] == dpid]:
+            del self.pending[key]
+
+    def stats(self):
+        return {
+            'pending': len(self.pending),
+            'completed': self.completed,
+            'timed_out': self.timed_out,
+            'last_parts': self.parts[-1] if self.parts else 0,
+            'max_parts': max(self.parts) if self.parts else 0,
+            'avg_parts': sum(self.parts) / len(self.parts) if self.parts else 0.0,
+        }
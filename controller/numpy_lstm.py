@@ -0,0 +1,100 @@
+import numpy as np
+
+# Sai số tối đa cho phép giữa NumPy runtime và Keras (trên giá trị đã scale 0-1)
+TOLERANCE = 1e-4
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)   # Ổn định số học hơn 1/(1+exp(-x))
+
+
+class MinMaxScalerParams(object):
+    """Thay thế MinMaxScaler của sklearn (chỉ cần min_ và scale_)"""
+    def __init__(self, min_, scale_):
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.scale_ = np.asarray(scale_, dtype=np.float64)
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.min_) / self.scale_
+
+
+class NumpyLSTM(object):
+    """
+    Runtime NumPy cho model LSTM(64) + Dense(1) train trong traffic_prediction notebook.
+    Gọi giống model Keras: model(X, training=False) với X có shape (batch, seq_length, 1).
+    Thứ tự gate theo Keras: input, forget, cell, output.
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, dense_kernel, dense_bias, seq_length):
+        self.kernel = np.ascontiguousarray(kernel, dtype=np.float32)                 # (n_features, 4u)
+        self.recurrent_kernel = np.ascontiguousarray(recurrent_kernel, dtype=np.float32)  # (u, 4u)
+        self.bias = np.asarray(bias, dtype=np.float32)                               # (4u,)
+        self.dense_kernel = np.ascontiguousarray(dense_kernel, dtype=np.float32)     # (u, 1)
+        self.dense_bias = np.asarray(dense_bias, dtype=np.float32)                   # (1,)
+        self.units = self.recurrent_kernel.shape[0]
+        self.seq_length = int(seq_length)
+        self.scaler = None
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        model = cls(data['kernel'], data['recurrent_kernel'], data['bias'],
+                    data['dense_kernel'], data['dense_bias'], data['seq_length'])
+        if 'scaler_min' in data:
+            model.scaler = MinMaxScalerParams(data['scaler_min'], data['scaler_scale'])
+        return model
+
+    def __call__(self, X, training=False):
+        return self.predict(X)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2: X = X[:, :, None]
+        batch, steps, _ = X.shape
+        u = self.units
+
+        # Tính phần input của tất cả time step trong 1 phép nhân: (batch, steps, 4u)
+        x_proj = X @ self.kernel + self.bias
+        h = np.zeros((batch, u), dtype=np.float32)
+        c = np.zeros((batch, u), dtype=np.float32)
+        for t in range(steps):
+            z = x_proj[:, t, :] + h @ self.recurrent_kernel
+            i = _sigmoid(z[:, :u])
+            f = _sigmoid(z[:, u:2 * u])
+            g = np.tanh(z[:, 2 * u:3 * u])
+            o = _sigmoid(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        return h @ self.dense_kernel + self.dense_bias
+
+
+def export_keras_lstm(keras_model, scaler, seq_length, out_path):
+    """Dump trọng số LSTM + Dense (và tham số MinMaxScaler) ra file .npz"""
+    lstm_layer, dense_layer = None, None
+    for layer in keras_model.layers:
+        name = layer.__class__.__name__
+        if name == 'LSTM': lstm_layer = layer
+        elif name == 'Dense': dense_layer = layer
+    if lstm_layer is None or dense_layer is None:
+        raise ValueError("Model phải có dạng LSTM + Dense")
+    if getattr(lstm_layer, 'return_sequences', False):
+        raise ValueError("Chỉ hỗ trợ LSTM với return_sequences=False")
+
+    kernel, recurrent_kernel, bias = lstm_layer.get_weights()
+    dense_kernel, dense_bias = dense_layer.get_weights()
+    np.savez_compressed(out_path,
+                        kernel=kernel, recurrent_kernel=recurrent_kernel, bias=bias,
+                        dense_kernel=dense_kernel, dense_bias=dense_bias,
+                        seq_length=np.int32(seq_length),
+                        scaler_min=np.asarray(scaler.min_), scaler_scale=np.asarray(scaler.scale_))
+
+
+def max_abs_error(keras_model, numpy_model, n_samples=256, seed=42):
+    """So sánh output Keras vs NumPy trên batch ngẫu nhiên (giá trị đã scale)"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_samples, numpy_model.seq_length, 1)).astype(np.float32)
+    expected = np.asarray(keras_model(X, training=False))
+    return float(np.max(np.abs(expected - numpy_model.predict(X))))
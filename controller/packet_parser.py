@@ -0,0 +1,60 @@
+import socket
+import struct
+
+from ryu.lib.packet import packet, ethernet, vlan, ipv4, tcp, udp, ether_types
+
+ETH_TYPE_VLAN = 0x8100
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+_ETH = struct.Struct('!6s6sH')
+_VLAN = struct.Struct('!HH')
+_IPV4 = struct.Struct('!BxxxxxHxBxx4s4s')  # ver/ihl, flags+frag offset, proto, src, dst
+_PORTS = struct.Struct('!HH')
+
+
+def parse_headers(data):
+    """
+    Parser nhanh cho packet-in: chỉ đọc các trường handler cần bằng struct.unpack_from
+    trên memoryview (không copy payload, không tạo object cho từng lớp giao thức).
+    Trả về (eth_dst, eth_src, ethertype, ipv4_src, ipv4_dst, ip_proto, src_port, dst_port);
+    gói không phải IPv4 -> các trường IP là None, không có L4 (UDP/TCP, fragment) -> port 0.
+    Trả về None nếu gói không đọc được (cắt cụt, header lạ) -> dùng parse_headers_full.
+    """
+    buf = memoryview(data)
+    try:
+        dst, src, ethertype = _ETH.unpack_from(buf, 0)
+        offset = _ETH.size
+        if ethertype == ETH_TYPE_VLAN:
+            _, ethertype = _VLAN.unpack_from(buf, offset)
+            offset += _VLAN.size
+        eth_dst, eth_src = dst.hex(':'), src.hex(':')
+        if ethertype != ether_types.ETH_TYPE_IP:
+            return eth_dst, eth_src, ethertype, None, None, None, 0, 0
+
+        ver_ihl, frag, proto, ip_src, ip_dst = _IPV4.unpack_from(buf, offset)
+        if ver_ihl >> 4 != 4: return None
+        src_port = dst_port = 0
+        if proto in (IPPROTO_TCP, IPPROTO_UDP) and not frag & 0x1FFF:
+            src_port, dst_port = _PORTS.unpack_from(buf, offset + (ver_ihl & 0x0F) * 4)
+        return (eth_dst, eth_src, ethertype, socket.inet_ntoa(ip_src), socket.inet_ntoa(ip_dst),
+                proto, src_port, dst_port)
+    except struct.error:
+        return None
+
+
+def parse_headers_full(data):
+    """Fallback qua ryu.lib.packet (cùng định dạng kết quả); None nếu không có Ethernet"""
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocol(ethernet.ethernet)
+    if eth is None: return None
+    ethertype = eth.ethertype
+    if ethertype == ETH_TYPE_VLAN:
+        vl = pkt.get_protocol(vlan.vlan)
+        if vl is not None: ethertype = vl.ethertype
+    ip = pkt.get_protocol(ipv4.ipv4)
+    if ip is None:
+        return eth.dst, eth.src, ethertype, None, None, None, 0, 0
+    l4 = pkt.get_protocol(tcp.tcp) or pkt.get_protocol(udp.udp)
+    src_port, dst_port = (l4.src_port, l4.dst_port) if l4 is not None else (0, 0)
+    return eth.dst, eth.src, ethertype, ip.src, ip.dst, ip.proto, src_port, dst_port
@@ -0,0 +1,86 @@
+import time
+
+
+class _Entry(object):
+    __slots__ = ('actions', 'barrier_xid', 'start', 'duplicates')
+
+    def __init__(self, actions, barrier_xid, start):
+        self.actions = actions
+        self.barrier_xid = barrier_xid
+        self.start = start
+        self.duplicates = 0
+
+
+class PendingFlowTable(object):
+    """
+    Flow đã gửi FlowMod nhưng switch chưa cài xong: các packet-in tiếp theo của flow
+    chỉ cần packet-out theo actions đã chọn, không chạy lại logic flow mới / gửi FlowMod mới.
+    - Khóa: (dpid, (ipv4_src, ipv4_dst, ip_proto, in_port)) giống match của flow.
+    - Xóa khi nhận barrier reply gửi sau FlowMod (switch đã xử lý FlowMod) hoặc quá timeout giây.
+    """
+
+    def __init__(self, timeout=1.0, max_size=10000):
+        self.timeout = timeout
+        self.max_size = max_size
+        self.entries = {}       # (dpid, khóa flow) -> _Entry
+        self.by_barrier = {}    # (dpid, xid barrier) -> (dpid, khóa flow)
+
+        self.added = 0
+        self.confirmed = 0
+        self.timed_out = 0
+        self.duplicates = 0
+
+    def lookup(self, dpid, key, now=None):
+        """actions của flow đang chờ cài (đếm 1 packet-in trùng), None nếu là flow mới"""
+        entry = self.entries.get((dpid, key))
+        if entry is None: return None
+        now = time.monotonic() if now is None else now
+        if now - entry.start > self.timeout:
+            self._remove((dpid, key), entry)
+            self.timed_out += 1
+            return None
+        entry.duplicates += 1
+        self.duplicates += 1
+        return entry.actions
+
+    def add(self, dpid, key, actions, barrier_xid, now=None):
+        now = time.monotonic() if now is None else now
+        if len(self.entries) >= self.max_size: self.expire(now)
+        if len(self.entries) >= self.max_size: return False
+        self.entries[(dpid, key)] = _Entry(actions, barrier_xid, now)
+        self.by_barrier[(dpid, barrier_xid)] = (dpid, key)
+        self.added += 1
+        return True
+
+    def _remove(self, full_key, entry):
+        self.entries.pop(full_key, None)
+        self.by_barrier.pop((full_key[0], entry.barrier_xid), None)
+
+    def handle_barrier_reply(self, msg):
+        """True nếu barrier reply thuộc 1 flow đang chờ (flow đã được cài)"""
+        full_key = self.by_barrier.pop((msg.datapath.id, msg.xid), None)
+        if full_key is None: return False
+        self.entries.pop(full_key, None)
+        self.confirmed += 1
+        return True
+
+    def expire(self, now=None):
+        now = time.monotonic() if now is None else now
+        stale = [(k, e) for k, e in self.entries.items() if now - e.start > self.timeout]
+        for full_key, entry in stale:
+            self._remove(full_key, entry)
+        self.timed_out += len(stale)
+
+    def drop_datapath(self, dpid):
+        for full_key, entry in [(k, e) for k, e in self.entries.items() if k[0] == dpid]:
+            self._remove(full_key, entry)
+
+    def stats(self):
+        return {
+            'pending': len(self.entries),
+            'added': self.added,
+            'confirmed': self.confirmed,
+            'timed_out': self.timed_out,
+            'duplicate_packet_ins': self.duplicates,
+            'duplicates_per_flow': self.duplicates / self.added if self.added else 0.0,
+        }
@@ -0,0 +1,126 @@
+from ryu.lib.packet import ether_types, in_proto
+
+from flow_cookies import make_proactive_cookie, PROACTIVE_MASK
+from group_balancer import remove_group
+
+PROACTIVE_PRIORITY = 5      # Thấp hơn flow AI (10), cao hơn table-miss (0)
+TRACK_PRIORITY = 6          # Ingress: traffic classifier cần theo dõi -> packet-in (trên rule theo cặp)
+# Giao thức có trong dữ liệu train classifier (collect_traffic_data: web TCP, video/voip/background UDP):
+# flow mới được cài rule riêng để classifier đọc stats từng flow; giao thức khác (ICMP...) đi thẳng
+# qua SELECT group của cặp, không packet-in
+TRACKED_IP_PROTOS = (in_proto.IPPROTO_TCP, in_proto.IPPROTO_UDP)
+
+
+class ProactiveProgrammer(object):
+    """
+    Cài sẵn forwarding theo IP đích khi switch kết nối (topology và địa chỉ host đã biết, ARP tĩnh):
+    - Switch trung chuyển: đích là host của switch biên nào -> cổng đi về switch biên đó.
+    - Switch biên: tới host của nó -> cổng host.
+    - Switch biên: tới host ở switch biên khác -> group SELECT qua các đường của cặp đó,
+      data plane tự chọn đường (1 rule mỗi host đích, không packet-in cho từng flow).
+    - Ingress (s_src): group do GroupBalancer quản lý (trọng số theo tải); thêm rule TRACK_PRIORITY
+      gửi traffic tracked_ip_protos lên controller -> flow mới được cài rule AI riêng (phân loại).
+    Cookie của rule chứa version topology: khi đường được tính lại, update() cài bộ rule mới
+    (ADD cùng match ghi đè rule cũ) rồi xóa rule còn mang version cũ (đường / host không còn) theo cookie.
+    """
+
+    def __init__(self, topology, tracked_ip_protos=TRACKED_IP_PROTOS):
+        self.topology = topology
+        self.tracked_ip_protos = tuple(tracked_ip_protos)
+        self.installed = {}     # dpid -> số rule đã cài
+        self.versions = {}      # dpid -> version topology trong cookie của các rule đang trên switch
+        self.groups = {}        # dpid -> group id do ProactiveProgrammer tạo (switch biên không phải ingress)
+
+    def _add(self, datapath, ipv4_dst, actions, priority=PROACTIVE_PRIORITY, ip_proto=None):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        if ip_proto is None:
+            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ipv4_dst)
+        else:
+            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ip_proto=ip_proto, ipv4_dst=ipv4_dst)
+        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        cookie = make_proactive_cookie(self.versions[datapath.id])
+        datapath.send_msg(parser.OFPFlowMod(datapath=datapath, cookie=cookie, priority=priority,
+                                            match=match, instructions=inst))
+        self.installed[datapath.id] = self.installed.get(datapath.id, 0) + 1
+
+    def _install_group(self, datapath, group_id, ports, modify=False):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        buckets = [parser.OFPBucket(weight=1, watch_port=port, actions=[parser.OFPActionOutput(port)])
+                   for port in ports]
+        if modify:
+            # Group đã có: MODIFY giữ nguyên các flow trỏ tới group (DELETE sẽ xóa luôn chúng)
+            datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_MODIFY, ofproto.OFPGT_SELECT,
+                                                 group_id, buckets))
+            return
+        remove_group(datapath, group_id)
+        datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_ADD, ofproto.OFPGT_SELECT, group_id, buckets))
+
+    def _remove_version(self, datapath, version):
+        """Xóa mọi rule proactive còn mang version cũ (không được cài lại ở version mới)"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        datapath.send_msg(parser.OFPFlowMod(datapath=datapath, cookie=make_proactive_cookie(version),
+                                            cookie_mask=PROACTIVE_MASK, table_id=ofproto.OFPTT_ALL,
+                                            command=ofproto.OFPFC_DELETE, out_port=ofproto.OFPP_ANY,
+                                            out_group=ofproto.OFPG_ANY))
+
+    def install(self, datapath):
+        """Gọi từ switch_features_handler (sau khi GroupBalancer đã cài group của ingress);
+        trả về True nếu switch thuộc topology"""
+        self.groups[datapath.id] = set()
+        return self._program(datapath)
+
+    def update(self, datapath):
+        """
+        Topology được tính lại: group đã có -> MODIFY, cài rule với version mới, barrier,
+        rồi xóa rule version cũ và group không còn dùng. Trả về True nếu switch còn thuộc topology.
+        """
+        dpid = datapath.id
+        old_version = self.versions.get(dpid)
+        old_groups = self.groups.get(dpid, set())
+        in_topology = self._program(datapath, old_groups)
+        if old_version is None or old_version == self.versions.get(dpid): return in_topology
+
+        parser = datapath.ofproto_parser
+        datapath.send_msg(parser.OFPBarrierRequest(datapath))
+        self._remove_version(datapath, old_version)
+        for group_id in old_groups - self.groups.get(dpid, set()):
+            remove_group(datapath, group_id)
+        return in_topology
+
+    def _program(self, datapath, existing_groups=()):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        topo = self.topology
+        dpid = datapath.id
+        self.installed[dpid] = 0
+        self.versions[dpid] = topo.version
+        groups = set()
+
+        if dpid in topo.host_ports:
+            for ip, port in topo.host_ports[dpid].items():
+                self._add(datapath, ip, [parser.OFPActionOutput(port)])
+            to_controller = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+            for dst in topo.edges:
+                ports = topo.uplink_ports(dpid, dst)
+                if dst == dpid or not ports: continue
+                group_id = topo.group_ids[(dpid, dst)]
+                if not topo.is_ingress(dpid):
+                    self._install_group(datapath, group_id, ports, modify=group_id in existing_groups)
+                    groups.add(group_id)
+                for ip in topo.host_ports[dst]:
+                    self._add(datapath, ip, [parser.OFPActionGroup(group_id)])
+                    if not topo.is_ingress(dpid): continue
+                    for ip_proto in self.tracked_ip_protos:
+                        self._add(datapath, ip, to_controller, TRACK_PRIORITY, ip_proto)
+        elif topo.is_transit(dpid):
+            for ip, port in topo.transit_rules(dpid):
+                self._add(datapath, ip, [parser.OFPActionOutput(port)])
+        else:
+            del self.installed[dpid]
+            self.groups[dpid] = groups
+            return False
+        self.groups[dpid] = groups
+        return True
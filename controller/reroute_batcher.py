@@ -0,0 +1,169 @@
+import time
+from collections import deque
+
+BUNDLE = 'bundle'
+BARRIER = 'barrier'
+
+# Lỗi cho biết switch không hỗ trợ ONF bundle extension -> chuyển sang FlowMod + barrier
+OFPET_BAD_REQUEST = 1
+OFPBRC_BAD_EXPERIMENTER = 3
+OFPBRC_BAD_EXP_TYPE = 4
+
+
+class _Transaction(object):
+    __slots__ = ('datapath', 'mode', 'bundle_id', 'xids', 'done_xid', 'moves', 'start', 'failed')
+
+    def __init__(self, datapath, mode, moves):
+        self.datapath = datapath
+        self.mode = mode
+        self.bundle_id = None
+        self.xids = {}          # xid của từng FlowMod/bundle add -> chỉ số move
+        self.done_xid = None    # xid của commit (bundle) hoặc barrier request
+        self.moves = moves      # list (flow_mod, meta)
+        self.start = time.monotonic()
+        self.failed = set()     # chỉ số move bị switch báo lỗi
+
+
+class RerouteBatcher(object):
+    """
+    Gom các quyết định reroute của 1 chu kỳ stats, áp dụng theo từng switch:
+    - BUNDLE: 1 giao dịch ONF bundle (open, add..., commit) ATOMIC + ORDERED, tất cả hoặc không gì cả.
+    - BARRIER: các FlowMod + 1 barrier; lỗi được gán cho đúng FlowMod theo xid.
+    Switch không hỗ trợ bundle -> tự chuyển sang BARRIER và gửi lại.
+    Khi có kết quả gọi on_result(datapath, metas, ok, latency) (vd. cập nhật Q-table).
+    """
+
+    def __init__(self, on_result=None, mode=BUNDLE, timeout=2.0):
+        self.on_result = on_result
+        self.default_mode = mode
+        self.timeout = timeout
+        self.modes = {}         # dpid -> mode (BARRIER nếu switch từ chối bundle)
+        self.pending = {}       # dpid -> list (flow_mod, meta) chờ flush
+        self.txns = {}          # (dpid, done_xid) -> _Transaction (xid chỉ duy nhất trong 1 switch)
+        self.by_xid = {}        # (dpid, xid bất kỳ trong giao dịch) -> _Transaction
+        self.next_bundle_id = 1
+
+        self.committed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.moves_applied = 0
+        self.moves_failed = 0
+        self.commit_latency = deque(maxlen=100)
+
+    def add(self, datapath, flow_mod, meta=None):
+        self.pending.setdefault(datapath.id, []).append((flow_mod, meta))
+
+    def flush(self):
+        """Gửi mọi quyết định đang chờ; gọi 1 lần cuối mỗi chu kỳ"""
+        self.expire()
+        pending, self.pending = self.pending, {}
+        for moves in pending.values():
+            datapath = moves[0][0].datapath
+            mode = self.modes.get(datapath.id, self.default_mode)
+            self._send(_Transaction(datapath, mode, moves))
+
+    def _send(self, txn):
+        datapath = txn.datapath
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        if txn.mode == BUNDLE:
+            txn.bundle_id = self.next_bundle_id
+            self.next_bundle_id = (self.next_bundle_id + 1) & 0xFFFFFFFF or 1
+            flags = ofproto.ONF_BF_ATOMIC | ofproto.ONF_BF_ORDERED
+            self._send_tracked(txn, parser.ONFBundleCtrlMsg(datapath, txn.bundle_id,
+                                                            ofproto.ONF_BCT_OPEN_REQUEST, flags, []), None)
+            for i, (flow_mod, _) in enumerate(txn.moves):
+                self._send_tracked(txn, parser.ONFBundleAddMsg(datapath, txn.bundle_id, flags, flow_mod, []), i)
+            done = parser.ONFBundleCtrlMsg(datapath, txn.bundle_id, ofproto.ONF_BCT_COMMIT_REQUEST, flags, [])
+        else:
+            for i, (flow_mod, _) in enumerate(txn.moves):
+                self._send_tracked(txn, flow_mod, i)
+            done = parser.OFPBarrierRequest(datapath)
+        self._send_tracked(txn, done, None)
+        txn.done_xid = done.xid
+        self.txns[(datapath.id, done.xid)] = txn
+
+    def _send_tracked(self, txn, msg, move_idx):
+        txn.datapath.set_xid(msg)
+        txn.xids[msg.xid] = move_idx
+        self.by_xid[(txn.datapath.id, msg.xid)] = txn
+        txn.datapath.send_msg(msg)
+
+    def _finish(self, txn, ok):
+        self.txns.pop((txn.datapath.id, txn.done_xid), None)
+        for xid in txn.xids:
+            self.by_xid.pop((txn.datapath.id, xid), None)
+        latency = time.monotonic() - txn.start
+        if txn.mode == BUNDLE:
+            # Bundle là nguyên tử: 1 lỗi -> cả giao dịch không được áp dụng
+            failed = set() if ok and not txn.failed else set(range(len(txn.moves)))
+        else:
+            failed = txn.failed if ok else set(range(len(txn.moves)))
+        ok_moves = [move for i, move in enumerate(txn.moves) if i not in failed]
+        bad_moves = [move for i, move in enumerate(txn.moves) if i in failed]
+
+        if bad_moves: self.failed += 1
+        else: self.committed += 1
+        self.moves_applied += len(ok_moves)
+        self.moves_failed += len(bad_moves)
+        self.commit_latency.append(latency)
+        if self.on_result is not None:
+            if ok_moves: self.on_result(txn.datapath, [meta for _, meta in ok_moves], True, latency)
+            if bad_moves: self.on_result(txn.datapath, [meta for _, meta in bad_moves], False, latency)
+
+    def handle_bundle_reply(self, msg):
+        """EventONFBundleCtrlMsg: COMMIT_REPLY -> giao dịch thành công"""
+        if msg.type != msg.datapath.ofproto.ONF_BCT_COMMIT_REPLY: return
+        txn = self.txns.get((msg.datapath.id, msg.xid))
+        if txn is not None: self._finish(txn, True)
+
+    def handle_barrier_reply(self, msg):
+        txn = self.txns.get((msg.datapath.id, msg.xid))
+        if txn is not None: self._finish(txn, True)
+
+    def handle_error(self, msg):
+        """EventOFPErrorMsg: gán lỗi cho move / giao dịch theo xid"""
+        txn = self.by_xid.get((msg.datapath.id, msg.xid))
+        if txn is None: return
+        if (txn.mode == BUNDLE and msg.type == OFPET_BAD_REQUEST and
+                msg.code in (OFPBRC_BAD_EXPERIMENTER, OFPBRC_BAD_EXP_TYPE)):
+            # Switch không hỗ trợ bundle: bỏ giao dịch này, gửi lại bằng FlowMod + barrier
+            print(f"   [REROUTE] Switch {txn.datapath.id} does not support bundles, using barrier")
+            self.modes[txn.datapath.id] = BARRIER
+            self.txns.pop((txn.datapath.id, txn.done_xid), None)
+            for xid in txn.xids:
+                self.by_xid.pop((txn.datapath.id, xid), None)
+            for flow_mod, _ in txn.moves:
+                flow_mod.xid = None     # xid cũ đã gán theo bundle add
+            self._send(_Transaction(txn.datapath, BARRIER, txn.moves))
+            return
+        move_idx = txn.xids.get(msg.xid)
+        if move_idx is not None:
+            txn.failed.add(move_idx)
+        elif msg.xid == txn.done_xid or txn.mode == BUNDLE:
+            # Lỗi ở open/commit -> cả bundle thất bại
+            self._finish(txn, False)
+
+    def expire(self):
+        now = time.monotonic()
+        for txn in [txn for txn in self.txns.values() if now - txn.start > self.timeout]:
+            self.timed_out += 1
+            self._finish(txn, False)
+
+    def drop_datapath(self, dpid):
+        self.pending.pop(dpid, None)
+        for txn in [txn for txn in self.txns.values() if txn.datapath.id == dpid]:
+            self._finish(txn, False)
+
+    def stats(self):
+        latency = self.commit_latency
+        return {
+            'committed': self.committed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'moves_applied': self.moves_applied,
+            'moves_failed': self.moves_failed,
+            'in_flight': len(self.txns),
+            'avg_commit_ms': sum(latency) / len(latency) * 1000 if latency else 0.0,
+            'max_commit_ms': max(latency) * 1000 if latency else 0.0,
+        }
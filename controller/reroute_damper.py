@@ -0,0 +1,88 @@
+import time
+from collections import deque, OrderedDict
+
+DWELL = 'dwell'
+GAIN = 'gain'
+RATE = 'rate'
+
+
+class RerouteDamper(object):
+    """
+    Lớp giảm rung giữa lựa chọn của RL và FlowMod: 1 flow chỉ bị chuyển đường khi
+    - đã ở đường hiện tại ít nhất min_dwell giây, tính từ lần reroute trước; flow chưa reroute lần nào
+      thì tính từ lúc cài (now - duration_sec của flow stats) hoặc lần đầu gặp nếu không biết tuổi flow,
+    - tải dự đoán của đường mới thấp hơn đường hiện tại ít nhất min_gain (tương đối),
+    - switch còn quota: tối đa max_rate reroute/giây (token bucket, cho phép burst max_rate).
+    """
+
+    def __init__(self, min_dwell=10.0, min_gain=0.2, max_rate=20.0, max_flows=50000, rate_window=10.0):
+        self.min_dwell = min_dwell
+        self.min_gain = min_gain
+        self.max_rate = max_rate
+        self.max_flows = max_flows
+        self.rate_window = rate_window
+        self.last_move = OrderedDict()  # khóa flow -> thời điểm vào đường hiện tại (cài / reroute gần nhất)
+        self.buckets = {}               # dpid -> (token, thời điểm cập nhật)
+
+        self.allowed = 0
+        self.suppressed = {DWELL: 0, GAIN: 0, RATE: 0}
+        self.recent = deque()           # thời điểm các reroute được cho phép (tính reroute/giây)
+
+    def _take_token(self, dpid, now):
+        tokens, last = self.buckets.get(dpid, (self.max_rate, now))
+        tokens = min(self.max_rate, tokens + (now - last) * self.max_rate)
+        if tokens < 1.0:
+            self.buckets[dpid] = (tokens, now)
+            return False
+        self.buckets[dpid] = (tokens - 1.0, now)
+        return True
+
+    def _set(self, key, when):
+        self.last_move[key] = when
+        self.last_move.move_to_end(key)
+        while len(self.last_move) > self.max_flows:
+            self.last_move.popitem(last=False)
+
+    def _trim_recent(self, now):
+        while self.recent and now - self.recent[0] > self.rate_window:
+            self.recent.popleft()
+
+    def allow(self, dpid, key, current_load, new_load, age=None, now=None):
+        """
+        (True, None) nếu được reroute (đã ghi nhận), ngược lại (False, lý do).
+        age: số giây flow đã được cài (duration_sec), chỉ dùng khi flow chưa được ghi nhận.
+        """
+        now = time.monotonic() if now is None else now
+        self._trim_recent(now)
+        last = self.last_move.get(key)
+        if last is None:
+            last = now - age if age is not None else now
+            self._set(key, last)
+        if now - last < self.min_dwell:
+            self.suppressed[DWELL] += 1
+            return False, DWELL
+        if current_load - new_load < self.min_gain * max(current_load, 1.0):
+            self.suppressed[GAIN] += 1
+            return False, GAIN
+        if not self._take_token(dpid, now):
+            self.suppressed[RATE] += 1
+            return False, RATE
+
+        self._set(key, now)
+        self.allowed += 1
+        self.recent.append(now)
+        return True, None
+
+    def forget(self, key):
+        """Flow bị xóa -> lần cài sau bắt đầu lại"""
+        self.last_move.pop(key, None)
+
+    def stats(self):
+        self._trim_recent(time.monotonic())
+        return {
+            'allowed': self.allowed,
+            'suppressed': dict(self.suppressed),
+            'suppressed_total': sum(self.suppressed.values()),
+            'reroutes_per_sec': len(self.recent) / self.rate_window,
+            'tracked_flows': len(self.last_move),
+        }
@@ -7,12 +7,10 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 # -----------------------------------
 
 import time
-import json
 import random
 import numpy as np
-import pandas as pd
-import joblib
 from collections import deque
+from functools import partial
 from operator import attrgetter
 
 # Ryu Imports
@@ -23,9 +21,9 @@ from ryu.controller.handler import set_ev_cls
 from ryu.lib import hub
 from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, arp, ether_types
 
-# AI Imports
-import tensorflow as tf
-from tensorflow.keras.models import load_model
+from flow_features import build_feature_matrix, get_out_port, AI_FLOW_PRIORITY
+from inference_executor import InferenceExecutor
+from model_loader import load_bundle, describe
 
 # --- CẤU HÌNH ---
 MODEL_DIR = "/home/nhathoang2612/CNM_Baitap04/model/"
@@ -33,6 +31,7 @@ CLS_PATH = os.path.join(MODEL_DIR, "classification")
 PRED_PATH = os.path.join(MODEL_DIR, "traffic_predict")
 
 monitor_interval = 2 # Chu kỳ in log
+executor_log_interval = 30    # Chu kỳ in [AI EXECUTOR] (giây), chỉ in khi có job mới
 
 # MAPPING CHUẨN
 CLASS_MAP = {
@@ -48,8 +47,8 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         self.datapaths = {}
         self.monitor_thread = hub.spawn(self._monitor)
         
+        self.models = None        # ModelBundle, None khi đang load
         self.seq_length = 10
-        self.pred_type = 'LSTM'
         
         self.flow_stats = {}      
         self.path_history = {}    
@@ -57,8 +56,7 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         # Hardcode Topo: Switch 1 nối với 5 đường qua port 5,6,7,8,9
         self.uplink_ports = [5, 6, 7, 8, 9] 
         self.path_loads = {port: 0.0 for port in self.uplink_ports}
-        
-        self.load_models()
+        self.predict_latency = deque(maxlen=100)  # Thời gian dự đoán mỗi chu kỳ (giây)
         
         # RL Q-Table
         self.q_table = np.zeros((4, 5)) 
@@ -66,47 +64,56 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         self.alpha = 0.5    
         self.gamma = 0.9    
 
+        # Inference chạy trên thread pool riêng, không chặn eventlet hub
+        self.executor = InferenceExecutor(max_workers=2, max_age=2 * monitor_interval)
+        self.executor_logged = 0    # số job đã submit ở lần log [AI EXECUTOR] trước
+        
+        self.load_models()
+
     def load_models(self):
-        print(">>> [AI] Loading AI Models...")
+        """Load model trong nền: switch kết nối ngay, flow mới đi fast-path ngẫu nhiên tới khi AI sẵn sàng"""
+        print(">>> [AI] Loading AI Models in background...")
+        self.load_started = time.perf_counter()
+        self.executor.submit('load_models', self._load_models_job, callback=self._on_models_ready,
+                             max_age=float('inf'))
+
+    def _load_models_job(self):
+        """Chạy trên thread OS của executor (không chặn hub), lỗi trả về để log trên hub"""
         try:
-            # Classification
-            self.cls_model = joblib.load(os.path.join(CLS_PATH, 'best_classifier_model.pkl'))
-            self.cls_scaler = joblib.load(os.path.join(CLS_PATH, 'classifier_scaler.pkl'))
-            print("   - Classification: Loaded DT/RF Model.")
-
-            # Prediction & Config
-            txt_config = os.path.join(PRED_PATH, 'model_config.txt')
-            json_config = os.path.join(PRED_PATH, 'model_config.json')
-            
-            if os.path.exists(json_config):
-                with open(json_config, 'r') as f:
-                    config = json.load(f)
-                    self.pred_type = config.get('best_model_type', 'LSTM')
-                    self.seq_length = int(config.get('sequence_length', 10))
-            elif os.path.exists(txt_config):
-                with open(txt_config, 'r') as f:
-                    self.seq_length = int(f.read().strip())
-                    self.pred_type = 'LSTM' 
-            
-            self.pred_scaler = joblib.load(os.path.join(PRED_PATH, 'prediction_scaler.pkl'))
-            
-            if self.pred_type == 'LSTM':
-                self.pred_model = load_model(os.path.join(PRED_PATH, 'best_prediction_model.keras'))
-            else:
-                self.pred_model = joblib.load(os.path.join(PRED_PATH, 'arima_model.pkl'))
-            print(f"   - Prediction: Loaded {self.pred_type} Model.")
-                
+            return load_bundle(CLS_PATH, PRED_PATH), None
         except Exception as e:
-            print(f"!!! [ERROR] Load Model Failed: {e}")
-            self.cls_model = None
-            self.pred_model = None
+            return None, e
+
+    def _on_models_ready(self, result):
+        bundle, error = result
+        if error is not None:
+            print(f"!!! [ERROR] Load Model Failed: {error}")
+            return
+        if bundle.seq_length != self.seq_length:
+            self.seq_length = bundle.seq_length
+            self.path_history = {p: deque(h, maxlen=self.seq_length) for p, h in self.path_history.items()}
+        # Gán 1 tham chiếu duy nhất -> bật AI routing (atomic trên hub)
+        self.models = bundle
+        elapsed = time.perf_counter() - self.load_started
+        print(f">>> [AI] Models ready in {elapsed:.2f}s: {describe(bundle)}")
 
     def _monitor(self):
+        cycle = 0
         while True:
             for dp in self.datapaths.values():
                 self._request_stats(dp)
+            cycle += 1
+            if cycle % max(1, executor_log_interval // monitor_interval) == 0:
+                self._log_executor_stats()
             hub.sleep(monitor_interval)
 
+    def _log_executor_stats(self):
+        st = self.executor.stats()
+        if st['submitted'] == self.executor_logged: return
+        self.executor_logged = st['submitted']
+        print(f"   [AI EXECUTOR] queue={st['queue_depth']} | latency avg={st['avg_latency_ms']:.1f}ms "
+              f"| merged={st['merged']} dropped={st['dropped']}")
+
     def _request_stats(self, datapath):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
@@ -115,23 +122,28 @@ class SmartController(simple_switch_13.SimpleSwitch13):
 
     def _predict_traffic_load(self):
         """Dự đoán tải và IN LOG trạng thái mạng"""
-        if not hasattr(self, 'pred_model') or self.pred_model is None: return
+        models = self.models
+        if models is None: return
 
-        # print("\n--- [AI MONITOR] Network Status ---")
-        for port in self.uplink_ports:
-            history = self.path_history.get(port, deque(maxlen=self.seq_length))
-            if len(history) < self.seq_length: continue
-            
-            data_raw = np.array(list(history)).reshape(-1, 1)
-            data_scaled = self.pred_scaler.transform(data_raw)
-            X_input = data_scaled.reshape(1, self.seq_length, 1)
-            
-            if self.pred_type == 'LSTM':
-                pred_scaled = self.pred_model.predict(X_input, verbose=0)
-                pred_val = self.pred_scaler.inverse_transform(pred_scaled)[0][0]
-            else:
-                pred_val = data_raw[-1][0] 
+        # Chỉ dự đoán các cổng đã đủ lịch sử, gom thành 1 batch (n_ports, seq_length, 1)
+        ports = [p for p in self.uplink_ports
+                 if len(self.path_history.get(p, ())) >= self.seq_length]
+        if not ports: return
+
+        data_raw = np.array([list(self.path_history[p]) for p in ports])
+        # Forward pass chạy trên worker thread, kết quả áp dụng lại trên hub
+        self.executor.submit('forecast', self._forecast_batch, (models, data_raw),
+                             callback=partial(self._apply_forecast, ports))
 
+    def _forecast_batch(self, models, data_raw):
+        """Chạy trong worker thread: 1 lần forward pass cho mọi cổng"""
+        start = time.perf_counter()
+        pred_vals = models.forecast(data_raw, np.ones(len(data_raw), dtype=bool))
+        self.predict_latency.append(time.perf_counter() - start)
+        return pred_vals
+
+    def _apply_forecast(self, ports, pred_vals):
+        for port, pred_val in zip(ports, pred_vals):
             self.path_loads[port] = pred_val 
             
             # IN LOG NẾU CÓ TẢI CAO (Để demo thấy AI hoạt động)
@@ -148,10 +160,7 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         if dpid == 1:
             current_port_bytes = {p: 0 for p in self.uplink_ports}
             for stat in body:
-                out_port = 0
-                if stat.instructions:
-                    for action in stat.instructions[0].actions:
-                        if hasattr(action, 'port'): out_port = action.port
+                out_port = get_out_port(stat)
                 if out_port in self.uplink_ports:
                     current_port_bytes[out_port] += stat.byte_count
             
@@ -169,50 +178,35 @@ class SmartController(simple_switch_13.SimpleSwitch13):
             self._predict_traffic_load()
 
         # 2. AI CLASSIFICATION & REROUTING
-        if dpid == 1:
-            for stat in body:
-                if stat.priority != 10: continue 
-                
-                duration = stat.duration_sec
-                if duration == 0: continue
-                
-                byte_count = stat.byte_count
-                packet_count = stat.packet_count
-                avg_packet_size = byte_count / packet_count if packet_count > 0 else 0
-                byte_rate = byte_count / duration
-                packet_rate = packet_count / duration
-                ip_proto = stat.match.get('ip_proto', 17)
+        models = self.models
+        if dpid == 1 and models is not None:
+            stats, features = build_feature_matrix(body)
+            if not stats: return
+            # Inference chạy ngoài hub, quyết định reroute áp dụng khi có kết quả
+            self.executor.submit(('classify', dpid), models.classify, (features,),
+                                 callback=partial(self._apply_classification,
+                                                  ev.msg.datapath, stats))
+
+    def _apply_classification(self, datapath, stats, pred_labels):
+        for stat, pred_label_idx in zip(stats, pred_labels):
+            label_name = CLASS_MAP.get(pred_label_idx, "unknown")
+            
+            # RL Chọn đường
+            best_path_idx = self._get_action_rl(pred_label_idx)
+            new_out_port = self.uplink_ports[best_path_idx]
+            
+            # Kiểm tra đường hiện tại
+            current_out_port = get_out_port(stat)
+            
+            # Nếu cần đổi đường
+            if current_out_port != 0 and current_out_port != new_out_port:
+                print(f"   >>> [AI-REROUTE] Flow {label_name.upper()} switched: Port {current_out_port} -> {new_out_port} (Optimized)")
                 
-                features = np.array([[ip_proto, packet_count, byte_count, duration, byte_rate, packet_rate, avg_packet_size]])
+                predicted_load = self.path_loads.get(new_out_port, 0)
+                reward = 1000 / (predicted_load + 1.0)
+                self._update_q_table(pred_label_idx, best_path_idx, reward)
                 
-                if self.cls_model:
-                    # AI Phân loại
-                    features_scaled = self.cls_scaler.transform(features)
-                    pred_label_idx = self.cls_model.predict(features_scaled)[0]
-                    label_name = CLASS_MAP.get(pred_label_idx, "unknown")
-                    
-                    # RL Chọn đường
-                    best_path_idx = self._get_action_rl(pred_label_idx)
-                    new_out_port = self.uplink_ports[best_path_idx]
-                    
-                    # Kiểm tra đường hiện tại
-                    current_out_port = 0
-                    if stat.instructions:
-                        for action in stat.instructions[0].actions:
-                            if hasattr(action, 'port'): current_out_port = action.port
-                    
-                    # IN LOG TRẠNG THÁI (Để bạn thấy nó hoạt động)
-                    # print(f"   [MONITOR] Flow {label_name.upper()} | Size: {avg_packet_size:.0f} | Current Port: {current_out_port}")
-
-                    # Nếu cần đổi đường
-                    if current_out_port != 0 and current_out_port != new_out_port:
-                        print(f"   >>> [AI-REROUTE] Flow {label_name.upper()} switched: Port {current_out_port} -> {new_out_port} (Optimized)")
-                        
-                        predicted_load = self.path_loads.get(new_out_port, 0)
-                        reward = 1000 / (predicted_load + 1.0)
-                        self._update_q_table(pred_label_idx, best_path_idx, reward)
-                        
-                        self.mod_flow(ev.msg.datapath, stat.match, new_out_port)
+                self.mod_flow(datapath, stat.match, new_out_port)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
@@ -281,7 +275,7 @@ class SmartController(simple_switch_13.SimpleSwitch13):
                     ipv4_src=ip_pkt.src, ipv4_dst=ip_pkt.dst, ip_proto=ip_pkt.proto)
                 
                 # Priority 10, Idle Timeout 5s (để refresh liên tục)
-                self.add_flow(datapath, 10, match, actions, msg.buffer_id, idle_timeout=5)
+                self.add_flow(datapath, AI_FLOW_PRIORITY, match, actions, msg.buffer_id, idle_timeout=5)
                 return 
 
         # Forwarding cơ bản tại các Switch khác
@@ -345,5 +339,5 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         actions = [parser.OFPActionOutput(new_port)]
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
         mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_MODIFY,
-                                priority=10, match=match, instructions=inst)
+                                priority=AI_FLOW_PRIORITY, match=match, instructions=inst)
         datapath.send_msg(mod)
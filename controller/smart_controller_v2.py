@@ -13,80 +13,307 @@ import time
 import json
 import random
 import numpy as np
-import pandas as pd
-import joblib
 from collections import deque
+from functools import partial
 from operator import attrgetter
 
 from ryu.app import simple_switch_13
 from ryu.controller import ofp_event
+from ryu.controller.event import EVENT_PRIORITY_HIGH
 from ryu.controller.handler import MAIN_DISPATCHER, DEAD_DISPATCHER, CONFIG_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.lib import hub
-from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, ether_types
+from ryu.lib.packet import ether_types, in_proto
+from ryu.topology import event as topo_event
+from ryu.ofproto.ofproto_v1_3_columns import FlowStatsColumns, columnar_flow_stats
+from ryu.app.wsgi import ControllerBase, WSGIApplication, Response, route
 
-import tensorflow as tf
-from tensorflow.keras.models import load_model
+from flow_features import build_feature_matrix_columns, AI_FLOW_PRIORITY
+from inference_executor import InferenceExecutor
+from model_loader import load_bundle, describe
+from model_registry import ModelRegistry, canary_check
+from verdict_cache import VerdictCache, flow_key, flow_keys
+from flow_state import FlowStateStore
+from flow_cookies import CookieAllocator, APP_TAG, APP_MASK, FULL_MASK, is_ai_cookie
+from stats_scheduler import StatsScheduler
+from multipart import MultipartAggregator
+from reroute_batcher import RerouteBatcher
+from reroute_damper import RerouteDamper
+from group_balancer import GroupBalancer, remove_group
+from proactive import ProactiveProgrammer
+from packet_parser import parse_headers, parse_headers_full
+from pending_flows import PendingFlowTable
+from topology import TopologyService
 
 # CONFIG PATHS
 MODEL_DIR = "/home/nhathoang2612/CNM_Baitap04/model/"
 CLS_PATH = os.path.join(MODEL_DIR, "classification")
 PRED_PATH = os.path.join(MODEL_DIR, "traffic_predict")
+# Topology khai báo (switch biên, host, link); chạy thêm --observe-links để cập nhật link theo LLDP
+TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mininet', 'topology_v2.json')
 
 monitor_interval = 1 
+port_stats_interval = 2       # Chu kỳ gốc lấy port stats cho các cổng uplink (giây), đổi theo tải như flow stats
+port_stats_min_interval = 1   # Nhanh nhất khi tải tăng / burst: đúng chu kỳ mẫu LSTM học, không poll dày hơn
+port_stats_max_interval = 10  # Chậm nhất khi mạng rảnh
+LSTM_SAMPLE_INTERVAL = 1      # Khoảng cách 2 mẫu liên tiếp trong dữ liệu train LSTM (giây)
+flow_stats_min_interval = 0.25    # Flow stats (phân loại) nhanh nhất khi tải tăng / burst
+flow_stats_max_interval = 5       # Chậm nhất khi mạng rảnh
+IDLE_MBPS = 0.1               # Mọi đường dưới ngưỡng này -> coi là rảnh
+RISING_RATIO = 1.2            # Dự đoán > 1.2 x tải hiện tại -> tải đang tăng
+model_watch_interval = 5      # Chu kỳ kiểm tra file registry/CURRENT (giây)
+CANARY_SIZE = 256             # Số flow thật giữ lại để chạy canary khi đổi model
 CLASS_MAP = {0: 'background', 1: 'video', 2: 'voip', 3: 'web'}
-
-# Tên các đặc trưng (Phải khớp chính xác với lúc train trong notebook)
-FEATURE_NAMES = ['ip_proto', 'packet_count', 'byte_count', 
-                 'duration_sec', 'byte_rate', 'packet_rate', 'avg_packet_size']
+PRIORITY_CLASSES = {1, 2}     # Chỉ video/voip được RL ghim đường riêng, còn lại hash qua SELECT group
+# Giao thức được classifier theo dõi từng flow (packet-in + rule AI riêng); mặc định TCP + UDP như dữ liệu
+# train. Thu hẹp (vd. chỉ UDP) -> ít packet-in hơn nhưng flow TCP không được phân loại / reroute
+TRACKED_IP_PROTOS = (in_proto.IPPROTO_TCP, in_proto.IPPROTO_UDP)
+PATH_CAPACITY = 20 * 1_000_000 / 8    # Băng thông mỗi đường (bytes/s), khớp BW_LIMIT=20 Mbps của topo
+smart_controller_instance_name = 'smart_controller_app'
 
 class SmartController(simple_switch_13.SimpleSwitch13):
+    _CONTEXTS = {'wsgi': WSGIApplication}
+    # Ngoài mặc định của ryu (packet-in/echo/port status/state change, error + barrier/bundle reply trước,
+    # stats reply sau cùng): link add/delete đổi đường -> cũng ưu tiên cao
+    EVENT_PRIORITIES = {
+        topo_event.EventLinkAdd: EVENT_PRIORITY_HIGH,
+        topo_event.EventLinkDelete: EVENT_PRIORITY_HIGH,
+    }
+
     def __init__(self, *args, **kwargs):
         super(SmartController, self).__init__(*args, **kwargs)
         self.datapaths = {}
         self.monitor_thread = hub.spawn(self._monitor)
         
+        self.models = None        # ModelBundle, None khi đang load
+        self.previous_models = None   # Bộ model trước đó (để rollback)
+        self.registry = ModelRegistry(MODEL_DIR)
+        self.loading_version = None   # Version đang load (chỉ load 1 bộ tại 1 thời điểm)
+        self.requested_version = None  # Version yêu cầu qua REST: ghi CURRENT chỉ khi load + canary thành công
+        self.failed_versions = {}     # version -> lý do lỗi (hiển thị qua REST)
+        self.canary_features = None   # Batch đặc trưng thật gần nhất, dùng làm canary
         self.seq_length = 10
-        self.pred_type = 'LSTM'
-        self.flow_stats = {}      
-        self.path_history = {}    
-        self.uplink_ports = [5, 6, 7, 8, 9] 
-        self.path_loads = {port: 0.0 for port in self.uplink_ports}
-        self.q_table = np.zeros((4, 5)) 
+        # Cặp switch ingress/egress và k đường mỗi cặp; kích thước state bên dưới theo topology
+        self.topology = TopologyService(TOPOLOGY_FILE)
+        self.path_ports = self.topology.monitored_ports()   # [(dpid, cổng uplink)] trên các switch ingress
+        # Port stats của các cổng uplink, khóa (dpid, port):
+        # tx bytes + lịch sử tốc độ (ring buffer seq_length) -> forecaster; rx bytes; drop/error
+        self.path_state = FlowStateStore(capacity=len(self.path_ports), history_len=self.seq_length)
+        self.rx_state = FlowStateStore(capacity=len(self.path_ports), history_len=1)
+        self.error_state = FlowStateStore(capacity=len(self.path_ports), history_len=1)
+        self.port_metrics = {}    # (dpid, port) -> tốc độ tx/rx (bytes/s), drop/error mỗi giây
+        self.port_sample_clock = {}   # dpid -> mốc (monotonic) của mẫu lịch sử LSTM gần nhất
+        self.path_loads = {}      # (dpid, port) -> tải dự đoán (bytes/s)
+        self.q_tables = {}        # (ingress, egress) -> Q-table (số lớp x k đường)
+        self.group_balancers = {} # (ingress, egress) -> GroupBalancer
+        self.polled = set()       # Switch ingress đang được poll stats
+        self.predict_latency = deque(maxlen=100)  # Thời gian dự đoán mỗi chu kỳ (giây)
         self.epsilon = 0.1  
         self.alpha = 0.5    
         self.gamma = 0.9    
+        # Inference chạy trên thread pool riêng, không chặn eventlet hub
+        self.executor = InferenceExecutor(max_workers=2, max_age=2 * monitor_interval)
+        self.executor_logged = 0    # số job đã submit ở lần log [AI EXECUTOR] trước
+        # Nhãn đã phân loại theo flow, chỉ classify lại flow mới / flow có đặc trưng thay đổi
+        self.verdict_cache = VerdictCache()
+        self.cookies = CookieAllocator()   # Cookie (class, path, generation) cho flow AI
+        # Chỉ switch ingress có consumer: flow stats -> classifier, port stats -> forecaster.
+        # Switch trung chuyển và egress không được poll (đăng ký trong _build_path_index).
+        self.stats_scheduler = StatsScheduler({'flow': self._request_stats, 'port': self._request_port_stats},
+                                              self.datapaths.get)
+        # Gộp flow stats reply nhiều phần (OFPMPF_REPLY_MORE) thành 1 snapshot
+        # (flow stats được decode dạng cột, xem _flow_stats_reply_handler)
+        self.multipart = MultipartAggregator(timeout=2 * flow_stats_max_interval,
+                                             get_part=attrgetter('columns'), join=FlowStatsColumns.concat)
+        # Reroute của 1 chu kỳ gửi thành 1 giao dịch bundle (hoặc FlowMod + barrier) mỗi switch
+        self.reroute_batcher = RerouteBatcher(on_result=self._on_reroute_result)
+        # Chống reroute liên tục: flow ở yên >= 10s, đường mới nhẹ hơn >= 20%, <= 20 reroute/s mỗi switch
+        self.damper = RerouteDamper(min_dwell=10.0, min_gain=0.2, max_rate=20.0)
+        # Transit/egress/chiều về cài sẵn khi switch kết nối -> chỉ switch ingress còn packet-in
+        self.proactive = ProactiveProgrammer(self.topology, TRACKED_IP_PROTOS)
+        self.packet_in_count = {}   # dpid -> số packet-in
+        # Flow mới đã gửi FlowMod, chờ barrier reply: packet-in trùng chỉ cần packet-out
+        self.pending_flows = PendingFlowTable(timeout=1.0)
+        self._build_path_index()
         
         self.load_models()
+        self.model_watch_thread = hub.spawn(self._watch_models)
 
-    def load_models(self):
-        print(">>> [AI] Loading AI Models...")
-        try:
-            self.cls_model = joblib.load(os.path.join(CLS_PATH, 'best_classifier_model.pkl'))
-            self.cls_scaler = joblib.load(os.path.join(CLS_PATH, 'classifier_scaler.pkl'))
-            print("   - Classification: Loaded DT/RF Model.")
+        wsgi = kwargs['wsgi']
+        wsgi.register(ModelRestController, {smart_controller_instance_name: self})
 
-            json_config = os.path.join(PRED_PATH, 'model_config.json')
-            txt_config = os.path.join(PRED_PATH, 'model_config.txt')
-            
-            if os.path.exists(json_config):
-                with open(json_config, 'r') as f:
-                    config = json.load(f)
-                    self.pred_type = config.get('best_model_type', 'LSTM')
-                    self.seq_length = int(config.get('sequence_length', 10))
-            elif os.path.exists(txt_config):
-                with open(txt_config, 'r') as f:
-                    self.seq_length = int(f.read().strip())
-            
-            self.pred_scaler = joblib.load(os.path.join(PRED_PATH, 'prediction_scaler.pkl'))
-            if self.pred_type == 'LSTM':
-                self.pred_model = load_model(os.path.join(PRED_PATH, 'best_prediction_model.keras'))
-            else:
-                self.pred_model = joblib.load(os.path.join(PRED_PATH, 'arima_model.pkl'))
-            print(f"   - Prediction: Loaded {self.pred_type} Model.")
-                
+    def _build_path_index(self):
+        """
+        Đồng bộ state theo topology (lúc khởi động và khi đường được tính lại):
+        Q-table và SELECT group mỗi cặp (ingress, egress), slot lịch sử tải mỗi cổng uplink, đăng ký poll.
+        """
+        pairs = self.topology.pairs()
+        for pair in pairs:
+            k = len(self.topology.paths[pair])
+            if pair not in self.q_tables or self.q_tables[pair].shape[1] != k:
+                self.q_tables[pair] = np.zeros((len(CLASS_MAP), k))
+            ports = self.topology.uplink_ports(*pair)
+            if pair not in self.group_balancers or self.group_balancers[pair].ports != ports:
+                # Flow mới đi qua group SELECT của cặp, trọng số bucket theo tải dự đoán
+                self.group_balancers[pair] = GroupBalancer(ports, group_id=self.topology.group_ids[pair],
+                                                           capacity=PATH_CAPACITY)
+        for pair in [pair for pair in self.q_tables if pair not in pairs]:
+            del self.q_tables[pair]
+            del self.group_balancers[pair]
+
+        ports = self.topology.monitored_ports()
+        stale = [key for key in self.path_ports if key not in ports]
+        for key in stale:
+            for store in (self.path_state, self.rx_state, self.error_state):
+                store.release(key)
+        self.path_ports = ports
+        self.path_loads = {key: self.path_loads.get(key, 0.0) for key in ports}
+
+        ingress = {src for src, _ in pairs}
+        for dpid in ingress - self.polled:
+            self.stats_scheduler.subscribe(dpid, 'flow', 'classifier', monitor_interval,
+                                           flow_stats_min_interval, flow_stats_max_interval)
+            self.stats_scheduler.subscribe(dpid, 'port', 'forecaster', port_stats_interval,
+                                           port_stats_min_interval, port_stats_max_interval)
+        for dpid in self.polled - ingress:
+            self.stats_scheduler.unsubscribe(dpid, 'flow', 'classifier')
+            self.stats_scheduler.unsubscribe(dpid, 'port', 'forecaster')
+            self.port_sample_clock.pop(dpid, None)
+        self.polled = ingress
+
+    def _on_topology_changed(self):
+        old_groups = {pair: balancer.group_id for pair, balancer in self.group_balancers.items()}
+        self._build_path_index()
+        paths = ', '.join(f"{src}->{dst}: {len(self.topology.paths[(src, dst)])}" for src, dst in self.topology.pairs())
+        print(f"   [TOPOLOGY] Paths recomputed (v{self.topology.version}): {paths}")
+        for dpid, datapath in self.datapaths.items():
+            # Group đã có trên switch -> MODIFY: xóa group là xóa luôn mọi flow AI / fast-path trỏ tới nó
+            for pair in self.topology.pairs(dpid):
+                self.group_balancers[pair].install(datapath, modify=pair in old_groups)
+            # Rule mới ghi đè rule cũ, rule của đường / host không còn bị xóa theo cookie
+            self.proactive.update(datapath)
+            for pair, group_id in old_groups.items():
+                if pair[0] == dpid and pair not in self.group_balancers:
+                    remove_group(datapath, group_id)
+
+    def load_models(self, version=None, set_current=False):
+        """
+        Load model trong nền (thread OS của InferenceExecutor, không phải green thread): hub vẫn chạy
+        trong lúc joblib/TF load, controller nhận kết nối switch ngay,
+        trong lúc chờ thì flow mới đi qua SELECT group (hoặc tiếp tục dùng model cũ).
+        Model mới qua canary -> swap 1 tham chiếu. Trả về False nếu đang có 1 lần load khác.
+        set_current: ghi version vào registry/CURRENT sau khi swap thành công (reload qua REST).
+        """
+        if self.loading_version is not None: return False
+        version = version or self.registry.current_version()
+        self.loading_version = version
+        self.requested_version = version if set_current else None
+        if self.models is None:
+            # Watcher thử lại version vừa lỗi: không in lại
+            if version not in self.failed_versions:
+                print(f">>> [AI] Loading AI Models '{version}' in background (SELECT group fast-path until ready)...")
+        else:
+            print(f">>> [AI] Loading AI Models '{version}' in background (keep '{self.models.version}' until ready)...")
+        self.load_started = time.perf_counter()
+        self.executor.submit('load_models', self._load_models_job, (version, self.canary_features),
+                             callback=self._on_models_ready, max_age=float('inf'))
+        return True
+
+    def _load_models_job(self, version, canary_features):
+        """Chạy trên thread OS của executor: load + canary, không gọi hub / không đụng tới model đang chạy"""
+        try:
+            cls_path, pred_path = self.registry.paths(version)
+            bundle = load_bundle(cls_path, pred_path, version)
+            canary_check(bundle, canary_features, CLASS_MAP.keys())
+            return version, bundle, None
         except Exception as e:
-            print(f"!!! [ERROR] Load Model Failed: {e}")
+            return version, None, e
+
+    def _on_models_ready(self, result):
+        version, bundle, error = result
+        self.loading_version = None
+        requested, self.requested_version = self.requested_version, None
+        if error is not None:
+            # CURRENT giữ nguyên -> lần khởi động sau không load version lỗi
+            # Watcher thử lại mỗi chu kỳ khi chưa có model: cùng 1 lỗi chỉ in 1 lần
+            repeated = self.failed_versions.get(version) == str(error)
+            self.failed_versions[version] = str(error)
+            active = self.models.version if self.models is not None else None
+            if not repeated: print(f"!!! [ERROR] Load Model '{version}' Failed: {error} (active: {active})")
+            return
+        self.failed_versions.pop(version, None)
+        self._swap_models(bundle)
+        # Như rollback_models: CURRENT chỉ đổi sau khi swap, watcher thấy CURRENT == bộ đang chạy
+        if requested == version: self.registry.set_current(version)
+        elapsed = time.perf_counter() - self.load_started
+        print(f">>> [AI] Models '{version}' ready in {elapsed:.2f}s: {describe(bundle)}")
+
+    def _swap_models(self, bundle):
+        if bundle.seq_length != self.seq_length:
+            self.seq_length = bundle.seq_length
+            self.path_state.resize_history(self.seq_length)
+        # Gán 1 tham chiếu duy nhất -> chuyển sang AI routing ngay lập tức (atomic trên hub).
+        # Job đang chạy vẫn giữ tham chiếu bộ cũ nên không bị ảnh hưởng.
+        if self.models is not None: self.previous_models = self.models
+        self.models = bundle
+        self.verdict_cache.clear()
+
+    def rollback_models(self):
+        """Quay lại bộ model trước đó (đã load sẵn trong RAM, không cần load lại)"""
+        if self.previous_models is None: return False
+        bad_version = self.models.version
+        self._swap_models(self.previous_models)
+        # Ghi lại CURRENT để watcher không load lại version vừa rollback
+        self.registry.set_current(self.models.version)
+        self.failed_versions[bad_version] = 'rolled back'
+        print(f">>> [AI] Rolled back models '{bad_version}' -> '{self.models.version}'")
+        return True
+
+    def _watch_models(self):
+        """
+        Theo dõi registry/CURRENT: nội dung đổi sang version khác bộ đang chạy -> hot-reload
+        (switch và flow giữ nguyên). Version lỗi chỉ được thử lại khi CURRENT đổi lần nữa.
+        Chưa có bộ model nào (load đầu tiên lỗi) -> thử lại mỗi chu kỳ, bắt được registry đã sửa.
+        """
+        watched = self.registry.current_version()
+        while True:
+            hub.sleep(model_watch_interval)
+            if self.loading_version is not None: continue
+            try:
+                version = self.registry.current_version()
+            except Exception as e:
+                print(f"!!! [ERROR] Model registry: {e}")
+                continue
+            if self.models is None:
+                watched = version
+                self.load_models(version)
+                continue
+            if version == watched: continue
+            watched = version
+            if version != self.models.version:
+                self.load_models(version)
+
+    def model_status(self):
+        models = self.models
+        return {
+            'version': models.version if models is not None else None,
+            'previous': self.previous_models.version if self.previous_models is not None else None,
+            'loading': self.loading_version,
+            'current': self.registry.current_version(),
+            'versions': self.registry.versions(),
+            'failed': self.failed_versions,
+            'timings': models.timings if models is not None else {},
+            'verdict_cache': self.verdict_cache.stats(),
+        }
+
+    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
+    def switch_features_handler(self, ev):
+        super(SmartController, self).switch_features_handler(ev)
+        datapath = ev.msg.datapath
+        for pair in self.topology.pairs(datapath.id):
+            self.group_balancers[pair].install(datapath)
+        if self.proactive.install(datapath):
+            print(f"   [PROACTIVE] Switch {datapath.id}: {self.proactive.installed[datapath.id]} rules installed")
 
     @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
     def _state_change_handler(self, ev):
@@ -99,132 +326,328 @@ class SmartController(simple_switch_13.SimpleSwitch13):
             if datapath.id in self.datapaths:
                 # print(f"   [DISCONNECT] Switch {datapath.id} left.")
                 del self.datapaths[datapath.id]
+                self.multipart.drop_datapath(datapath.id)
+                self.reroute_batcher.drop_datapath(datapath.id)
+                self.pending_flows.drop_datapath(datapath.id)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def _port_status_handler(self, ev):
+        msg = ev.msg
+        ofproto = msg.datapath.ofproto
+        live = msg.reason != ofproto.OFPPR_DELETE and not msg.desc.state & ofproto.OFPPS_LINK_DOWN
+        if self.topology.set_port_state(msg.datapath.id, msg.desc.port_no, live):
+            print(f"   [TOPOLOGY] Switch {msg.datapath.id} port {msg.desc.port_no} {'up' if live else 'down'}")
+
+    @set_ev_cls(topo_event.EventLinkAdd)
+    def _link_add_handler(self, ev):
+        src, dst = ev.link.src, ev.link.dst
+        if self.topology.add_link(src.dpid, src.port_no, dst.dpid, dst.port_no):
+            self._on_topology_changed()
+
+    @set_ev_cls(topo_event.EventLinkDelete)
+    def _link_delete_handler(self, ev):
+        src, dst = ev.link.src, ev.link.dst
+        if self.topology.remove_link(src.dpid, src.port_no, dst.dpid, dst.port_no):
+            self._on_topology_changed()
 
     def _monitor(self):
+        # Request stats do stats_scheduler gửi; vòng này chỉ chạy forecaster + log
+        cycle = 0
         while True:
-            for dp in self.datapaths.values():
-                self._request_stats(dp)
             self._predict_traffic_load()
+            self.reroute_batcher.expire()
+            self.pending_flows.expire()
+            cycle += 1
+            if cycle % 10 == 0:
+                self._log_executor_stats()
+                self._log_port_metrics()
+                self._log_polling()
+                self._log_reroutes()
             hub.sleep(monitor_interval)
 
+    def _log_reroutes(self):
+        st = self.reroute_batcher.stats()
+        ds = self.damper.stats()
+        if st['committed'] + st['failed'] + ds['suppressed_total'] == 0: return
+        print(f"   [REROUTE] {ds['reroutes_per_sec']:.1f}/s | suppressed dwell={ds['suppressed']['dwell']} "
+              f"gain={ds['suppressed']['gain']} rate={ds['suppressed']['rate']} | "
+              f"commits={st['committed']} failed={st['failed']} (timeout {st['timed_out']}) | "
+              f"moves applied={st['moves_applied']} failed={st['moves_failed']} | "
+              f"commit latency avg={st['avg_commit_ms']:.1f}ms max={st['max_commit_ms']:.1f}ms")
+
+    def controller_stats(self):
+        """Metrics cho REST GET /stats"""
+        return {
+            'executor': self.executor.stats(),
+            'verdict_cache': self.verdict_cache.stats(),
+            'polling': self.stats_scheduler.status(),
+            'multipart': self.multipart.stats(),
+            'reroute': self.reroute_batcher.stats(),
+            'damping': self.damper.stats(),
+            'ports': {f"{dpid}:{port}": m for (dpid, port), m in self.port_metrics.items()},
+            'group_weights': {f"{src}->{dst}": dict(zip(b.ports, b.weights))
+                              for (src, dst), b in self.group_balancers.items()},
+            'topology': self.topology.describe(),
+            'packet_in': self.packet_in_count,
+            'pending_flows': self.pending_flows.stats(),
+            'proactive_rules': self.proactive.installed,
+            'send_queue': {dpid: dp.send_stats() for dpid, dp in self.datapaths.items()},
+            'event_queues': self.event_queue_stats(),
+        }
+
+    def _request_port_stats(self, datapath):
+        """Tải mỗi đường lấy từ port stats của cổng uplink (1 request nhỏ, không phụ thuộc số flow)"""
+        parser = datapath.ofproto_parser
+        datapath.send_msg(parser.OFPPortStatsRequest(datapath, 0, datapath.ofproto.OFPP_ANY))
+
+    def _log_polling(self):
+        parts = [f"{key}={sub['interval']:.2f}s" for key, sub in self.stats_scheduler.status().items()]
+        mp = self.multipart.stats()
+        print(f"   [STATS POLL] {' | '.join(parts)} | flow reply parts last={mp['last_parts']} "
+              f"max={mp['max_parts']} avg={mp['avg_parts']:.1f} | incomplete timed out={mp['timed_out']}")
+
+    @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
+    def _port_stats_reply_handler(self, ev):
+        dpid = ev.msg.datapath.id
+        if not self.topology.is_ingress(dpid): return
+        stats = [stat for stat in ev.msg.body if (dpid, stat.port_no) in self.path_loads]
+        if not stats: return
+        ports = [(dpid, stat.port_no) for stat in stats]
+        now = time.monotonic()
+        # Dùng duration của cổng làm mốc thời gian (chính xác theo switch); switch không hỗ trợ -> giờ controller
+        timestamps = [now if stat.duration_sec == 0xffffffff else stat.duration_sec + stat.duration_nsec / 1e9
+                      for stat in stats]
+
+        slots, tx_rate, _ = self.path_state.update(
+            ports, [stat.tx_bytes for stat in stats], [stat.tx_packets for stat in stats], timestamps, now=now)
+        _, rx_rate, _ = self.rx_state.update(
+            ports, [stat.rx_bytes for stat in stats], [stat.rx_packets for stat in stats], timestamps, now=now)
+        _, drop_rate, error_rate = self.error_state.update(
+            ports, [stat.tx_dropped + stat.rx_dropped for stat in stats],
+            [stat.tx_errors + stat.rx_errors for stat in stats], timestamps, now=now)
+        # Lịch sử LSTM giữ lưới mẫu 1s dù port stats poll thưa hơn: mỗi LSTM_SAMPLE_INTERVAL đã trôi qua
+        # là 1 mẫu, bằng tốc độ trung bình của cả chu kỳ. Bộ đếm bị reset (cổng khởi động lại) -> chặn dưới 0
+        clock = self.port_sample_clock.get(dpid, now - LSTM_SAMPLE_INTERVAL)
+        samples = int((now - clock) // LSTM_SAMPLE_INTERVAL)
+        if samples > 0:
+            self.path_state.push_history(slots, np.maximum(tx_rate, 0), repeat=samples)
+            self.port_sample_clock[dpid] = clock + samples * LSTM_SAMPLE_INTERVAL
+
+        for i, port in enumerate(ports):
+            self.port_metrics[port] = {'tx_bps': max(float(tx_rate[i]), 0.0), 'rx_bps': max(float(rx_rate[i]), 0.0),
+                                       'drops': max(float(drop_rate[i]), 0.0), 'errors': max(float(error_rate[i]), 0.0)}
+
+    def _log_port_metrics(self):
+        if not self.port_metrics: return
+        parts = []
+        for key in self.path_ports:
+            m = self.port_metrics.get(key)
+            if m is None: continue
+            part = f"{self._path_label(*key)}=tx {m['tx_bps'] * 8 / 1_000_000:.1f}M/rx {m['rx_bps'] * 8 / 1_000_000:.1f}M"
+            if m['drops'] or m['errors']: part += f" (drop {m['drops']:.0f}/s, err {m['errors']:.0f}/s)"
+            parts.append(part)
+        print(f"   [PORT STATS] {' | '.join(parts)}")
+
+    def _log_executor_stats(self):
+        # Chỉ in khi có job mới kể từ lần log trước (mạng rảnh / chưa có model -> không lặp lại dòng cũ)
+        st = self.executor.stats()
+        if st['submitted'] == self.executor_logged: return
+        self.executor_logged = st['submitted']
+        print(f"   [AI EXECUTOR] queue={st['queue_depth']} | latency avg={st['avg_latency_ms']:.1f}ms "
+              f"max={st['max_latency_ms']:.1f}ms | merged={st['merged']} dropped={st['dropped']} errors={st['errors']}")
+        cs = self.verdict_cache.stats()
+        print(f"   [AI CACHE] size={cs['size']} | hit rate={cs['hit_rate'] * 100:.1f}% | "
+              f"saved {cs['inferences_saved']} flows / {cs['inference_calls_saved']} calls | "
+              f"drift={cs['drifted']} removed={cs['removed']} expired={cs['expired']} evicted={cs['evicted']}")
+
     def _request_stats(self, datapath):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
-        req = parser.OFPFlowStatsRequest(datapath)
+        # Chỉ lấy flow AI (cookie APP_TAG) ở bảng 0: switch không gửi table-miss và flow khác
+        req = parser.OFPFlowStatsRequest(datapath, 0, 0, ofproto.OFPP_ANY, ofproto.OFPG_ANY,
+                                         APP_TAG << 48, APP_MASK)
         datapath.send_msg(req)
 
     def _predict_traffic_load(self):
-        if not hasattr(self, 'pred_model') or self.pred_model is None: return
-        
+        models = self.models
+        if models is None: return
+
+        # Gom lịch sử của TẤT CẢ các cổng thành 1 ma trận (n_ports, seq_length), đã padding nếu thiếu
+        slots = self.path_state.slots_of(self.path_ports)
+        history, counts = self.path_state.get_history(slots, self.seq_length)
+        has_data = counts > 0
+
+        # Forward pass chạy trên worker thread, kết quả áp dụng lại trên hub
+        self.executor.submit('forecast', self._forecast_batch, (models, history, has_data),
+                             callback=partial(self._apply_forecast, list(self.path_ports)))
+
+    def _forecast_batch(self, models, history, has_data):
+        """Chạy trong worker thread: 1 lần forward pass cho mọi cổng"""
+        start = time.perf_counter()
+        preds = models.forecast(history, has_data)
+        self.predict_latency.append(time.perf_counter() - start)
+        return preds
+
+    def _path_label(self, dpid, port):
+        """P1..Pk theo thứ tự cổng uplink; nhiều switch ingress thì thêm dpid (vd. 1:P3)"""
+        idx = sorted(p for d, p in self.path_ports if d == dpid).index(port) + 1
+        return f"P{idx}" if len(self.polled) <= 1 else f"{dpid}:P{idx}"
+
+    def _apply_forecast(self, path_ports, preds):
+        if path_ports != self.path_ports: return    # Topology đổi trong lúc dự đoán
+        for key, val in zip(path_ports, preds):
+            self.path_loads[key] = val
+        for dpid in self.polled:
+            self._adapt_polling(dpid)
+        # Trọng số group theo tải lớn hơn giữa dự đoán LSTM và đo được (port stats)
+        for (src, dst), balancer in self.group_balancers.items():
+            keys = [(src, port) for port in balancer.ports]
+            loads = [max(self.path_loads.get(key, 0.0), self.port_metrics.get(key, {}).get('tx_bps', 0.0))
+                     for key in keys]
+            balancer.update(self.datapaths.get(src), loads)
         log_msg = []
         high_load = False
-
-        for port in self.uplink_ports:
-            history = self.path_history.get(port, deque(maxlen=self.seq_length))
-            data_list = list(history)
-            
-            # Padding nếu thiếu dữ liệu
-            if len(data_list) == 0: 
-                val = 0
-            elif len(data_list) < self.seq_length:
-                padding = [data_list[-1]] * (self.seq_length - len(data_list))
-                data_list = padding + data_list
-                val = data_list[-1] # Fallback tạm
-            
-            # Dự đoán
-            if len(data_list) == self.seq_length:
-                data_raw = np.array(data_list).reshape(-1, 1)
-                data_scaled = self.pred_scaler.transform(data_raw)
-                
-                if self.pred_type == 'LSTM':
-                    X_input = data_scaled.reshape(1, self.seq_length, 1)
-                    pred = self.pred_model.predict(X_input, verbose=0)
-                    val = self.pred_scaler.inverse_transform(pred)[0][0]
-                else:
-                    val = data_list[-1]
-
-            self.path_loads[port] = val
+        for key, val in zip(path_ports, preds):
             mbps = (val * 8) / 1_000_000
-            
+
             # Format log: P1=10.5M
-            path_id = port - 4
-            log_msg.append(f"P{path_id}={mbps:.1f}M")
-            
+            log_msg.append(f"{self._path_label(*key)}={mbps:.1f}M")
+
             if mbps > 1.0: high_load = True
 
         # CHỈ IN 1 DÒNG DUY NHẤT thay vì 5 dòng
         # Và chỉ in khi tổng tải mạng có hoạt động đáng kể (>1Mbps ở bất kỳ đường nào)
         if high_load:
-            print(f"   [AI PREDICT] Load Distribution: {' | '.join(log_msg)}")
+            latency_ms = self.predict_latency[-1] * 1000
+            print(f"   [AI PREDICT] Load Distribution: {' | '.join(log_msg)} ({latency_ms:.1f} ms)")
+
+    def _adapt_polling(self, dpid):
+        """Tải dự đoán tăng / burst -> poll flow + port stats nhanh hơn (reroute sớm); rảnh -> giãn ra"""
+        current = sum(m['tx_bps'] for key, m in self.port_metrics.items() if key[0] == dpid)
+        predicted = float(sum(val for key, val in self.path_loads.items() if key[0] == dpid))
+        peak_mbps = max(predicted, current) * 8 / 1_000_000
+        for stat_type in ('flow', 'port'):
+            if predicted > RISING_RATIO * current and predicted * 8 / 1_000_000 > IDLE_MBPS:
+                self.stats_scheduler.speed_up(dpid, stat_type)
+            elif peak_mbps < IDLE_MBPS:
+                self.stats_scheduler.slow_down(dpid, stat_type)
+            else:
+                self.stats_scheduler.relax(dpid, stat_type)
 
     @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    @columnar_flow_stats
     def _flow_stats_reply_handler(self, ev):
-        body = ev.msg.body
+        # Opt-in riêng handler này: reply được decode thành các cột NumPy (ev.msg.columns), không tạo OFPFlowStats/OFPMatch
+        # cho từng flow; match chỉ dựng lại cho flow cần reroute
         dpid = ev.msg.datapath.id
-        
-        if dpid == 1:
-            current_port_bytes = {p: 0 for p in self.uplink_ports}
-            for stat in body:
-                out_port = 0
-                if stat.instructions:
-                    for action in stat.instructions[0].actions:
-                        if hasattr(action, 'port'): out_port = action.port
-                if out_port in self.uplink_ports:
-                    current_port_bytes[out_port] += stat.byte_count
-            
-            for port in self.uplink_ports:
-                rate = 0
-                if port in self.flow_stats:
-                    delta = current_port_bytes[port] - self.flow_stats[port]
-                    rate = max(0, delta / monitor_interval)
-                self.flow_stats[port] = current_port_bytes[port]
-                if port not in self.path_history: self.path_history[port] = deque(maxlen=self.seq_length)
-                self.path_history[port].append(rate)
-
-        # 2. AI CLASSIFICATION & REROUTING
-        if dpid == 1:
-            for stat in body:
-                if stat.priority != 10: continue
-                if stat.duration_sec == 0: continue
-                
-                byte_count = stat.byte_count
-                packet_count = stat.packet_count
-                avg_packet_size = byte_count / packet_count if packet_count > 0 else 0
-                byte_rate = byte_count / stat.duration_sec
-                packet_rate = packet_count / stat.duration_sec
-                ip_proto = stat.match.get('ip_proto', 17)
-                
-                # --- FIX: Dùng DataFrame để có tên cột, tránh warning ---
-                features_df = pd.DataFrame([[ip_proto, packet_count, byte_count, 
-                                             stat.duration_sec, byte_rate, packet_rate, avg_packet_size]], 
-                                           columns=FEATURE_NAMES)
-                
-                if self.cls_model:
-                    # --- AI CLASSIFIER ---
-                    # Scale bằng DataFrame đã có tên cột
-                    features_scaled = self.cls_scaler.transform(features_df)
-                    pred_idx = self.cls_model.predict(features_scaled)[0]
-                    label = CLASS_MAP.get(pred_idx, "unknown")
-                    
-                    # Log phân loại (In tất cả các loại quan trọng)
-                    if label in ['video', 'voip', 'web'] or byte_rate > 100000:
-                        print(f"   [AI CLASSIFIER] Flow {label.upper()} detected (Size: {avg_packet_size:.0f} bytes)")
-
-                    # RL Chọn đường
-                    best_path_idx = self._get_action_rl(pred_idx)
-                    new_out_port = self.uplink_ports[best_path_idx]
-                    
-                    curr_port = 0
-                    if stat.instructions:
-                        for action in stat.instructions[0].actions:
-                            if hasattr(action, 'port'): curr_port = action.port
-                    
-                    if curr_port != 0 and curr_port != new_out_port:
-                        print(f"   >>> [AI-REROUTE] Optimizing {label.upper()}: Switch to Path {new_out_port-4}")
-                        
-                        reward = 1000 / (self.path_loads.get(new_out_port, 0) + 1.0)
-                        self._update_q_table(pred_idx, best_path_idx, reward)
-                        self.mod_flow(ev.msg.datapath, stat.match, new_out_port)
+        # Bảng flow lớn -> switch chia reply thành nhiều phần; chỉ xử lý khi đã đủ snapshot
+        snapshot = self.multipart.add(ev.msg)
+        if snapshot is None: return
+        columns, _ = snapshot
+
+        # Tải mỗi đường (path_state) lấy từ port stats, xem _port_stats_reply_handler
+
+        # AI CLASSIFICATION & REROUTING (Batch: 1 lần scale + 1 lần predict cho mọi flow)
+        models = self.models
+        if self.topology.is_ingress(dpid) and models is not None:
+            flows, features = build_feature_matrix_columns(columns)
+            if len(flows) == 0: return
+            # Copy: job load/reload đọc mảng này trên thread OS, không giữ tham chiếu tới cả batch
+            self.canary_features = features[:CANARY_SIZE].copy()
+
+            # Flow đã có nhãn và đặc trưng chưa trôi -> dùng lại, chỉ classify phần còn lại
+            keys = flow_keys(flows)
+            labels, miss_idx = self.verdict_cache.lookup(keys, features)
+            if len(miss_idx) == 0:
+                self._apply_classification(ev.msg.datapath, flows, keys, features, labels)
+                return
+            # Inference chạy ngoài hub, quyết định reroute áp dụng khi có kết quả
+            self.executor.submit(('classify', dpid), self._classify_misses, (models, features, labels, miss_idx),
+                                 callback=partial(self._on_classified, models, ev.msg.datapath,
+                                                  flows, keys, features, miss_idx))
+
+    @staticmethod
+    def _classify_misses(models, features, labels, miss_idx):
+        """Chạy trong worker thread: chỉ classify các flow cache miss"""
+        labels = labels.copy()
+        labels[miss_idx] = models.classify(features[miss_idx])
+        return labels
+
+    def _on_classified(self, models, datapath, flows, keys, features, miss_idx, labels):
+        # Model đã bị đổi trong lúc chạy -> không lưu nhãn của model cũ vào cache
+        if models is self.models:
+            self.verdict_cache.store([keys[i] for i in miss_idx], features[miss_idx], labels[miss_idx])
+        self._apply_classification(datapath, flows, keys, features, labels)
+
+    @set_ev_cls(ofp_event.EventOFPFlowRemoved, MAIN_DISPATCHER)
+    def _flow_removed_handler(self, ev):
+        msg = ev.msg
+        if msg.priority == AI_FLOW_PRIORITY:
+            key = flow_key(msg.match)
+            self.verdict_cache.invalidate(key)
+            self.damper.forget(key)
+
+    def _apply_classification(self, datapath, flows, keys, features, pred_labels):
+        for i, (key, feat, pred_idx) in enumerate(zip(keys, features, pred_labels)):
+            label = CLASS_MAP.get(pred_idx, "unknown")
+            byte_rate = feat[4]
+            avg_packet_size = feat[6]
+
+            # Log phân loại (In tất cả các loại quan trọng)
+            if label in ['video', 'voip', 'web'] or byte_rate > 100000:
+                print(f"   [AI CLASSIFIER] Flow {label.upper()} detected (Size: {avg_packet_size:.0f} bytes)")
+
+            # Lưu lượng thường để data plane hash qua group; chỉ video/voip được RL chọn đường
+            if pred_idx not in PRIORITY_CLASSES: continue
+
+            # Cặp (ingress, egress) theo IP đích; RL chọn 1 trong k đường của cặp
+            dst = self.topology.host_location(key[1])
+            pair = (datapath.id, dst[0]) if dst is not None else None
+            if pair not in self.q_tables: continue
+            path = self.topology.paths[pair][self._get_action_rl(pair, pred_idx)]
+            if not self.topology.path_live(path): continue
+            new_out_port = path.uplink
+            curr_port = int(flows.out_port[i])   # 0: flow đang đi qua group
+
+            if curr_port != new_out_port:
+                loads = [self.path_loads.get((datapath.id, port), 0) for port in self.group_balancers[pair].ports]
+                new_load = self.path_loads.get((datapath.id, new_out_port), 0)
+                # Flow trong group: tải kỳ vọng = trung bình các đường của cặp
+                curr_load = (self.path_loads.get((datapath.id, curr_port), 0) if curr_port != 0
+                             else sum(loads) / len(loads))
+                # Giảm rung: thời gian ở yên tối thiểu (từ lúc cài / reroute trước), ngưỡng lợi ích, quota mỗi switch
+                allowed, _ = self.damper.allow(datapath.id, key, curr_load, new_load, age=feat[3])
+                if not allowed: continue
+                print(f"   >>> [AI-REROUTE] Optimizing {label.upper()}: Switch to Path {path.index + 1}")
+
+                reward = 1000 / (new_load + 1.0)
+                # Q-table cập nhật khi switch xác nhận (xem _on_reroute_result)
+                cookie = int(flows.cookie[i])
+                mod = self._reroute_mod(datapath, flows.match(i), new_out_port,
+                                        cookie=cookie if is_ai_cookie(cookie) else None)
+                self.reroute_batcher.add(datapath, mod, (pair, pred_idx, path.index, reward))
+
+        self.reroute_batcher.flush()
+
+    def _on_reroute_result(self, datapath, metas, ok, latency):
+        """Switch đã commit (ok) hoặc từ chối reroute: cập nhật RL, reroute lỗi nhận reward 0"""
+        for pair, state, action, reward in metas:
+            self._update_q_table(pair, state, action, reward if ok else 0.0)
+        if not ok:
+            print(f"!!! [REROUTE] Switch {datapath.id} rejected {len(metas)} reroutes ({latency * 1000:.1f} ms)")
+
+    @set_ev_cls(ofp_event.EventONFBundleCtrlMsg, MAIN_DISPATCHER)
+    def _bundle_reply_handler(self, ev):
+        self.reroute_batcher.handle_bundle_reply(ev.msg)
+
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, MAIN_DISPATCHER)
+    def _barrier_reply_handler(self, ev):
+        if self.pending_flows.handle_barrier_reply(ev.msg): return
+        self.reroute_batcher.handle_barrier_reply(ev.msg)
+
+    @set_ev_cls(ofp_event.EventOFPErrorMsg, MAIN_DISPATCHER)
+    def _error_msg_handler(self, ev):
+        self.reroute_batcher.handle_error(ev.msg)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
@@ -234,68 +657,154 @@ class SmartController(simple_switch_13.SimpleSwitch13):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
         dpid = datapath.id
+        self.packet_in_count[dpid] = self.packet_in_count.get(dpid, 0) + 1
         
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocol(ethernet.ethernet)
+        # Fast path: struct trên memoryview; parser đầy đủ của ryu chỉ dùng khi gói lạ
+        headers = parse_headers(msg.data) or parse_headers_full(msg.data)
+        if headers is None: return
+        eth_dst, eth_src, ethertype, ip_src, ip_dst, ip_proto, _, _ = headers
         
-        if eth.ethertype in [ether_types.ETH_TYPE_LLDP, 34525, ether_types.ETH_TYPE_ARP]: return
+        if ethertype in [ether_types.ETH_TYPE_LLDP, 34525, ether_types.ETH_TYPE_ARP]: return
 
-        if eth.ethertype == ether_types.ETH_TYPE_IP:
+        if ethertype == ether_types.ETH_TYPE_IP:
             self.mac_to_port.setdefault(dpid, {})
-            self.mac_to_port[dpid][eth.src] = in_port
+            self.mac_to_port[dpid][eth_src] = in_port
             
-            if dpid == 1 and in_port <= 4:
-                ip = pkt.get_protocol(ipv4.ipv4)
-                print(f"[NEW FLOW] {ip.src} -> {ip.dst}")
-                
-                rand_path = random.randint(0, 4)
-                out_port = self.uplink_ports[rand_path]
+            # Flow mới từ host trên switch ingress, tới host ở switch biên khác -> group của cặp.
+            # Rule theo cặp (ProactiveProgrammer) đã đưa traffic khác lên group trong data plane;
+            # packet-in ở đây là flow classifier theo dõi (tracked_ip_protos) hoặc gói đến trước rule
+            dst = self.topology.host_location(ip_dst)
+            pair = (dpid, dst[0]) if dst is not None else None
+            if pair in self.group_balancers and self.topology.is_host_port(dpid, in_port):
+                if ip_proto not in self.proactive.tracked_ip_protos:
+                    self._packet_out(datapath, msg, in_port, [self.group_balancers[pair].action(parser)])
+                    return
+                key = (ip_src, ip_dst, ip_proto, in_port)
+                actions = self.pending_flows.lookup(dpid, key)
+                if actions is not None:
+                    # Gói tiếp theo của flow đang chờ switch cài: chỉ packet-out
+                    self._packet_out(datapath, msg, in_port, actions)
+                    return
+                print(f"[NEW FLOW] {ip_src} -> {ip_dst}")
                 
-                actions = [parser.OFPActionOutput(out_port)]
+                # Đường do group SELECT chọn trong data plane (hash theo flow, trọng số theo tải);
+                # vẫn cài rule riêng cho flow để lấy stats phục vụ phân loại
+                actions = [self.group_balancers[pair].action(parser)]
                 match = parser.OFPMatch(
                     in_port=in_port, eth_type=ether_types.ETH_TYPE_IP,
-                    ipv4_src=ip.src, ipv4_dst=ip.dst, ip_proto=ip.proto)
+                    ipv4_src=ip_src, ipv4_dst=ip_dst, ip_proto=ip_proto)
                 
-                self.add_flow(datapath, 10, match, actions, msg.buffer_id, idle_timeout=5)
+                # SEND_FLOW_REM: flow hết hạn -> xóa nhãn trong verdict cache
+                self.add_flow(datapath, AI_FLOW_PRIORITY, match, actions, msg.buffer_id, idle_timeout=5,
+                              flags=ofproto.OFPFF_SEND_FLOW_REM, cookie=self.cookies.next(path=0))
+                if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+                    self._packet_out(datapath, msg, in_port, actions)
+                barrier = parser.OFPBarrierRequest(datapath)
+                datapath.set_xid(barrier)
+                datapath.send_msg(barrier)
+                self.pending_flows.add(dpid, key, actions, barrier.xid)
                 return
 
-        if eth.dst in self.mac_to_port[dpid]:
-            out_port = self.mac_to_port[dpid][eth.dst]
+        if eth_dst in self.mac_to_port.setdefault(dpid, {}):
+            out_port = self.mac_to_port[dpid][eth_dst]
         else:
             out_port = ofproto.OFPP_FLOOD
         
-        actions = [parser.OFPActionOutput(out_port)]
+        self._packet_out(datapath, msg, in_port, [parser.OFPActionOutput(out_port)])
+
+    def _packet_out(self, datapath, msg, in_port, actions):
+        ofproto = datapath.ofproto
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
         
-        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                  in_port=in_port, actions=actions, data=data)
+        out = datapath.ofproto_parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                                   in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
-    def _get_action_rl(self, state):
-        if random.uniform(0, 1) < self.epsilon: return random.randint(0, 4)
-        return np.argmax(self.q_table[state])
+    def _get_action_rl(self, pair, state):
+        q_table = self.q_tables[pair]
+        if random.uniform(0, 1) < self.epsilon: return random.randrange(q_table.shape[1])
+        return np.argmax(q_table[state])
 
-    def _update_q_table(self, state, action, reward):
-        old = self.q_table[state, action]
-        mx = np.max(self.q_table[state])
-        self.q_table[state, action] = (1 - self.alpha) * old + self.alpha * (reward + self.gamma * mx)
+    def _update_q_table(self, pair, state, action, reward):
+        q_table = self.q_tables.get(pair)
+        if q_table is None or action >= q_table.shape[1]: return   # Topology đã đổi
+        old = q_table[state, action]
+        mx = np.max(q_table[state])
+        q_table[state, action] = (1 - self.alpha) * old + self.alpha * (reward + self.gamma * mx)
 
-    def add_flow(self, datapath, priority, match, actions, buffer_id=None, idle_timeout=0):
+    def add_flow(self, datapath, priority, match, actions, buffer_id=None, idle_timeout=0, flags=0, cookie=0):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
         if buffer_id:
-            mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id, priority=priority, match=match, idle_timeout=idle_timeout, instructions=inst)
+            mod = parser.OFPFlowMod(datapath=datapath, cookie=cookie, buffer_id=buffer_id, priority=priority, match=match, idle_timeout=idle_timeout, flags=flags, instructions=inst)
         else:
-            mod = parser.OFPFlowMod(datapath=datapath, priority=priority, match=match, idle_timeout=idle_timeout, instructions=inst)
+            mod = parser.OFPFlowMod(datapath=datapath, cookie=cookie, priority=priority, match=match, idle_timeout=idle_timeout, flags=flags, instructions=inst)
         datapath.send_msg(mod)
 
-    def mod_flow(self, datapath, match, new_port):
+    def mod_flow(self, datapath, match, new_port, cookie=None):
+        datapath.send_msg(self._reroute_mod(datapath, match, new_port, cookie))
+
+    def _reroute_mod(self, datapath, match, new_port, cookie=None):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         actions = [parser.OFPActionOutput(new_port)]
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_MODIFY, priority=10, match=match, instructions=inst)
-        datapath.send_msg(mod)
+        if cookie is not None:
+            # Chỉ sửa đúng flow (cùng generation) đã đọc stats; flow đã bị cài lại thì switch bỏ qua
+            mod = parser.OFPFlowMod(datapath=datapath, cookie=cookie, cookie_mask=FULL_MASK, command=ofproto.OFPFC_MODIFY_STRICT, priority=AI_FLOW_PRIORITY, match=match, instructions=inst)
+        else:
+            mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_MODIFY, priority=AI_FLOW_PRIORITY, match=match, instructions=inst)
+        return mod
+
+
+class ModelRestController(ControllerBase):
+    """
+    REST quản lý model:
+        GET  /models            trạng thái (version đang chạy, version trước, đang load...)
+        GET  /stats             metrics: executor, cache, polling, reroute/damping, port
+        POST /models/reload     load lại version trong CURRENT, hoặc body {"version": "..."}
+        POST /models/rollback   quay lại bộ model trước đó
+    """
+
+    def __init__(self, req, link, data, **config):
+        super(ModelRestController, self).__init__(req, link, data, **config)
+        self.smart_controller_app = data[smart_controller_instance_name]
+
+    @staticmethod
+    def _json(body, status=200):
+        return Response(status=status, content_type='application/json', body=json.dumps(body))
+
+    @route('models', '/models', methods=['GET'])
+    def status(self, req, **kwargs):
+        return self._json(self.smart_controller_app.model_status())
+
+    @route('stats', '/stats', methods=['GET'])
+    def stats(self, req, **kwargs):
+        return self._json(self.smart_controller_app.controller_stats())
+
+    @route('models', '/models/reload', methods=['POST'])
+    def reload(self, req, **kwargs):
+        app = self.smart_controller_app
+        try:
+            version = (req.json if req.body else {}).get('version')
+        except ValueError:
+            return self._json({'error': 'invalid json'}, status=400)
+        if version is not None and not app.registry.has_version(version):
+            return self._json({'error': f"unknown version '{version}'"}, status=404)
+        version = version or app.registry.current_version()
+        if app.loading_version is not None:
+            return self._json({'error': f"already loading '{app.loading_version}'"}, status=409)
+        # Load + canary chạy trên thread OS của executor -> request trả về 202 ngay, hub không bị chặn.
+        # CURRENT chỉ được ghi khi swap thành công (_on_models_ready); trong lúc load watcher bỏ qua
+        app.load_models(version, set_current=True)
+        return self._json({'loading': version}, status=202)
+
+    @route('models', '/models/rollback', methods=['POST'])
+    def rollback(self, req, **kwargs):
+        app = self.smart_controller_app
+        if not app.rollback_models():
+            return self._json({'error': 'no previous models'}, status=409)
+        return self._json(app.model_status())
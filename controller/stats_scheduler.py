@@ -0,0 +1,98 @@
+import time
+import random
+
+from ryu.lib import hub
+
+
+class _Subscription(object):
+    __slots__ = ('dpid', 'stat_type', 'consumers', 'interval', 'base_interval',
+                 'min_interval', 'max_interval', 'next_due', 'sent')
+
+    def __init__(self, dpid, stat_type, interval, min_interval, max_interval):
+        self.dpid = dpid
+        self.stat_type = stat_type
+        self.consumers = set()
+        self.interval = interval
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Lệch pha ngẫu nhiên: các request rải đều trong chu kỳ thay vì gửi cùng lúc
+        self.next_due = time.monotonic() + random.uniform(0, interval)
+        self.sent = 0
+
+
+class StatsScheduler(object):
+    """
+    Lịch lấy stats theo từng (datapath, loại stats):
+    - Chỉ poll cặp có consumer đăng ký (switch trung chuyển không ai dùng -> không poll).
+    - Chu kỳ riêng mỗi cặp, trong [min_interval, max_interval]: speed_up() khi tải tăng/burst,
+      slow_down() khi mạng rảnh, relax() đưa dần về chu kỳ gốc.
+    - senders: {stat_type: hàm(datapath)} gửi request; get_datapath(dpid) -> datapath hoặc None.
+    """
+
+    def __init__(self, senders, get_datapath, tick=0.05):
+        self.senders = senders
+        self.get_datapath = get_datapath
+        self.tick = tick
+        self.subs = {}      # (dpid, stat_type) -> _Subscription
+        self.thread = hub.spawn(self._run)
+
+    def subscribe(self, dpid, stat_type, consumer, interval, min_interval=None, max_interval=None):
+        key = (dpid, stat_type)
+        sub = self.subs.get(key)
+        if sub is None:
+            sub = self.subs[key] = _Subscription(dpid, stat_type, interval,
+                                                 interval if min_interval is None else min_interval,
+                                                 interval if max_interval is None else max_interval)
+        sub.consumers.add(consumer)
+
+    def unsubscribe(self, dpid, stat_type, consumer):
+        sub = self.subs.get((dpid, stat_type))
+        if sub is None: return
+        sub.consumers.discard(consumer)
+        if not sub.consumers: del self.subs[(dpid, stat_type)]
+
+    def _set_interval(self, dpid, stat_type, interval):
+        sub = self.subs.get((dpid, stat_type))
+        if sub is None: return
+        sub.interval = min(max(interval, sub.min_interval), sub.max_interval)
+        # Chu kỳ ngắn lại -> áp dụng ngay, không chờ hết chu kỳ cũ
+        sub.next_due = min(sub.next_due, time.monotonic() + sub.interval)
+
+    def speed_up(self, dpid, stat_type, factor=0.5):
+        sub = self.subs.get((dpid, stat_type))
+        if sub is not None: self._set_interval(dpid, stat_type, sub.interval * factor)
+
+    def slow_down(self, dpid, stat_type, factor=1.5):
+        sub = self.subs.get((dpid, stat_type))
+        if sub is not None: self._set_interval(dpid, stat_type, sub.interval * factor)
+
+    def relax(self, dpid, stat_type, factor=1.25):
+        """Đưa chu kỳ về dần chu kỳ gốc (từ cả 2 phía)"""
+        sub = self.subs.get((dpid, stat_type))
+        if sub is None or sub.interval == sub.base_interval: return
+        if sub.interval < sub.base_interval:
+            self._set_interval(dpid, stat_type, min(sub.interval * factor, sub.base_interval))
+        else:
+            self._set_interval(dpid, stat_type, max(sub.interval / factor, sub.base_interval))
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            next_wake = now + 1.0
+            for sub in list(self.subs.values()):
+                if now >= sub.next_due:
+                    datapath = self.get_datapath(sub.dpid)
+                    if datapath is not None:
+                        self.senders[sub.stat_type](datapath)
+                        sub.sent += 1
+                    # Giữ pha; bị trễ quá 1 chu kỳ thì tính lại từ bây giờ
+                    sub.next_due += sub.interval
+                    if sub.next_due < now: sub.next_due = now + sub.interval
+                next_wake = min(next_wake, sub.next_due)
+            hub.sleep(max(next_wake - time.monotonic(), self.tick))
+
+    def status(self):
+        return {f"{dpid}/{stat_type}": {'interval': round(sub.interval, 3), 'sent': sub.sent,
+                                        'consumers': sorted(sub.consumers)}
+                for (dpid, stat_type), sub in self.subs.items()}
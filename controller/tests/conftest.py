@@ -0,0 +1,43 @@
+"""
+Test cho các module của controller (module phẳng, import thẳng như smart_controller_v2 làm).
+Cần ryu của myenv trên PYTHONPATH.
+Chạy: python -m pytest controller/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """Registry có v1 (đầy đủ) và v2 (hỏng, thiếu forecaster), CURRENT = v1"""
+    from fakes import write_version
+    write_version(str(tmp_path), 'v1')
+    write_version(str(tmp_path), 'v2', forecaster=False)
+    (tmp_path / 'registry' / 'CURRENT').write_text('v1\n')
+    return str(tmp_path)
+
+
+@pytest.fixture
+def make_app(model_dir, monkeypatch):
+    """Tạo SmartController trên registry tạm; dọn thread của app sau test"""
+    import smart_controller_v2
+    from fakes import FakeWSGI, wait_for
+    from ryu.lib import hub
+    monkeypatch.setattr(smart_controller_v2, 'MODEL_DIR', model_dir)
+    apps = []
+
+    def make(wait=True):
+        app = smart_controller_v2.SmartController(wsgi=FakeWSGI())
+        apps.append(app)
+        if wait: assert wait_for(lambda: app.loading_version is None)
+        return app
+
+    yield make
+    for app in apps:
+        for thread in (app.monitor_thread, app.model_watch_thread, app.stats_scheduler.thread):
+            hub.kill(thread)
+        app.executor.shutdown()
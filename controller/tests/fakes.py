@@ -0,0 +1,94 @@
+"""Switch giả và bộ model nhỏ (không cần sklearn/TF) dùng chung cho các test"""
+import os
+import time
+
+import numpy as np
+from ryu.lib import hub
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+
+from numpy_lstm import NumpyLSTM
+from tree_compiler import CompiledForest
+
+
+class FakeDatapath(object):
+    """Ghi lại mọi message controller gửi (đã serialize như khi gửi thật)"""
+    ofproto = ofproto_v1_3
+    ofproto_parser = ofproto_v1_3_parser
+
+    def __init__(self, dpid, xid=100):
+        self.id = dpid
+        self.xid = xid
+        self.sent = []
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msg(self, msg):
+        if msg.xid is None: self.set_xid(msg)
+        msg.serialize()
+        self.sent.append(msg)
+
+    def sent_of(self, cls):
+        return [msg for msg in self.sent if isinstance(msg, cls)]
+
+
+class FakeWSGI(object):
+    def register(self, controller, data):
+        self.controller, self.data = controller, data
+
+
+def simple_forest():
+    """
+    Cây quyết định viết tay trên đặc trưng thô (như build_feature_matrix), đủ 4 lớp của CLASS_MAP:
+    TCP -> web (3); UDP gói nhỏ -> voip (2); UDP tốc độ cao -> video (1); còn lại -> background (0)
+    """
+    #          0: ip_proto <= 10   1: web   2: avg_size <= 300   3: voip   4: byte_rate <= 100000
+    #          5: background       6: video
+    feature = [0, 0, 6, 0, 4, 0, 0]
+    threshold = [10.0, 0.0, 300.0, 0.0, 100000.0, 0.0, 0.0]
+    left = [1, 1, 3, 3, 5, 5, 6]
+    right = [2, 1, 4, 3, 6, 5, 6]
+    value = np.zeros((7, 4))
+    for node, label in ((1, 3), (3, 2), (5, 0), (6, 1)):
+        value[node, label] = 1.0
+    return CompiledForest(feature, threshold, left, right, value, [0], [0, 1, 2, 3], 3)
+
+
+def random_lstm(seq_length=10, units=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return NumpyLSTM(rng.normal(0, 0.5, (1, 4 * units)), rng.normal(0, 0.5, (units, 4 * units)),
+                     rng.normal(0, 0.1, 4 * units), rng.normal(0, 0.5, (units, 1)), rng.normal(0, 0.1, 1),
+                     seq_length)
+
+
+def save_lstm(model, path, scaler_min=0.0, scaler_scale=1e-7):
+    np.savez_compressed(path, kernel=model.kernel, recurrent_kernel=model.recurrent_kernel, bias=model.bias,
+                        dense_kernel=model.dense_kernel, dense_bias=model.dense_bias,
+                        seq_length=np.int32(model.seq_length),
+                        scaler_min=np.array([scaler_min]), scaler_scale=np.array([scaler_scale]))
+
+
+def write_version(root, version, forecaster=True, seq_length=10):
+    """Ghi 1 version vào <root>/registry/<version>; forecaster=False -> version hỏng (thiếu forecaster)"""
+    base = os.path.join(root, 'registry', version)
+    cls_path = os.path.join(base, 'classification')
+    pred_path = os.path.join(base, 'traffic_predict')
+    os.makedirs(cls_path)
+    os.makedirs(pred_path)
+    simple_forest().save(os.path.join(cls_path, 'best_classifier_compiled.npz'))
+    if forecaster:
+        with open(os.path.join(pred_path, 'model_config.txt'), 'w') as f:
+            f.write(str(seq_length))
+        save_lstm(random_lstm(seq_length), os.path.join(pred_path, 'best_prediction_model.npz'))
+    return base
+
+
+def wait_for(cond, timeout=5.0):
+    """Nhường hub (callback của executor chạy trên hub) cho tới khi cond() đúng"""
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline: return False
+        hub.sleep(0.01)
+    return True
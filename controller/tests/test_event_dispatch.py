@@ -0,0 +1,67 @@
+"""Bảng dispatch (ev_cls, state) đã cache của RyuApp phải thấy handler/observer đăng ký sau event đầu tiên"""
+from ryu.base import app_manager
+from ryu.controller import handler, ofp_event, ofp_handler
+from ryu.controller.handler import MAIN_DISPATCHER, CONFIG_DISPATCHER, set_ev_cls
+from smart_controller_v2 import SmartController
+
+
+class LateApp(app_manager.RyuApp):
+    @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+    def packet_in_handler(self, ev):
+        pass
+
+
+def make_brick():
+    brick = ofp_handler.OFPHandler()
+    handler.register_instance(brick)
+    return brick
+
+
+def test_handler_registered_after_first_dispatch_is_seen():
+    app = SmartController.__new__(SmartController)
+    app_manager.RyuApp.__init__(app)
+    ev = ofp_event.EventOFPPacketIn(None)
+    assert app.get_handlers(ev, MAIN_DISPATCHER) == ()      # event đầu tiên: điền cache
+
+    handler.register_instance(app)
+    handlers = app.get_handlers(ev, MAIN_DISPATCHER)
+    assert [h.__name__ for h in handlers] == ['_packet_in_handler']
+    assert app.get_handlers(ev, CONFIG_DISPATCHER) == ()
+
+    def late(ev):
+        pass
+    app.register_handler(ofp_event.EventOFPPacketIn, late)
+    assert app.get_handlers(ev, MAIN_DISPATCHER)[-1] is late
+    app.unregister_handler(ofp_event.EventOFPPacketIn, late)
+    assert late not in app.get_handlers(ev, MAIN_DISPATCHER)
+
+
+def test_observer_registered_after_first_dispatch_is_seen():
+    brick = make_brick()
+    ev = ofp_event.EventOFPPacketIn(None)
+    assert brick.get_observers(ev, MAIN_DISPATCHER) == ()
+
+    late = LateApp()
+    brick.register_observer(ofp_event.EventOFPPacketIn, late.name, {MAIN_DISPATCHER})
+    assert brick.get_observers(ev, MAIN_DISPATCHER) == (late.name,)
+    assert brick.get_observers(ev, CONFIG_DISPATCHER) == ()
+
+    # Thêm state cho observer đã có cũng phải làm mới cache
+    brick.register_observer(ofp_event.EventOFPPacketIn, late.name, {CONFIG_DISPATCHER})
+    assert brick.get_observers(ev, CONFIG_DISPATCHER) == (late.name,)
+
+    brick.unregister_observer_all_event(late.name)
+    assert brick.get_observers(ev, MAIN_DISPATCHER) == ()
+
+
+def test_brick_handlers_follow_register_and_unregister():
+    brick = make_brick()
+    ev = ofp_event.EventOFPEchoRequest(None)
+    before = brick.get_handlers(ev, MAIN_DISPATCHER)
+
+    def late(ev):
+        pass
+    brick.register_handler(ofp_event.EventOFPEchoRequest, late)
+    assert brick.get_handlers(ev, MAIN_DISPATCHER) == before + (late,)
+    brick.unregister_handler(ofp_event.EventOFPEchoRequest, late)
+    assert brick.get_handlers(ev, MAIN_DISPATCHER) == before
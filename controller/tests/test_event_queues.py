@@ -0,0 +1,51 @@
+"""user-025: hàng đợi event theo lớp ưu tiên của RyuApp (ryu/base/app_manager.py)"""
+import pytest
+from ryu.base import app_manager
+from ryu.controller import event, ofp_event
+
+from smart_controller_v2 import SmartController
+
+HIGH, NORMAL, BULK = event.EVENT_PRIORITY_HIGH, event.EVENT_PRIORITY_NORMAL, event.EVENT_PRIORITY_BULK
+
+
+def make_app(queues):
+    cls = type('QueueApp', (app_manager.RyuApp,), {'EVENT_QUEUES': queues})
+    return cls()
+
+
+def test_class_without_queue_goes_to_normal():
+    app = make_app([(NORMAL, 4, 1)])
+    app._send_event(ofp_event.EventOFPPacketIn(None), None)             # lớp high, không có hàng đợi
+    app._send_event(ofp_event.EventOFPFlowStatsReply(None), None)       # lớp bulk
+    assert app.event_queue_stats()[NORMAL]['queued'] == 2
+
+
+def test_without_normal_queue_falls_back_to_last():
+    app = make_app([(HIGH, 4, 1), (BULK, 4, 1)])
+    app._send_event(event.EventBase(), None)
+    assert app.event_queue_stats()[BULK]['queued'] == 1
+
+
+@pytest.mark.parametrize('queues', [[], [(NORMAL, 4, 1), (NORMAL, 8, 1)], [(NORMAL, 0, 1)], [(NORMAL, 4, 0)]])
+def test_invalid_event_queues_rejected(queues):
+    with pytest.raises(ValueError):
+        make_app(queues)
+
+
+def test_weighted_round_robin_keeps_order_within_class():
+    queues = app_manager._EventQueues([(HIGH, 8, 2), (BULK, 8, 1)])
+    for i in range(3):
+        queues.put(BULK, ('bulk', i))
+        queues.put(HIGH, ('high', i))
+    order = [queues.get() for _ in range(6)]
+    assert order == [('high', 0), ('high', 1), ('bulk', 0), ('high', 2), ('bulk', 1), ('bulk', 2)]
+    assert queues.empty()
+
+
+def test_transaction_replies_share_the_error_class():
+    # Lỗi của FlowMod/bundle add tới trước barrier/commit reply -> phải cùng lớp để giữ thứ tự
+    error = ofp_event.EventOFPErrorMsg.PRIORITY
+    for ev_cls in (ofp_event.EventOFPBarrierReply, ofp_event.EventONFBundleCtrlMsg):
+        assert ev_cls.PRIORITY == error
+        assert SmartController.EVENT_PRIORITIES.get(ev_cls, ev_cls.PRIORITY) == error
+    assert ofp_event.EventOFPFlowStatsReply.PRIORITY == BULK
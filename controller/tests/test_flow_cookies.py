@@ -0,0 +1,22 @@
+from flow_cookies import (APP_MASK, APP_TAG, PROACTIVE_MASK, UNCLASSIFIED, CookieAllocator,
+                          is_ai_cookie, make_cookie, make_proactive_cookie, parse_cookie)
+
+
+def test_cookie_round_trip():
+    cookie = make_cookie(2, 7, 0x12345678)
+    assert cookie & APP_MASK == APP_TAG << 48
+    assert parse_cookie(cookie) == (2, 7, 0x12345678)
+
+
+def test_proactive_cookie_is_not_ai_and_masks_version():
+    cookie = make_proactive_cookie(3)
+    assert not is_ai_cookie(cookie) and parse_cookie(cookie) is None
+    assert cookie & PROACTIVE_MASK == make_proactive_cookie(3)
+    assert make_proactive_cookie(3) != make_proactive_cookie(4)
+
+
+def test_allocator_wraps_generation():
+    alloc = CookieAllocator()
+    alloc.generation = 0xFFFFFFFF
+    assert parse_cookie(alloc.next()) == (UNCLASSIFIED, 0, 0)
+    assert parse_cookie(alloc.next(1, 5)) == (1, 5, 1)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from flow_state import FlowStateStore
+
+
+def test_rates_from_counter_deltas():
+    store = FlowStateStore(capacity=2)
+    slots, byte_rate, _ = store.update(['a', 'b'], [100, 0], [1, 0], [10.0, 10.0])
+    assert byte_rate.tolist() == [0.0, 0.0]     # lần đầu: chưa có mốc
+    _, byte_rate, packet_rate = store.update(['a', 'b'], [300, 50], [3, 1], [12.0, 10.0])
+    assert byte_rate.tolist() == [100.0, 0.0]   # b: timestamp không đổi -> 0
+    assert packet_rate.tolist() == [1.0, 0.0]
+
+
+def test_grow_and_reuse_released_slots():
+    store = FlowStateStore(capacity=1)
+    a, b = store.slot_of('a'), store.slot_of('b')
+    assert store.capacity == 2 and (a, b) == (0, 1)
+    store.release('a')
+    assert store.slot_of('c') == a and 'a' not in store
+
+
+def test_history_padding_and_repeat():
+    store = FlowStateStore(capacity=1, history_len=4)
+    slots = store.slots_of(['p'])
+    values, counts = store.get_history(slots)
+    assert values.tolist() == [[0.0] * 4] and counts.tolist() == [0]
+
+    store.push_history(slots, np.array([1.0]))
+    store.push_history(slots, np.array([2.0]), repeat=2)
+    values, counts = store.get_history(slots)
+    assert values.tolist() == [[2.0, 1.0, 2.0, 2.0]]    # chưa đủ -> đệm bằng giá trị mới nhất
+    assert counts.tolist() == [3]
+
+    store.push_history(slots, np.array([5.0]), repeat=10)   # tối đa history_len lần
+    assert store.get_history(slots)[0].tolist() == [[5.0] * 4]
+
+
+def test_resize_history_keeps_latest():
+    store = FlowStateStore(capacity=1, history_len=4)
+    slots = store.slots_of(['p'])
+    for v in range(1, 5):
+        store.push_history(slots, np.array([float(v)]))
+    store.resize_history(2)
+    values, counts = store.get_history(slots)
+    assert values.tolist() == [[3.0, 4.0]] and counts.tolist() == [2]
+
+
+def test_expire_idle_flows():
+    store = FlowStateStore()
+    store.update(['old', 'new'], [1, 1], [1, 1], [0.0, 0.0], now=0.0)
+    store.update(['new'], [2], [2], [5.0], now=5.0)
+    assert store.expire(now=6.0, max_idle=3.0) == 1
+    assert 'old' not in store and 'new' in store
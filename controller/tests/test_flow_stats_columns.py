@@ -0,0 +1,168 @@
+"""Decoder dạng cột của ryu (ofproto_v1_3_columns) so với parser đầy đủ, và opt-in theo handler"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from ryu.base import app_manager
+from ryu.controller import controller, handler, ofp_event, ofp_handler
+from ryu.controller.handler import MAIN_DISPATCHER, set_ev_cls
+from ryu.lib.pack_utils import msg_pack_into
+from ryu.ofproto import ofproto_parser, ofproto_protocol
+from ryu.ofproto import ofproto_v1_3 as ofproto, ofproto_v1_3_parser as parser
+from ryu.ofproto.ofproto_v1_3_columns import FlowStatsColumns, columnar_flow_stats
+
+from flow_features import build_feature_matrix, build_feature_matrix_columns
+
+EV = ofp_event.EventOFPFlowStatsReply
+
+
+def entry(match, instructions, priority=10, cookie=0, duration=5, packets=7, byte_count=7000):
+    match_buf, inst_buf, buf = bytearray(), bytearray(), bytearray()
+    match.serialize(match_buf, 0)
+    for inst in instructions:
+        inst.serialize(inst_buf, len(inst_buf))
+    length = ofproto.OFP_FLOW_STATS_0_SIZE + len(match_buf) + len(inst_buf)
+    msg_pack_into(ofproto.OFP_FLOW_STATS_0_PACK_STR, buf, 0, length, 0, duration, 123, priority, 5, 0, 0,
+                  cookie, packets, byte_count)
+    return bytes(buf + match_buf + inst_buf)
+
+
+def reply(entries, flags=0, xid=9):
+    body = b''.join(entries)
+    msg_len = ofproto.OFP_MULTIPART_REPLY_SIZE + len(body)
+    buf = bytearray()
+    msg_pack_into(ofproto.OFP_HEADER_PACK_STR, buf, 0, ofproto.OFP_VERSION, ofproto.OFPT_MULTIPART_REPLY,
+                  msg_len, xid)
+    msg_pack_into(ofproto.OFP_MULTIPART_REPLY_PACK_STR, buf, ofproto.OFP_HEADER_SIZE, ofproto.OFPMP_FLOW, flags)
+    return bytes(buf) + body, msg_len
+
+
+def apply(*actions):
+    return parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, list(actions))
+
+
+def sample_entries():
+    out = parser.OFPActionOutput
+    return [
+        entry(parser.OFPMatch(in_port=1, eth_type=0x800, ip_proto=6, ipv4_src='10.0.0.1', ipv4_dst='10.0.0.11',
+                              tcp_src=40000, tcp_dst=5001), [apply(out(5))], cookie=0x5C01FF0000000001),
+        entry(parser.OFPMatch(in_port=2, eth_type=0x800, ip_proto=17, ipv4_src='10.0.0.2',
+                              ipv4_dst=('10.0.0.0', '255.255.255.0'), udp_dst=5004),
+              [apply(parser.OFPActionGroup(1))], byte_count=1 << 40),
+        entry(parser.OFPMatch(in_port=3, eth_type=0x800, ipv4_src='10.0.0.3', ipv4_dst='10.0.0.13'),
+              [parser.OFPInstructionGotoTable(1),
+               parser.OFPInstructionActions(ofproto.OFPIT_WRITE_ACTIONS, [parser.OFPActionGroup(2), out(7)])]),
+        entry(parser.OFPMatch(), [], priority=0, duration=0),
+        entry(parser.OFPMatch(eth_type=0x806), [apply(out(ofproto.OFPP_CONTROLLER), out(2))], priority=5),
+    ]
+
+
+def first_output(stat):
+    for inst in stat.instructions:
+        if inst.type in (ofproto.OFPIT_APPLY_ACTIONS, ofproto.OFPIT_WRITE_ACTIONS):
+            for action in inst.actions:
+                if isinstance(action, parser.OFPActionOutput): return action.port
+    return 0
+
+
+class FakeDatapath(object):
+    def __init__(self, decoder=None):
+        self.ofproto, self.ofproto_parser, self.id = ofproto, parser, 1
+        self.decoder = decoder
+
+    def columnar_decoder(self, msg_cls):
+        return self.decoder
+
+
+def parse(buf, msg_len, decoder=None):
+    return ofproto_parser.msg(FakeDatapath(decoder), ofproto.OFP_VERSION, ofproto.OFPT_MULTIPART_REPLY,
+                              msg_len, 9, buf)
+
+
+def test_columns_match_full_parser():
+    buf, msg_len = reply(sample_entries())
+    body = parse(buf, msg_len).body
+    cols = parse(buf, msg_len, FlowStatsColumns).columns
+    assert len(cols) == len(body)
+    for i, stat in enumerate(body):
+        for name in ('table_id', 'priority', 'cookie', 'duration_sec', 'duration_nsec', 'packet_count',
+                     'byte_count'):
+            assert getattr(cols, name)[i] == getattr(stat, name), name
+        assert cols.out_port[i] == first_output(stat)
+        expected = dict(stat.match.items())
+        for key in ('ipv4_src', 'ipv4_dst'):
+            if isinstance(expected.get(key), tuple): expected[key] = expected[key][0]    # chỉ giữ value
+        assert dict(cols.match(i).items()) == expected
+
+
+def test_feature_matrix_matches():
+    buf, msg_len = reply(sample_entries())
+    _, expected = build_feature_matrix(parse(buf, msg_len).body)
+    flows, features = build_feature_matrix_columns(parse(buf, msg_len, FlowStatsColumns).columns)
+    assert len(flows) == 3
+    np.testing.assert_array_equal(features, expected)
+
+
+def test_lazy_body_and_concat():
+    buf, msg_len = reply(sample_entries())
+    msg = parse(buf, msg_len, FlowStatsColumns)
+    assert msg._body is None
+    assert [s.priority for s in msg.body] == [10, 10, 10, 0, 5]
+    parts = [parse(*reply(sample_entries()[:2]), FlowStatsColumns).columns,
+             parse(*reply(sample_entries()[2:]), FlowStatsColumns).columns]
+    joined = FlowStatsColumns.concat(parts)
+    np.testing.assert_array_equal(joined.cookie, msg.columns.cookie)
+    assert len(parse(*reply([]), FlowStatsColumns).columns) == 0
+
+
+class OptInApp(app_manager.RyuApp):
+    @set_ev_cls(EV, MAIN_DISPATCHER)
+    @columnar_flow_stats
+    def flow_stats_reply_handler(self, ev):
+        self.columns = ev.msg.columns
+
+
+class PlainApp(app_manager.RyuApp):
+    @set_ev_cls(EV, MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        self.body = ev.msg.body
+
+
+@pytest.fixture
+def datapath(monkeypatch):
+    brick = ofp_handler.OFPHandler()
+    handler.register_instance(brick)
+    dp = controller.Datapath.__new__(controller.Datapath)
+    ofproto_protocol.ProtocolDesc.__init__(dp, ofproto.OFP_VERSION)
+    dp.ofp_brick, dp.id = brick, 1
+
+    def observe(app):
+        handler.register_instance(app)
+        monkeypatch.setitem(app_manager.SERVICE_BRICKS, app.name, app)
+        brick.register_observer(EV, app.name, {MAIN_DISPATCHER})
+        return app
+    dp.observe = observe
+    return dp
+
+
+def test_columnar_only_when_every_handler_opted_in(datapath):
+    # user-021: opt-in theo handler, không đổi parser cho cả process
+    buf, msg_len = reply(sample_entries())
+    assert datapath.columnar_decoder(parser.OFPFlowStatsReply) is None
+
+    opt_in = datapath.observe(OptInApp())
+    assert datapath.columnar_decoder(parser.OFPFlowStatsReply) is FlowStatsColumns
+    assert datapath.columnar_decoder(parser.OFPPortStatsReply) is None
+    msg = ofproto_parser.msg(datapath, ofproto.OFP_VERSION, ofproto.OFPT_MULTIPART_REPLY, msg_len, 9, buf)
+    assert msg.columns is not None and msg._body is None
+
+    plain = datapath.observe(PlainApp())
+    assert datapath.columnar_decoder(parser.OFPFlowStatsReply) is None
+    msg = ofproto_parser.msg(datapath, ofproto.OFP_VERSION, ofproto.OFPT_MULTIPART_REPLY, msg_len, 9, buf)
+    assert msg.columns is None and len(msg._body) == 5
+    ev = SimpleNamespace(msg=msg)
+    plain.flow_stats_reply_handler(ev)
+    opt_in.flow_stats_reply_handler(ev)         # decorator tự decode cột từ msg.buf
+    assert len(plain.body) == 5 and len(opt_in.columns) == 5
+    # Parser của process không bị đổi: datapath không có columnar_decoder -> parse đầy đủ
+    assert parse(buf, msg_len).columns is None
@@ -0,0 +1,59 @@
+"""user-003 / user-006: job inference và load model chạy trên thread OS thật, kể cả khi thread bị patch"""
+import os
+import subprocess
+import sys
+
+from eventlet import patcher
+
+from fakes import wait_for
+from inference_executor import InferenceExecutor
+
+HUB_CHECK = r'''
+from ryu.lib import hub
+hub.patch(thread=True)      # như ryu-manager: threading/queue thành green thread
+import time
+from eventlet import patcher
+from inference_executor import InferenceExecutor
+
+blocking_sleep = patcher.original('time').sleep   # giữ thread (và GIL-free như numpy) 0.5s
+executor = InferenceExecutor(max_workers=1, max_age=10)
+ticks, done = [], []
+def ticker():
+    while not done:
+        ticks.append(time.monotonic())
+        hub.sleep(0.001)
+hub.spawn(ticker)
+hub.sleep(0.01)
+executor.submit('job', blocking_sleep, (0.5,), callback=done.append)
+while not done:
+    hub.sleep(0.01)
+print(max(b - a for a, b in zip(ticks, ticks[1:])))
+'''
+
+
+def test_job_does_not_block_hub_under_thread_patch():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, '-c', HUB_CHECK], env=env, capture_output=True, text=True, check=True)
+    assert float(out.stdout.strip().splitlines()[-1]) < 0.2    # green worker: ~0.5s
+
+
+def test_latest_request_per_key_wins():
+    executor = InferenceExecutor(max_workers=1, max_age=10)
+    results = []
+    try:
+        executor.submit('block', patcher.original('time').sleep, (0.2,))     # giữ worker bận
+        executor.submit('k', lambda x: x, (1,), callback=results.append)
+        executor.submit('k', lambda x: x, (2,), callback=results.append)
+        assert wait_for(lambda: executor.stats()['queue_depth'] == 0 and results)
+        assert results == [2] and executor.stats()['merged'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_errors_are_counted_not_raised():
+    executor = InferenceExecutor(max_workers=1)
+    try:
+        executor.submit('bad', lambda: 1 / 0)
+        assert wait_for(lambda: executor.stats()['errors'] == 1)
+    finally:
+        executor.shutdown()
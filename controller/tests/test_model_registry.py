@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from fakes import simple_forest, write_version
+from model_loader import load_bundle
+from model_registry import DEFAULT_CANARY, LEGACY_VERSION, ModelRegistry, canary_check
+
+CLASSES = [0, 1, 2, 3]
+
+
+def test_versions_and_current(model_dir):
+    registry = ModelRegistry(model_dir)
+    assert registry.versions() == ['v1', 'v2']
+    assert registry.current_version() == 'v1'
+    assert registry.has_version(LEGACY_VERSION) and not registry.has_version('v3')
+
+    registry.set_current('v2')
+    assert registry.current_version() == 'v2'
+    assert not os.path.exists(registry.current_file + '.tmp')
+
+    with open(registry.current_file, 'w') as f:
+        f.write('gone\n')                           # version không còn -> mới nhất
+    assert registry.current_version() == 'v2'
+
+
+def test_without_registry_uses_legacy_dirs(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.current_version() == LEGACY_VERSION
+    registry.set_current(LEGACY_VERSION)            # không tạo registry/
+    assert not os.path.exists(registry.root)
+    assert registry.paths(LEGACY_VERSION) == (str(tmp_path / 'classification'), str(tmp_path / 'traffic_predict'))
+
+
+def test_canary_accepts_good_bundle(model_dir):
+    bundle = load_bundle(*ModelRegistry(model_dir).paths('v1'), version='v1')
+    labels = canary_check(bundle, None, CLASSES)
+    assert labels.tolist() == [1, 2, 3, 0]          # video, voip, web, background của DEFAULT_CANARY
+    assert len(canary_check(bundle, DEFAULT_CANARY[:2], CLASSES)) == 2
+
+
+def test_canary_rejects_unknown_classes_and_bad_forecast(model_dir):
+    bundle = load_bundle(*ModelRegistry(model_dir).paths('v1'), version='v1')
+    with pytest.raises(ValueError, match='unknown classes'):
+        canary_check(bundle, None, [0, 1])
+    bundle.forecast = lambda history, has_data: np.full(len(history), np.nan)
+    with pytest.raises(ValueError, match='non-finite'):
+        canary_check(bundle, None, CLASSES)
+
+
+def test_broken_version_fails_to_load(model_dir):
+    with pytest.raises(Exception):
+        load_bundle(*ModelRegistry(model_dir).paths('v2'), version='v2')
+
+
+def test_compiled_bundle_needs_no_pandas_or_joblib(model_dir):
+    # user-005: pandas/joblib chỉ được import trong nhánh fallback sklearn/ARIMA
+    code = ("import sys, numpy as np\n"
+            "from model_loader import load_bundle\n"
+            "from model_registry import ModelRegistry\n"
+            f"bundle = load_bundle(*ModelRegistry({model_dir!r}).paths('v1'))\n"
+            "bundle.classify(np.ones((3, 7)))\n"
+            "print(sorted(m for m in ('pandas', 'joblib', 'sklearn', 'tensorflow') if m in sys.modules))\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
+
+
+def test_seq_length_from_config(tmp_path):
+    base = write_version(str(tmp_path), 'v1', seq_length=6)
+    bundle = load_bundle(os.path.join(base, 'classification'), os.path.join(base, 'traffic_predict'))
+    assert bundle.seq_length == 6
+    preds = bundle.forecast(np.ones((2, 6)), np.array([True, False]))
+    assert preds[1] == 0.0 and np.isfinite(preds[0])
+    assert simple_forest().predict(DEFAULT_CANARY).tolist() == [1, 2, 3, 0]
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+from multipart import OFPMPF_REPLY_MORE, MultipartAggregator
+
+
+def reply(dpid, xid, body, more=False):
+    return SimpleNamespace(datapath=SimpleNamespace(id=dpid), xid=xid, body=body,
+                           flags=OFPMPF_REPLY_MORE if more else 0)
+
+
+def test_single_part_passes_through():
+    agg = MultipartAggregator()
+    body = [1, 2]
+    result, parts = agg.add(reply(1, 5, body))
+    assert result is body and parts == 1
+
+
+def test_parts_joined_per_datapath_and_xid():
+    agg = MultipartAggregator()
+    assert agg.add(reply(1, 5, [1], more=True)) is None
+    assert agg.add(reply(2, 5, [9], more=True)) is None     # cùng xid, switch khác
+    assert agg.add(reply(1, 5, [2])) == ([1, 2], 2)
+    assert agg.add(reply(2, 5, [10])) == ([9, 10], 2)
+    assert agg.stats()['max_parts'] == 2 and agg.stats()['pending'] == 0
+
+
+def test_timeout_and_drop_datapath():
+    agg = MultipartAggregator(timeout=0.0)
+    agg.add(reply(1, 5, [1], more=True))
+    agg.expire(now=float('inf'))
+    assert agg.stats()['timed_out'] == 1
+
+    agg = MultipartAggregator()
+    agg.add(reply(1, 5, [1], more=True))
+    agg.drop_datapath(1)
+    assert agg.add(reply(1, 5, [2])) == ([2], 1)
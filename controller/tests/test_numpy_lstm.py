@@ -0,0 +1,45 @@
+import numpy as np
+
+from fakes import random_lstm, save_lstm
+from numpy_lstm import MinMaxScalerParams, NumpyLSTM
+
+
+def reference_lstm(model, x):
+    """LSTM Keras từng bước, float64, 1 mẫu (gate: input, forget, cell, output)"""
+    u = model.units
+    W, U, b = (np.asarray(a, dtype=np.float64) for a in (model.kernel, model.recurrent_kernel, model.bias))
+    h, c = np.zeros(u), np.zeros(u)
+    for x_t in x:
+        z = np.atleast_1d(x_t) @ W + h @ U + b
+        i, f, o = (1 / (1 + np.exp(-z[k * u:(k + 1) * u])) for k in (0, 1, 3))
+        g = np.tanh(z[2 * u:3 * u])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+    return h @ model.dense_kernel.astype(np.float64) + model.dense_bias
+
+
+def test_matches_reference_lstm():
+    model = random_lstm(seq_length=10, units=16, seed=3)
+    X = np.random.default_rng(0).random((32, 10, 1))
+    expected = np.array([reference_lstm(model, x[:, 0]) for x in X])
+    np.testing.assert_allclose(model.predict(X), expected, atol=1e-5)
+    # Gọi như model Keras, input 2 chiều (batch, seq_length) cũng được
+    np.testing.assert_allclose(model(X[:, :, 0], training=False), expected, atol=1e-5)
+
+
+def test_load_with_scaler(tmp_path):
+    path = str(tmp_path / 'lstm.npz')
+    model = random_lstm()
+    save_lstm(model, path, scaler_min=-0.5, scaler_scale=0.25)
+    loaded = NumpyLSTM.load(path)
+    assert loaded.seq_length == 10 and loaded.units == model.units
+    X = np.random.default_rng(1).random((4, 10, 1))
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    scaler = loaded.scaler
+    assert scaler.transform([[2.0]]).tolist() == [[0.0]]
+    assert scaler.inverse_transform(scaler.transform([[7.0]])).tolist() == [[7.0]]
+
+
+def test_scaler_params():
+    scaler = MinMaxScalerParams([1.0], [2.0])
+    assert scaler.transform([[3.0]]).tolist() == [[7.0]]
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from fakes import FakeDatapath
+from reroute_batcher import BARRIER, BUNDLE, OFPBRC_BAD_EXPERIMENTER, OFPET_BAD_REQUEST, RerouteBatcher
+
+
+def flow_mod(datapath, port):
+    parser = datapath.ofproto_parser
+    return parser.OFPFlowMod(datapath=datapath, command=datapath.ofproto.OFPFC_MODIFY, priority=10,
+                             match=parser.OFPMatch(in_port=port),
+                             instructions=[parser.OFPInstructionActions(
+                                 datapath.ofproto.OFPIT_APPLY_ACTIONS, [parser.OFPActionOutput(port)])])
+
+
+def reply(datapath, xid, **kwargs):
+    return SimpleNamespace(datapath=datapath, xid=xid, **kwargs)
+
+
+def make(mode):
+    results = []
+    batcher = RerouteBatcher(on_result=lambda dp, metas, ok, latency: results.append((dp.id, metas, ok)),
+                             mode=mode)
+    return batcher, results
+
+
+def test_same_xid_on_two_switches_completes_separately():
+    # user-014: xid chỉ duy nhất trong 1 switch -> giao dịch khóa theo (dpid, xid)
+    batcher, results = make(BARRIER)
+    dp1, dp2 = FakeDatapath(1), FakeDatapath(2)
+    batcher.add(dp1, flow_mod(dp1, 5), 'a')
+    batcher.add(dp2, flow_mod(dp2, 6), 'b')
+    batcher.flush()
+    barrier_xid = dp1.sent[-1].xid
+    assert dp2.sent[-1].xid == barrier_xid and batcher.stats()['in_flight'] == 2
+
+    batcher.handle_barrier_reply(reply(dp2, barrier_xid))
+    assert results == [(2, ['b'], True)]
+    assert batcher.stats()['in_flight'] == 1
+    batcher.handle_barrier_reply(reply(dp1, barrier_xid))
+    assert results[-1] == (1, ['a'], True)
+
+
+def test_error_is_attributed_to_its_switch_and_move():
+    batcher, results = make(BARRIER)
+    dp1, dp2 = FakeDatapath(1), FakeDatapath(2)
+    for dp in (dp1, dp2):
+        batcher.add(dp, flow_mod(dp, 5), (dp.id, 'x'))
+        batcher.add(dp, flow_mod(dp, 6), (dp.id, 'y'))
+    batcher.flush()
+    batcher.handle_error(reply(dp2, dp2.sent[0].xid, type=5, code=0))
+    for dp in (dp1, dp2):
+        batcher.handle_barrier_reply(reply(dp, dp.sent[-1].xid))
+    assert sorted(results) == [(1, [(1, 'x'), (1, 'y')], True), (2, [(2, 'x')], False), (2, [(2, 'y')], True)]
+
+
+def test_bundle_commit_and_fallback_to_barrier():
+    batcher, results = make(BUNDLE)
+    dp = FakeDatapath(1)
+    batcher.add(dp, flow_mod(dp, 5), 'a')
+    batcher.flush()
+    assert [type(m).__name__ for m in dp.sent] == ['ONFBundleCtrlMsg', 'ONFBundleAddMsg', 'ONFBundleCtrlMsg']
+
+    # Switch không hỗ trợ bundle -> gửi lại bằng FlowMod + barrier
+    batcher.handle_error(reply(dp, dp.sent[0].xid, type=OFPET_BAD_REQUEST, code=OFPBRC_BAD_EXPERIMENTER))
+    assert batcher.modes[1] == BARRIER
+    assert [type(m).__name__ for m in dp.sent[3:]] == ['OFPFlowMod', 'OFPBarrierRequest']
+    batcher.handle_barrier_reply(reply(dp, dp.sent[-1].xid))
+    assert results == [(1, ['a'], True)]
@@ -0,0 +1,37 @@
+from reroute_damper import DWELL, GAIN, RATE, RerouteDamper
+
+
+def test_dwell_counts_from_flow_install():
+    damper = RerouteDamper(min_dwell=10.0, min_gain=0.2)
+    # Flow đã cài 30s (duration_sec) mà chưa reroute lần nào -> được chuyển ngay
+    assert damper.allow(1, 'old', 100.0, 10.0, age=30, now=1000.0) == (True, None)
+    # Flow mới cài 2s -> phải ở yên thêm 8s
+    assert damper.allow(1, 'young', 100.0, 10.0, age=2, now=1000.0) == (False, DWELL)
+    assert damper.allow(1, 'young', 100.0, 10.0, now=1008.0) == (True, None)
+
+
+def test_dwell_restarts_after_reroute_and_gain():
+    damper = RerouteDamper(min_dwell=10.0, min_gain=0.2)
+    assert damper.allow(1, 'f', 100.0, 10.0, age=30, now=0.0)[0]
+    assert damper.allow(1, 'f', 100.0, 10.0, now=5.0) == (False, DWELL)
+    assert damper.allow(1, 'f', 100.0, 90.0, now=20.0) == (False, GAIN)
+    damper.forget('f')
+    assert damper.allow(1, 'f', 100.0, 10.0, now=20.0) == (False, DWELL)   # lần cài sau: tính lại
+
+
+def test_rate_limit_per_switch():
+    damper = RerouteDamper(min_dwell=0.0, max_rate=2.0)
+    results = [damper.allow(1, i, 100.0, 0.0, now=0.0)[1] for i in range(3)]
+    assert results == [None, None, RATE]
+    assert damper.allow(2, 'x', 100.0, 0.0, now=0.0) == (True, None)
+    assert damper.allow(1, 'y', 100.0, 0.0, now=0.5) == (True, None)     # nạp lại 1 token
+
+
+def test_recent_window_trimmed_in_allow():
+    damper = RerouteDamper(min_dwell=0.0, max_rate=100.0, rate_window=10.0)
+    for i in range(5):
+        damper.allow(1, i, 100.0, 0.0, now=0.0)
+    assert len(damper.recent) == 5
+    # Không ai gọi stats(): allow() vẫn phải bỏ mốc cũ hơn rate_window
+    damper.allow(1, 'late', 100.0, 90.0, now=100.0)
+    assert len(damper.recent) == 0
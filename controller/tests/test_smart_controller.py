@@ -0,0 +1,123 @@
+"""
+Regression của SmartController trên switch giả và registry tạm (fixture make_app):
+load model qua executor (006), reload/CURRENT/watcher (007), FlowMod reroute (011), rule TRACK (016)
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, icmp
+from ryu.ofproto import ofproto_v1_3 as ofproto, ofproto_v1_3_parser as parser
+
+import smart_controller_v2
+from fakes import FakeDatapath, random_lstm, save_lstm, wait_for, write_version
+from flow_features import AI_FLOW_PRIORITY
+from proactive import TRACK_PRIORITY
+from smart_controller_v2 import ModelRestController, smart_controller_instance_name
+
+
+def read_current(app):
+    with open(app.registry.current_file) as f:
+        return f.read().strip()
+
+
+def rest_reload(app, version):
+    body = json.dumps({'version': version}).encode()
+    req = SimpleNamespace(body=body, json=json.loads(body))
+    return ModelRestController(req, None, {smart_controller_instance_name: app}).reload(req)
+
+
+def test_initial_load_runs_on_executor(make_app):
+    app = make_app()
+    assert app.models is not None and app.models.version == 'v1'
+    assert app.executor.stats()['completed'] >= 1
+
+
+def test_failed_reload_keeps_current(make_app):
+    app = make_app()
+    assert rest_reload(app, 'v2').status_int == 202
+    assert wait_for(lambda: app.loading_version is None)
+    assert app.models.version == 'v1'
+    assert 'v2' in app.failed_versions
+    assert read_current(app) == 'v1'
+
+
+def test_successful_reload_writes_current(make_app, model_dir):
+    app = make_app()
+    write_version(model_dir, 'v3')
+    assert rest_reload(app, 'v3').status_int == 202
+    assert read_current(app) == 'v1'        # chưa swap -> CURRENT chưa đổi
+    assert wait_for(lambda: app.loading_version is None)
+    assert app.models.version == 'v3'
+    assert read_current(app) == 'v3'
+    assert rest_reload(app, 'v9').status_int == 404
+
+
+def test_watcher_retries_until_first_load_succeeds(make_app, model_dir, monkeypatch):
+    monkeypatch.setattr(smart_controller_v2, 'model_watch_interval', 0.05)
+    with open(os.path.join(model_dir, 'registry', 'CURRENT'), 'w') as f:
+        f.write('v2\n')
+    app = make_app()
+    assert app.models is None and 'v2' in app.failed_versions
+    # Sửa version đang hỏng tại chỗ (CURRENT không đổi): watcher vẫn thử lại vì chưa có model
+    pred_path = os.path.join(model_dir, 'registry', 'v2', 'traffic_predict')
+    with open(os.path.join(pred_path, 'model_config.txt'), 'w') as f:
+        f.write('10')
+    save_lstm(random_lstm(), os.path.join(pred_path, 'best_prediction_model.npz'))
+    assert wait_for(lambda: app.models is not None)
+    assert app.models.version == 'v2'
+    assert 'v2' not in app.failed_versions
+
+
+@pytest.mark.parametrize('cookie, command', [(None, ofproto.OFPFC_MODIFY),
+                                             (0x5C01000100000001, ofproto.OFPFC_MODIFY_STRICT)])
+def test_reroute_mod_matches_ai_flow_priority(make_app, cookie, command):
+    app = make_app()
+    match = parser.OFPMatch(in_port=1, eth_type=0x0800, ipv4_src='10.0.0.1', ipv4_dst='10.0.0.11', ip_proto=17)
+    mod = app._reroute_mod(FakeDatapath(1), match, 3, cookie)
+    assert mod.command == command
+    assert mod.priority == AI_FLOW_PRIORITY
+
+
+def install_ingress(app):
+    dp = FakeDatapath(1)
+    app.datapaths[dp.id] = dp
+    for pair in app.topology.pairs(dp.id):
+        app.group_balancers[pair].install(dp)
+    app.proactive.install(dp)
+    return dp
+
+
+def packet_in(dp, l4, ip_proto):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst='00:00:00:00:00:0b', src='00:00:00:00:00:01', ethertype=0x0800))
+    pkt.add_protocol(ipv4.ipv4(src='10.0.0.1', dst='10.0.0.11', proto=ip_proto))
+    pkt.add_protocol(l4)
+    pkt.serialize()
+    msg = SimpleNamespace(datapath=dp, match={'in_port': 1}, data=bytes(pkt.data), buffer_id=ofproto.OFP_NO_BUFFER)
+    return SimpleNamespace(msg=msg)
+
+
+def test_ingress_tracks_tcp_and_udp(make_app):
+    app = make_app()
+    dp = install_ingress(app)
+    track = [mod for mod in dp.sent_of(parser.OFPFlowMod) if mod.priority == TRACK_PRIORITY]
+    assert {mod.match['ip_proto'] for mod in track} == {6, 17}
+    for mod in track:
+        assert mod.instructions[0].actions[0].port == ofproto.OFPP_CONTROLLER
+
+
+@pytest.mark.parametrize('l4, ip_proto, expected', [
+    (tcp.tcp(), 6, ['OFPFlowMod', 'OFPPacketOut', 'OFPBarrierRequest']),
+    (udp.udp(), 17, ['OFPFlowMod', 'OFPPacketOut', 'OFPBarrierRequest']),
+    (icmp.icmp(), 1, ['OFPPacketOut']),
+])
+def test_packet_in_installs_ai_flow_for_tracked_protocols(make_app, l4, ip_proto, expected):
+    app = make_app()
+    dp = install_ingress(app)
+    dp.sent = []
+    app._packet_in_handler(packet_in(dp, l4, ip_proto))
+    assert [type(msg).__name__ for msg in dp.sent] == expected
+    for mod in dp.sent_of(parser.OFPFlowMod):
+        assert mod.priority == AI_FLOW_PRIORITY
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from tree_compiler import CompiledForest, compile_classifier
+
+sklearn = pytest.importorskip('sklearn')
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from sklearn.tree import DecisionTreeClassifier  # noqa: E402
+
+
+def dataset(n=2000, seed=0):
+    """Giống đặc trưng thô của build_feature_matrix: thang đo rất khác nhau giữa các cột"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.choice([6, 17], n), rng.integers(1, 10000, n), rng.integers(60, 10_000_000, n),
+                         rng.integers(1, 60, n), rng.uniform(0, 1e6, n), rng.uniform(0, 1000, n),
+                         rng.uniform(60, 1500, n)]).astype(np.float64)
+    y = np.where(X[:, 0] == 6, 3, np.where(X[:, 6] < 300, 2, np.where(X[:, 4] > 3e5, 1, 0)))
+    flip = rng.random(n) < 0.05     # nhiễu -> cây sâu, nhiều lá
+    y[flip] = rng.integers(0, 4, flip.sum())
+    return X, y
+
+
+@pytest.mark.parametrize('model', [DecisionTreeClassifier(random_state=0),
+                                   RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0)])
+def test_matches_sklearn_predict_with_scaler(model):
+    X, y = dataset()
+    scaler = StandardScaler().fit(X)
+    model.fit(scaler.transform(X), y)
+    compiled = compile_classifier(model, scaler)
+    X_test, _ = dataset(seed=1)
+    np.testing.assert_array_equal(compiled.predict(X_test), model.predict(scaler.transform(X_test)))
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(scaler.transform(X_test)),
+                               atol=1e-6)
+
+
+def test_matches_sklearn_without_scaler_and_round_trips(tmp_path):
+    X, y = dataset()
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    path = str(tmp_path / 'compiled.npz')
+    compile_classifier(model).save(path)
+    loaded = CompiledForest.load(path)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    assert loaded.predict(np.empty((0, 7))).shape == (0,)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from verdict_cache import VerdictCache
+
+
+def features(byte_rate, avg_size):
+    row = np.zeros((1, 7))
+    row[0, 4], row[0, 6] = byte_rate, avg_size
+    return row
+
+
+def test_hit_within_drift_miss_outside():
+    cache = VerdictCache(rate_drift=0.5, size_drift=0.2)
+    key = ('10.0.0.1', '10.0.0.11', 17, 1)
+    cache.store([key], features(1000, 500), [1])
+
+    labels, miss = cache.lookup([key], features(1400, 550))
+    assert labels.tolist() == [1] and miss.tolist() == []
+
+    labels, miss = cache.lookup([key], features(1000, 700))    # avg size lệch 40% > 20%
+    assert labels.tolist() == [-1] and miss.tolist() == [0]
+    assert key not in cache.entries
+    assert cache.stats()['drifted'] == 1
+
+
+def test_ttl_invalidate_and_lru():
+    cache = VerdictCache(max_size=2, ttl=0.0)
+    keys = [('a',), ('b',), ('c',)]
+    cache.store(keys, np.repeat(features(1, 1), 3, axis=0), [0, 1, 2])
+    assert list(cache.entries) == keys[1:]      # LRU: bỏ khóa cũ nhất
+    assert cache.stats()['evicted'] == 1
+
+    cache.invalidate(('b',))
+    assert cache.stats()['removed'] == 1
+    labels, _ = cache.lookup([('c',)], features(1, 1))
+    assert labels.tolist() == [-1]              # ttl = 0 -> hết hạn ngay
+    assert cache.stats()['expired'] == 1
+
+
+def test_call_saved_only_when_every_flow_hits():
+    cache = VerdictCache()
+    cache.store([('a',)], features(1, 1), [2])
+    cache.lookup([('a',), ('b',)], np.repeat(features(1, 1), 2, axis=0))
+    assert cache.stats()['inference_calls_saved'] == 0
+    cache.lookup([('a',)], features(1, 1))
+    st = cache.stats()
+    assert st['inference_calls_saved'] == 1
+    assert (st['hits'], st['misses']) == (2, 1)
@@ -0,0 +1,173 @@
+import json
+from collections import deque
+
+
+class Path(object):
+    __slots__ = ('index', 'src', 'dst', 'hops')
+
+    def __init__(self, index, src, dst, hops):
+        self.index = index
+        self.src = src          # dpid switch vào (ingress)
+        self.dst = dst          # dpid switch ra (egress)
+        self.hops = hops        # list (dpid, in_port, out_port); in_port của src và out_port của dst = None
+
+    @property
+    def uplink(self):
+        """Cổng ra trên switch vào"""
+        return self.hops[0][2]
+
+    @property
+    def downlink(self):
+        """Cổng vào trên switch ra"""
+        return self.hops[-1][1]
+
+    def ports(self):
+        for dpid, in_port, out_port in self.hops:
+            if in_port is not None: yield dpid, in_port
+            if out_port is not None: yield dpid, out_port
+
+
+class TopologyService(object):
+    """
+    Đồ thị switch lấy từ file topology khai báo (JSON: ingress, hosts ip -> [dpid, port],
+    links [dpid_a, port_a, dpid_b, port_b]), cập nhật theo link discovery của ryu.topology
+    (ryu-manager --observe-links) và port status.
+    - Switch biên (edge) = switch có host; ingress = switch biên phân loại flow mới (reactive).
+    - Mỗi cặp (ingress, egress) có k đường không chung link, đánh chỉ số 0..k-1 theo cổng uplink.
+    - Mỗi cặp switch biên có 1 group id (SELECT group của cặp đó).
+    """
+
+    def __init__(self, path=None, topology=None):
+        if topology is None:
+            with open(path) as f:
+                topology = json.load(f)
+        self.ingress = set(topology.get('ingress', []))
+        self.hosts = {ip: (int(dpid), int(port)) for ip, (dpid, port) in topology['hosts'].items()}
+        self.links = {}         # (dpid, port) -> (dpid, port), cả 2 chiều
+        for a_dpid, a_port, b_dpid, b_port in topology['links']:
+            self.links[(a_dpid, a_port)] = (b_dpid, b_port)
+            self.links[(b_dpid, b_port)] = (a_dpid, a_port)
+        self.down_ports = set()     # (dpid, port) đang down (port status)
+        self.version = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.host_ports = {}    # dpid -> {ip: port}
+        for ip, (dpid, port) in self.hosts.items():
+            self.host_ports.setdefault(dpid, {})[ip] = port
+        self.edges = sorted(self.host_ports)
+        self.paths = {}         # (src, dst) -> list Path
+        for src in self.edges:
+            for dst in self.edges:
+                if src != dst: self.paths[(src, dst)] = self._disjoint_paths(src, dst)
+        self.group_ids = {pair: i + 1 for i, pair in enumerate(sorted(self.paths))}
+        self.version += 1
+
+    def _neighbors(self, dpid):
+        return sorted((port, peer) for (d, port), peer in self.links.items() if d == dpid)
+
+    def _disjoint_paths(self, src, dst):
+        """BFS lặp: mỗi lần lấy đường ngắn nhất rồi bỏ các link của nó; không đi xuyên switch biên khác"""
+        used = set()
+        paths = []
+        while True:
+            parent = {src: None}
+            queue = deque([src])
+            while queue and dst not in parent:
+                dpid = queue.popleft()
+                for port, (peer, peer_port) in self._neighbors(dpid):
+                    if peer in parent or (dpid, port) in used: continue
+                    if peer != dst and peer in self.host_ports: continue
+                    parent[peer] = (dpid, port, peer_port)
+                    queue.append(peer)
+            if dst not in parent: break
+
+            hops = []
+            node, out_port = dst, None
+            while node != src:
+                prev, prev_port, in_port = parent[node]
+                hops.append((node, in_port, out_port))
+                used.add((prev, prev_port))
+                used.add((node, in_port))
+                node, out_port = prev, prev_port
+            hops.append((src, None, out_port))
+            hops.reverse()
+            paths.append(Path(len(paths), src, dst, hops))
+        paths.sort(key=lambda p: p.uplink)
+        for i, path in enumerate(paths):
+            path.index = i
+        return paths
+
+    def is_ingress(self, dpid):
+        return dpid in self.ingress
+
+    def is_host_port(self, dpid, port):
+        return port in self.host_ports.get(dpid, {}).values()
+
+    def host_location(self, ip):
+        """(dpid, port) của host, None nếu không khai báo"""
+        return self.hosts.get(ip)
+
+    def pairs(self, src=None):
+        """Các cặp (ingress, egress) có đường; src: chỉ các cặp xuất phát từ switch này"""
+        return [pair for pair in sorted(self.paths)
+                if pair[0] in self.ingress and (src is None or pair[0] == src) and self.paths[pair]]
+
+    def uplink_ports(self, src, dst):
+        return [path.uplink for path in self.paths.get((src, dst), [])]
+
+    def monitored_ports(self):
+        """(dpid, port) của mọi cổng uplink trên switch ingress: tải mỗi đường lấy ở đây"""
+        ports = set()
+        for src, dst in self.pairs():
+            ports.update((src, port) for port in self.uplink_ports(src, dst))
+        return sorted(ports)
+
+    def path_live(self, path):
+        return not any(port in self.down_ports for port in path.ports())
+
+    def transit_rules(self, dpid):
+        """Switch trung chuyển: [(ip đích, cổng ra)] theo các đường đi qua nó (cả 2 chiều)"""
+        rules = {}
+        for (src, dst), paths in sorted(self.paths.items()):
+            for path in paths:
+                for hop_dpid, _, out_port in path.hops[1:-1]:
+                    if hop_dpid != dpid: continue
+                    for ip in self.host_ports[dst]:
+                        rules.setdefault(ip, out_port)
+        return sorted(rules.items())
+
+    def is_transit(self, dpid):
+        return any(hop[0] == dpid for paths in self.paths.values() for path in paths for hop in path.hops[1:-1])
+
+    def set_port_state(self, dpid, port, live):
+        """Port status: True nếu cổng thuộc 1 link trong topology"""
+        if (dpid, port) not in self.links: return False
+        if live: self.down_ports.discard((dpid, port))
+        else: self.down_ports.add((dpid, port))
+        return True
+
+    def add_link(self, a_dpid, a_port, b_dpid, b_port):
+        """Link phát hiện bởi ryu.topology; True nếu đồ thị thay đổi (đường đã được tính lại)"""
+        if self.links.get((a_dpid, a_port)) == (b_dpid, b_port): return False
+        self.links[(a_dpid, a_port)] = (b_dpid, b_port)
+        self.links[(b_dpid, b_port)] = (a_dpid, a_port)
+        self._rebuild()
+        return True
+
+    def remove_link(self, a_dpid, a_port, b_dpid, b_port):
+        if self.links.get((a_dpid, a_port)) != (b_dpid, b_port): return False
+        del self.links[(a_dpid, a_port)]
+        self.links.pop((b_dpid, b_port), None)
+        self._rebuild()
+        return True
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'ingress': sorted(self.ingress),
+            'edges': self.edges,
+            'paths': {f"{src}->{dst}": [[hop[0] for hop in path.hops] for path in paths]
+                      for (src, dst), paths in self.paths.items()},
+            'down_ports': sorted(self.down_ports),
+        }
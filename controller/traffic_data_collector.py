@@ -9,6 +9,10 @@ from ryu.controller.handler import set_ev_cls
 from ryu.lib import hub
 from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, ether_types
 
+from flow_state import FlowStateStore
+
+FLOW_MAX_IDLE = 60  # Flow không xuất hiện quá 60s -> giải phóng slot trạng thái
+
 class TrafficCollector(simple_switch_13.SimpleSwitch13):
     def __init__(self, *args, **kwargs):
         super(TrafficCollector, self).__init__(*args, **kwargs)
@@ -35,7 +39,7 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
             ])
             self.csv_file.flush()
             
-        self.previous_stats = {} 
+        self.flow_state = FlowStateStore(history_len=1)  # Bộ đếm lần trước của mỗi flow (để tính rate)
         print(f"TrafficCollector started.")
 
     @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
@@ -158,7 +162,7 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
         # Chỉ lấy Priority 10 (IP Traffic)
         target_flows = [flow for flow in body if flow.priority == 10]
         
-        row_count = 0
+        rows = []
         for stat in target_flows:
             # Parse IP/Port
             ip_src = stat.match.get('ipv4_src', '0.0.0.0')
@@ -186,27 +190,22 @@ class TrafficCollector(simple_switch_13.SimpleSwitch13):
                 continue 
 
             flow_key = (ev.msg.datapath.id, ip_src, ip_dst, ip_proto, src_port, dst_port)
-            
-            byte_rate = 0.0
-            packet_rate = 0.0
-            
-            if flow_key in self.previous_stats:
-                prev = self.previous_stats[flow_key]
-                d_bytes = stat.byte_count - prev['byte_count']
-                d_pkts = stat.packet_count - prev['packet_count']
-                d_time = (stat.duration_sec + stat.duration_nsec/1e9) - (prev['duration_sec'] + prev['duration_nsec']/1e9)
-                
-                if d_time > 0.1:
-                    byte_rate = d_bytes / d_time
-                    packet_rate = d_pkts / d_time
-            
-            self.previous_stats[flow_key] = {
-                'byte_count': stat.byte_count,
-                'packet_count': stat.packet_count,
-                'duration_sec': stat.duration_sec,
-                'duration_nsec': stat.duration_nsec
-            }
+            rows.append((stat, flow_key, ip_src, ip_dst, ip_proto, src_port, dst_port, label))
+
+        if not rows: return
 
+        # Tính rate cho mọi flow cùng lúc (khoảng thời gian <= 0.1s -> rate 0)
+        _, byte_rates, packet_rates = self.flow_state.update(
+            [row[1] for row in rows],
+            [row[0].byte_count for row in rows],
+            [row[0].packet_count for row in rows],
+            [row[0].duration_sec + row[0].duration_nsec / 1e9 for row in rows],
+            now=timestamp, min_interval=0.1)
+        self.flow_state.expire(timestamp, FLOW_MAX_IDLE)
+
+        row_count = 0
+        for (stat, flow_key, ip_src, ip_dst, ip_proto, src_port, dst_port, label), byte_rate, packet_rate \
+                in zip(rows, byte_rates, packet_rates):
             # Chỉ ghi nếu có dữ liệu thực tế
             if stat.byte_count > 0:
                 self.writer.writerow([
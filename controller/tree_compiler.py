@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class CompiledForest(object):
+    """
+    DecisionTree / RandomForest đã được "làm phẳng" thành các mảng node liên tục.
+    - Ngưỡng đã gộp StandardScaler: predict() nhận trực tiếp đặc trưng thô (không cần transform).
+    - Tất cả flow đi qua tất cả cây cùng lúc (lockstep), mỗi bước là vài phép index NumPy.
+    - Node lá tự trỏ về chính nó; cặp (flow, cây) nào tới lá thì dừng (tối đa max_depth vòng).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float32)     # (n_nodes, n_classes), xác suất của lá
+        self.roots = np.asarray(roots, dtype=np.intp)        # (n_trees,)
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.is_leaf = self.left == np.arange(len(self.left))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        n, n_features = X.shape
+        X_flat = X.ravel()
+        # Mỗi cặp (flow, cây) là 1 phần tử; chỉ cặp chưa tới lá mới được đi tiếp
+        idx = np.tile(self.roots, n)
+        row_offset = np.repeat(np.arange(n) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[idx])
+        while active.size:
+            node = idx[active]
+            go_left = X_flat[row_offset[active] + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            idx[active] = node
+            active = active[~self.is_leaf[node]]
+        return self.value[idx].reshape(n, self.n_trees, -1).sum(axis=1) / self.n_trees
+
+    def predict(self, X):
+        if len(X) == 0: return self.classes[:0]
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path):
+        np.savez_compressed(path, feature=self.feature, threshold=self.threshold,
+                            left=self.left, right=self.right, value=self.value,
+                            roots=self.roots, classes=self.classes, max_depth=np.int32(self.max_depth))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['feature'], data['threshold'], data['left'], data['right'],
+                   data['value'], data['roots'], data['classes'], data['max_depth'])
+
+
+def _float32_split(threshold):
+    """
+    sklearn ép X về float32 trước khi so với threshold: float32(x) <= t.
+    Trả về ngưỡng float64 t' sao cho x <= t'  <=>  float32(x) <= t (làm tròn gần nhất, hòa -> chẵn).
+    """
+    t32 = threshold.astype(np.float32)
+    t32 = np.where(t32.astype(np.float64) > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+    upper = np.nextafter(t32, np.float32(np.inf))
+    mid = (t32.astype(np.float64) + upper.astype(np.float64)) / 2     # đúng tuyệt đối trong float64
+    even = (t32.view(np.uint32) & 1) == 0
+    return np.where(even, mid, np.nextafter(mid, -np.inf))
+
+
+def compile_classifier(model, scaler=None):
+    """
+    Compile model sklearn (DecisionTreeClassifier / RandomForestClassifier) + StandardScaler.
+    float32(x_scaled) <= t  <=>  x_scaled <= t'  <=>  x <= t' * scale + mean  (scale > 0)
+    """
+    estimators = getattr(model, 'estimators_', [model])
+    n_features = estimators[0].tree_.n_features
+    mean = np.zeros(n_features)
+    scale = np.ones(n_features)
+    if scaler is not None:
+        if getattr(scaler, 'mean_', None) is not None: mean = np.asarray(scaler.mean_, dtype=np.float64)
+        if getattr(scaler, 'scale_', None) is not None: scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in estimators:
+        tree = est.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n_nodes) + offset
+
+        feat = np.where(is_leaf, 0, tree.feature)
+        thr = np.where(is_leaf, 0.0, _float32_split(tree.threshold) * scale[feat] + mean[feat])
+        # Lá tự trỏ về chính nó
+        feature.append(feat)
+        threshold.append(thr)
+        left.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        right.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+        # Chuẩn hóa value của lá thành xác suất (giống predict_proba của sklearn)
+        counts = tree.value[:, 0, :].astype(np.float64)
+        totals = counts.sum(axis=1, keepdims=True)
+        value.append(np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0))
+
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(np.concatenate(feature), np.concatenate(threshold),
+                          np.concatenate(left), np.concatenate(right),
+                          np.concatenate(value), roots, model.classes_, max_depth)
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from flow_features import OFPXMT_OFB_IP_PROTO
+
+
+def flow_key(match):
+    """Khóa flow (src, dst, proto, in_port) từ match của flow priority 10"""
+    return (match.get('ipv4_src'), match.get('ipv4_dst'),
+            match.get('ip_proto', 17), match.get('in_port'))
+
+
+def flow_keys(flows):
+    """Khóa flow cho mọi hàng của FlowStatsColumns, cùng dạng với flow_key(match)"""
+    ip_proto = np.where(flows.has(OFPXMT_OFB_IP_PROTO), flows.ip_proto, 17).tolist()
+    in_port = [port if port else None for port in flows.in_port.tolist()]
+    src = [flows.ipv4_str(v) for v in flows.ipv4_src.tolist()]
+    dst = [flows.ipv4_str(v) for v in flows.ipv4_dst.tolist()]
+    return list(zip(src, dst, ip_proto, in_port))
+
+
+class VerdictCache(object):
+    """
+    Cache nhãn phân loại theo flow: lớp của 1 flow gần như không đổi sau vài giây đầu,
+    nên chỉ cần classify lại khi đặc trưng "trôi" ra khỏi dải cho phép.
+    - Hit: byte_rate và avg_packet_size lệch không quá rate_drift / size_drift (tương đối)
+      so với lúc classify.
+    - Entry bị xóa khi drift, khi flow bị xóa (FlowRemoved), quá ttl giây, hoặc theo LRU khi đầy.
+    """
+
+    def __init__(self, max_size=50000, ttl=60.0, rate_drift=0.5, size_drift=0.2):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.rate_drift = rate_drift
+        self.size_drift = size_drift
+        self.entries = OrderedDict()    # key -> (label, byte_rate, avg_packet_size, time)
+
+        self.hits = 0
+        self.misses = 0
+        self.drifted = 0
+        self.expired = 0
+        self.removed = 0
+        self.evicted = 0
+        self.inference_calls_saved = 0  # số batch không cần gửi sang executor (mọi flow đều hit)
+
+    def lookup(self, keys, features):
+        """
+        keys: list khóa flow, features: ma trận (n, 7) như build_feature_matrix.
+        Trả về (labels, miss_idx): labels[i] = nhãn cache (-1 nếu miss), miss_idx = chỉ số cần classify.
+        """
+        now = time.monotonic()
+        labels = np.full(len(keys), -1, dtype=np.int64)
+        for i, key in enumerate(keys):
+            entry = self.entries.get(key)
+            if entry is None: continue
+            label, byte_rate, avg_size, ts = entry
+            if now - ts > self.ttl:
+                del self.entries[key]
+                self.expired += 1
+                continue
+            if (abs(features[i, 4] - byte_rate) > self.rate_drift * max(byte_rate, 1.0) or
+                    abs(features[i, 6] - avg_size) > self.size_drift * max(avg_size, 1.0)):
+                del self.entries[key]
+                self.drifted += 1
+                continue
+            labels[i] = label
+            self.entries.move_to_end(key)
+        miss_idx = np.flatnonzero(labels < 0)
+        self.hits += len(keys) - len(miss_idx)
+        self.misses += len(miss_idx)
+        if len(keys) and not len(miss_idx): self.inference_calls_saved += 1
+        return labels, miss_idx
+
+    def store(self, keys, features, labels):
+        now = time.monotonic()
+        for key, feat, label in zip(keys, features, labels):
+            self.entries[key] = (int(label), float(feat[4]), float(feat[6]), now)
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+
+    def invalidate(self, key):
+        if self.entries.pop(key, None) is not None: self.removed += 1
+
+    def clear(self):
+        """Đổi model -> toàn bộ nhãn cũ không còn giá trị"""
+        self.entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'inferences_saved': self.hits,
+            'inference_calls_saved': self.inference_calls_saved,
+            'drifted': self.drifted,
+            'expired': self.expired,
+            'removed': self.removed,
+            'evicted': self.evicted,
+        }
@@ -56,8 +56,9 @@ def run():
             s.cmd(f'ovs-vsctl set Bridge {s.name} protocols=OpenFlow13')
             s.cmd(f'ovs-vsctl set Bridge {s.name} stp_enable=false')
         
-        info("*** Waiting 5s for Controller connection...\n")
-        time.sleep(5)
+        # Controller load model trong nền nên nhận kết nối ngay, không cần sleep cố định
+        info("*** Waiting for switches to connect to Controller...\n")
+        net.waitConnected(timeout=10)
 
         # Khởi động sẵn Server để bạn tiện test
         info("*** Starting Background Iperf Servers (UDP & TCP)...\n")
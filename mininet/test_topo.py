@@ -70,8 +70,9 @@ def run_scenarios():
             s.cmd(f'ovs-vsctl set Bridge {s.name} protocols=OpenFlow13')
             s.cmd(f'ovs-vsctl set Bridge {s.name} stp_enable=false')
         
-        info("*** Waiting 5s for Controller connection...\n")
-        time.sleep(5)
+        # Controller load model trong nền nên nhận kết nối ngay, không cần sleep cố định
+        info("*** Waiting for switches to connect to Controller...\n")
+        net.waitConnected(timeout=10)
 
         h_src_1, h_src_2 = net.get('h_src_1', 'h_src_2')
         h_src_4 = net.get('h_src_4')
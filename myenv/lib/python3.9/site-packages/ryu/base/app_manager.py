@@ -23,12 +23,14 @@ The central management of Ryu applications.
 
 """
 
+import collections
 import inspect
 import itertools
 import logging
 import sys
 import os
 import gc
+import time
 
 from ryu import cfg
 from ryu import utils
@@ -57,6 +59,89 @@ def _lookup_service_brick_by_mod_name(mod_name):
     return lookup_service_brick(mod_name.split('.')[-1])
 
 
+class _EventQueue(object):
+    def __init__(self, name, capacity, weight):
+        self.name = name
+        self.capacity = capacity
+        self.weight = weight
+        self.credit = weight
+        self.items = collections.deque()
+        self.sem = hub.BoundedSemaphore(capacity)
+        self.dispatched = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+
+class _EventQueues(object):
+    """
+    Event queues of a RyuApp, one per priority class.
+
+    put() blocks while the queue of the class is full. An event of a class
+    without a queue goes to the normal queue, or to the last queue if there
+    is no normal one. get() serves the queues by weighted round robin: in
+    each round a class dispatches at most ``weight`` events, and classes
+    declared first go first. Events of the same class are dispatched in
+    order.
+    """
+
+    def __init__(self, queues):
+        self._queues = [_EventQueue(*q) for q in queues]
+        if not self._queues:
+            raise ValueError('EVENT_QUEUES must declare at least one queue')
+        for q in self._queues:
+            if q.capacity < 1 or q.weight < 1:
+                raise ValueError('event queue %r: capacity and weight must '
+                                 'be at least 1' % (q.name,))
+        self._by_name = dict((q.name, q) for q in self._queues)
+        if len(self._by_name) != len(self._queues):
+            raise ValueError('EVENT_QUEUES declares a priority class twice')
+        self._default = self._by_name.get(event.EVENT_PRIORITY_NORMAL,
+                                          self._queues[-1])
+        self._pending = hub.Semaphore(0)
+
+    def put(self, priority, item):
+        q = self._by_name.get(priority, self._default)
+        q.sem.acquire()
+        q.items.append((time.time(), item))
+        self._pending.release()
+
+    def get(self):
+        self._pending.acquire()
+        for q in self._queues:
+            if q.items and q.credit > 0:
+                break
+        else:
+            # Every backlogged class used up its weight: next round
+            for q in self._queues:
+                q.credit = q.weight
+            q = next(q for q in self._queues if q.items)
+        q.credit -= 1
+        enqueued, item = q.items.popleft()
+        q.sem.release()
+        wait_time = time.time() - enqueued
+        q.dispatched += 1
+        q.wait_time += wait_time
+        q.max_wait_time = max(q.max_wait_time, wait_time)
+        return item
+
+    def empty(self):
+        return not any(q.items for q in self._queues)
+
+    def qsize(self):
+        return sum(len(q.items) for q in self._queues)
+
+    def stats(self):
+        return dict((q.name, {
+            'queued': len(q.items),
+            'capacity': q.capacity,
+            'weight': q.weight,
+            'dispatched': q.dispatched,
+            'avg_wait_ms': q.wait_time / q.dispatched * 1000
+            if q.dispatched else 0.0,
+            'max_wait_ms': q.max_wait_time * 1000,
+        }) for q in self._queues)
+
+
 def register_app(app):
     assert isinstance(app, RyuApp)
     assert app.name not in SERVICE_BRICKS
@@ -122,6 +207,34 @@ class RyuApp(object):
             self.network = kwargs['network']
     """
 
+    EVENT_QUEUES = [
+        (event.EVENT_PRIORITY_HIGH, 128, 8),
+        (event.EVENT_PRIORITY_NORMAL, 128, 4),
+        (event.EVENT_PRIORITY_BULK, 64, 1),
+    ]
+    """
+    The event queues of this RyuApp as a list of
+    (priority class, capacity, weight), highest priority first.
+
+    Each class has its own queue; sending an event blocks while the queue
+    of its class is full. The event loop serves the queues by weighted
+    round robin, so a backlog of bulk events (e.g. flow statistics) does
+    not delay packet-ins while still getting its share.
+    """
+
+    EVENT_PRIORITIES = {}
+    """
+    A dictionary to assign event classes to a queue of EVENT_QUEUES.
+    Events not listed here use the PRIORITY attribute of their class
+    (see ryu.controller.ofp_event for the defaults of OpenFlow events).
+
+    Example::
+
+        EVENT_PRIORITIES = {
+            ofp_event.EventOFPFlowRemoved: event.EVENT_PRIORITY_HIGH,
+        }
+    """
+
     _EVENTS = []
     """
     A list of event classes which this RyuApp subclass would generate.
@@ -155,10 +268,14 @@ class RyuApp(object):
         self.name = self.__class__.__name__
         self.event_handlers = {}        # ev_cls -> handlers:list
         self.observers = {}     # ev_cls -> observer-name -> states:set
+        # Dispatch tables: (ev_cls, state) -> handlers/observer names.
+        # Filled on first use, cleared when handlers or observers change.
+        self._handlers_cache = {}
+        self._observers_cache = {}
         self.threads = []
         self.main_thread = None
-        self.events = hub.Queue(128)
-        self._events_sem = hub.BoundedSemaphore(self.events.maxsize)
+        self.events = _EventQueues(self.EVENT_QUEUES)
+        self._event_priorities = {}     # ev_cls -> priority class
         if hasattr(self.__class__, 'LOGGER_NAME'):
             self.logger = logging.getLogger(self.__class__.LOGGER_NAME)
         else:
@@ -196,25 +313,30 @@ class RyuApp(object):
         assert callable(handler)
         self.event_handlers.setdefault(ev_cls, [])
         self.event_handlers[ev_cls].append(handler)
+        self._handlers_cache.clear()
 
     def unregister_handler(self, ev_cls, handler):
         assert callable(handler)
         self.event_handlers[ev_cls].remove(handler)
         if not self.event_handlers[ev_cls]:
             del self.event_handlers[ev_cls]
+        self._handlers_cache.clear()
 
     def register_observer(self, ev_cls, name, states=None):
         states = states or set()
         ev_cls_observers = self.observers.setdefault(ev_cls, {})
         ev_cls_observers.setdefault(name, set()).update(states)
+        self._observers_cache.clear()
 
     def unregister_observer(self, ev_cls, name):
         observers = self.observers.get(ev_cls, {})
         observers.pop(name)
+        self._observers_cache.clear()
 
     def unregister_observer_all_event(self, name):
         for observers in self.observers.values():
             observers.pop(name, None)
+        self._observers_cache.clear()
 
     def observe_event(self, ev_cls, states=None):
         brick = _lookup_service_brick_by_ev_cls(ev_cls)
@@ -237,9 +359,12 @@ class RyuApp(object):
                       The default is None.
         """
         ev_cls = ev.__class__
-        handlers = self.event_handlers.get(ev_cls, [])
         if state is None:
-            return handlers
+            return self.event_handlers.get(ev_cls, [])
+        try:
+            return self._handlers_cache[(ev_cls, state)]
+        except KeyError:
+            pass
 
         def test(h):
             if not hasattr(h, 'callers') or ev_cls not in h.callers:
@@ -252,14 +377,22 @@ class RyuApp(object):
                 return True
             return state in states
 
-        return filter(test, handlers)
+        handlers = tuple(filter(test, self.event_handlers.get(ev_cls, [])))
+        self._handlers_cache[(ev_cls, state)] = handlers
+        return handlers
 
     def get_observers(self, ev, state):
+        key = (ev.__class__, state)
+        try:
+            return self._observers_cache[key]
+        except KeyError:
+            pass
         observers = []
         for k, v in self.observers.get(ev.__class__, {}).items():
             if not state or not v or state in v:
                 observers.append(k)
 
+        observers = self._observers_cache[key] = tuple(observers)
         return observers
 
     def send_request(self, req):
@@ -281,7 +414,6 @@ class RyuApp(object):
     def _event_loop(self):
         while self.is_active or not self.events.empty():
             ev, state = self.events.get()
-            self._events_sem.release()
             if ev == self._event_stop:
                 continue
             handlers = self.get_handlers(ev, state)
@@ -299,8 +431,23 @@ class RyuApp(object):
                                   self.name, handler.__name__, ev.__class__.__name__)
 
     def _send_event(self, ev, state):
-        self._events_sem.acquire()
-        self.events.put((ev, state))
+        ev_cls = ev.__class__
+        try:
+            priority = self._event_priorities[ev_cls]
+        except KeyError:
+            priority = self.EVENT_PRIORITIES.get(
+                ev_cls, getattr(ev_cls, 'PRIORITY', event.EVENT_PRIORITY_NORMAL))
+            self._event_priorities[ev_cls] = priority
+        self.events.put(priority, (ev, state))
+
+    def event_queue_stats(self):
+        """
+        Returns the state of the event queues of this RyuApp:
+        queued events, capacity and weight of each priority class, the
+        number of dispatched events and their average and maximum time
+        spent waiting in the queue.
+        """
+        return self.events.stats()
 
     def send_event(self, name, ev, state=None):
         """
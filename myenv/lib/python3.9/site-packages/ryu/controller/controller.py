@@ -25,6 +25,8 @@ The main component of OpenFlow controller.
 import contextlib
 import logging
 import random
+import struct
+import time
 from socket import IPPROTO_TCP
 from socket import TCP_NODELAY
 from socket import SHUT_WR
@@ -85,9 +87,26 @@ CONF.register_opts([
     cfg.IntOpt('maximum-unreplied-echo-requests',
                default=0,
                min=0,
-               help='Maximum number of unreplied echo requests before datapath is disconnected.')
+               help='Maximum number of unreplied echo requests before datapath is disconnected.'),
+    cfg.IntOpt('socket-recv-buffer-size',
+               default=256 * 1024,
+               min=64 * 1024,
+               help='Maximum number of bytes read from a datapath socket at once '
+                    '(at least the maximum OpenFlow message length).'),
+    cfg.IntOpt('ofp-send-queue-size',
+               default=1024,
+               min=1,
+               help='Maximum number of messages queued for sending to a datapath.'),
+    cfg.IntOpt('ofp-send-queue-bytes',
+               default=1024 * 1024,
+               min=0,
+               help='Maximum number of bytes queued for sending to a datapath; senders '
+                    'wait until the queue drains below it (0 means no byte limit).')
 ])
 
+# Upper bound of the data gathered from the send queue into one write.
+_SEND_BATCH_MAX_BYTES = 256 * 1024
+
 
 def _split_addr(addr):
     """
@@ -275,13 +294,20 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         self.socket = socket
         self.socket.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
         self.socket.settimeout(CONF.socket_timeout)
+        self.recv_buffer_size = CONF.socket_recv_buffer_size
         self.address = address
         self.is_active = True
 
-        # The limit is arbitrary. We need to limit queue size to
-        # prevent it from eating memory up.
-        self.send_q = hub.Queue(16)
+        # We need to limit queue size to prevent it from eating memory up.
+        # Both the number of messages and the queued bytes are bounded.
+        self.send_q = hub.Queue(CONF.ofp_send_queue_size)
         self._send_q_sem = hub.BoundedSemaphore(self.send_q.maxsize)
+        self._send_q_max_bytes = CONF.ofp_send_queue_bytes
+        self._send_q_bytes = 0
+        self._send_q_drained = hub.Event()
+        self._send_stats = {'msgs': 0, 'bytes': 0, 'writes': 0,
+                            'max_msgs_per_write': 0,
+                            'stalls': 0, 'stall_time': 0.0}
 
         self.echo_request_interval = CONF.echo_request_interval
         self.max_unreplied_echo_requests = CONF.maximum_unreplied_echo_requests
@@ -315,19 +341,41 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         ev.state = state
         self.ofp_brick.send_event_to_observers(ev, state)
 
+    def columnar_decoder(self, msg_cls):
+        """
+        Return the columnar decoder for msg_cls replies, or None.
+
+        A decoder is used only when every handler of the event, in the
+        ofp_event brick and in all observing applications, was decorated
+        with the same one (e.g. columnar_flow_stats). Applications which
+        did not opt in keep getting the regular parser output.
+        """
+        ev_cls = ofp_event.ofp_msg_to_ev_cls(msg_cls)
+        handlers = list(self.ofp_brick.event_handlers.get(ev_cls, []))
+        for name in self.ofp_brick.observers.get(ev_cls, {}):
+            app = ryu.base.app_manager.lookup_service_brick(name)
+            if app is not None:
+                handlers.extend(app.event_handlers.get(ev_cls, []))
+        decoders = set(getattr(handler, 'columnar_decoder', None)
+                       for handler in handlers)
+        if len(decoders) == 1:
+            return decoders.pop()
+        return None
+
     # Low level socket handling layer
     @_deactivate
     def _recv_loop(self):
-        buf = bytearray()
+        # Each recv() takes up to recv_buffer_size bytes, i.e. everything
+        # the kernel has queued, instead of one read for the header and
+        # one for the rest of the message. buf stays bytes: the messages
+        # are slices of it and only a partial message is carried over.
+        buf = b''
         count = 0
-        min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+        min_read_len = ofproto_common.OFP_HEADER_SIZE
 
         while self.state != DEAD_DISPATCHER:
             try:
-                read_len = min_read_len
-                if remaining_read_len > min_read_len:
-                    read_len = remaining_read_len
-                ret = self.socket.recv(read_len)
+                ret = self.socket.recv(self.recv_buffer_size)
             except SocketTimeout:
                 continue
             except ssl.SSLError:
@@ -340,38 +388,31 @@ class Datapath(ofproto_protocol.ProtocolDesc):
             if not ret:
                 break
 
-            buf += ret
+            buf = buf + ret if buf else ret
             buf_len = len(buf)
-            while buf_len >= min_read_len:
-                (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+            offset = 0
+            while buf_len - offset >= min_read_len:
+                (version, msg_type, msg_len, xid) = struct.unpack_from(
+                    ofproto_common.OFP_HEADER_PACK_STR, buf, offset)
                 if msg_len < min_read_len:
                     # Someone isn't playing nicely; log it, and try something sane.
                     LOG.debug("Message with invalid length %s received from switch at address %s",
                               msg_len, self.address)
                     msg_len = min_read_len
-                if buf_len < msg_len:
-                    remaining_read_len = (msg_len - buf_len)
+                if buf_len - offset < msg_len:
                     break
 
                 msg = ofproto_parser.msg(
-                    self, version, msg_type, msg_len, xid, buf[:msg_len])
+                    self, version, msg_type, msg_len, xid,
+                    buf[offset:offset + msg_len])
                 # LOG.debug('queue msg %s cls %s', msg, msg.__class__)
                 if msg:
                     ev = ofp_event.ofp_msg_to_ev(msg)
                     self.ofp_brick.send_event_to_observers(ev, self.state)
-
-                    def dispatchers(x):
-                        return x.callers[ev.__class__].dispatchers
-
-                    handlers = [handler for handler in
-                                self.ofp_brick.get_handlers(ev) if
-                                self.state in dispatchers(handler)]
-                    for handler in handlers:
+                    for handler in self.ofp_brick.get_handlers(ev, self.state):
                         handler(ev)
 
-                buf = buf[msg_len:]
-                buf_len = len(buf)
-                remaining_read_len = min_read_len
+                offset += msg_len
 
                 # We need to schedule other greenlets. Otherwise, ryu
                 # can't accept new switches or handle the existing
@@ -382,12 +423,37 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                     count = 0
                     hub.sleep(0)
 
+            buf = buf[offset:]
+
     def _send_loop(self):
         try:
             while self.state != DEAD_DISPATCHER:
+                # Everything queued while the previous write was in progress
+                # goes out in a single write.
+                bufs = []
+                size = 0
                 buf, close_socket = self.send_q.get()
-                self._send_q_sem.release()
-                self.socket.sendall(buf)
+                while True:
+                    self._send_q_sem.release()
+                    bufs.append(buf)
+                    size += len(buf)
+                    if close_socket or size >= _SEND_BATCH_MAX_BYTES:
+                        break
+                    try:
+                        buf, close_socket = self.send_q.get(block=False)
+                    except hub.QueueEmpty:
+                        break
+                self.socket.sendall(bufs[0] if len(bufs) == 1
+                                    else b''.join(bufs))
+                self._send_q_bytes -= size
+                self._send_q_drained.set()
+
+                stats = self._send_stats
+                stats['msgs'] += len(bufs)
+                stats['bytes'] += size
+                stats['writes'] += 1
+                if len(bufs) > stats['max_msgs_per_write']:
+                    stats['max_msgs_per_write'] = len(bufs)
                 if close_socket:
                     break
         except SocketTimeout:
@@ -409,14 +475,30 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                     self._send_q_sem.release()
             except hub.QueueEmpty:
                 pass
+            # Wake up the threads waiting for queued bytes to drain.
+            self._send_q_bytes = 0
+            self._send_q_drained.set()
             # Finally, disallow further sends.
             self._close_write()
 
     def send(self, buf, close_socket=False):
         msg_enqueued = False
-        self._send_q_sem.acquire()
+        stalled_at = None
+        if not self._send_q_sem.acquire(blocking=False):
+            stalled_at = time.time()
+            self._send_q_sem.acquire()
+        while (self.send_q and self._send_q_max_bytes and self._send_q_bytes and
+               self._send_q_bytes + len(buf) > self._send_q_max_bytes):
+            if stalled_at is None:
+                stalled_at = time.time()
+            self._send_q_drained.clear()
+            self._send_q_drained.wait()
+        if stalled_at is not None:
+            self._send_stats['stalls'] += 1
+            self._send_stats['stall_time'] += time.time() - stalled_at
         if self.send_q:
             self.send_q.put((buf, close_socket))
+            self._send_q_bytes += len(buf)
             msg_enqueued = True
         else:
             self._send_q_sem.release()
@@ -425,6 +507,31 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                       self.address)
         return msg_enqueued
 
+    def send_stats(self):
+        """
+        Returns counters of the send path to this datapath.
+
+        ================== ===============================================
+        Key                Description
+        ================== ===============================================
+        msgs               Messages written to the socket
+        bytes              Bytes written to the socket
+        writes             Socket writes; queued messages are coalesced
+        msgs_per_write     Average number of messages per write
+        max_msgs_per_write Largest number of messages in one write
+        stalls             send() calls that waited for queue space
+        stall_time         Total time, in seconds, spent waiting
+        queued_msgs        Messages currently queued
+        queued_bytes       Bytes currently queued or being written
+        ================== ===============================================
+        """
+        stats = dict(self._send_stats)
+        stats['msgs_per_write'] = (float(stats['msgs']) / stats['writes']
+                                   if stats['writes'] else 0.0)
+        stats['queued_msgs'] = self.send_q.qsize() if self.send_q else 0
+        stats['queued_bytes'] = self._send_q_bytes
+        return stats
+
     def set_xid(self, msg):
         self.xid += 1
         self.xid &= self.ofproto.MAX_XID
@@ -15,13 +15,24 @@
 # limitations under the License.
 
 
+# Event queue classes of RyuApp (see RyuApp.EVENT_QUEUES)
+EVENT_PRIORITY_HIGH = 'high'
+EVENT_PRIORITY_NORMAL = 'normal'
+EVENT_PRIORITY_BULK = 'bulk'
+
+
 class EventBase(object):
     """
     The base of all event classes.
 
     A Ryu application can define its own event type by creating a subclass.
+
+    PRIORITY is the event queue class the event is put into by default;
+    a RyuApp can override it with RyuApp.EVENT_PRIORITIES.
     """
 
+    PRIORITY = EVENT_PRIORITY_NORMAL
+
     def __init__(self):
         super(EventBase, self).__init__()
 
@@ -105,6 +105,36 @@ for ofp_mods in ofproto.get_ofp_modules().values():
     _create_ofp_msg_ev_from_module(ofp_parser)
 
 
+# Latency-critical messages go ahead of bulk statistics in the event queues
+# of applications (see RyuApp.EVENT_QUEUES).
+# Only events of the same class keep their order. An error for a request
+# arrives before the barrier or bundle reply that completes it, so the
+# replies that complete a transaction are kept in the class of
+# EventOFPErrorMsg. Otherwise the completion could be handled before
+# the error.
+_OFP_MSG_EVENT_PRIORITIES = {
+    event.EVENT_PRIORITY_HIGH: [
+        'EventOFPPacketIn', 'EventOFPEchoRequest', 'EventOFPEchoReply',
+        'EventOFPPortStatus', 'EventOFPSwitchFeatures', 'EventOFPErrorMsg',
+        'EventOFPBarrierReply', 'EventOFPBundleCtrlMsg',
+        'EventONFBundleCtrlMsg',
+    ],
+    event.EVENT_PRIORITY_BULK: [
+        'EventOFPStatsReply', 'EventOFPFlowStatsReply',
+        'EventOFPAggregateStatsReply', 'EventOFPTableStatsReply',
+        'EventOFPTableFeaturesStatsReply', 'EventOFPPortStatsReply',
+        'EventOFPQueueStatsReply', 'EventOFPGroupStatsReply',
+        'EventOFPGroupDescStatsReply', 'EventOFPMeterStatsReply',
+        'EventOFPMeterConfigStatsReply', 'EventOFPFlowDescStatsReply',
+        'EventOFPFlowMonitorReply',
+    ],
+}
+for _priority, _names in _OFP_MSG_EVENT_PRIORITIES.items():
+    for _name in _names:
+        if _name in _OFP_MSG_EVENTS:
+            _OFP_MSG_EVENTS[_name].PRIORITY = _priority
+
+
 class EventOFPStateChange(event.EventBase):
     """
     An event class for negotiation phase change notification.
@@ -120,6 +150,8 @@ class EventOFPStateChange(event.EventBase):
     ========= =================================================================
     """
 
+    PRIORITY = event.EVENT_PRIORITY_HIGH
+
     def __init__(self, dp):
         super(EventOFPStateChange, self).__init__()
         self.datapath = dp
@@ -142,6 +174,8 @@ class EventOFPPortStateChange(event.EventBase):
     ========= =================================================================
     """
 
+    PRIORITY = event.EVENT_PRIORITY_HIGH
+
     def __init__(self, dp, reason, port_no):
         super(EventOFPPortStateChange, self).__init__()
         self.datapath = dp
@@ -0,0 +1,261 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar decoder for OpenFlow 1.3 OFPMP_FLOW multipart replies.
+
+The regular parser builds an OFPFlowStats, an OFPMatch with OXM field
+objects and nested instruction/action objects for every flow entry.
+Applications that only read a handful of fields can opt in to this
+decoder instead; it scans the raw reply body with struct.unpack_from
+and returns NumPy columns.
+
+Usage::
+
+    from ryu.ofproto.ofproto_v1_3_columns import columnar_flow_stats
+
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    @columnar_flow_stats
+    def flow_stats_reply_handler(self, ev):
+        cols = ev.msg.columns       # FlowStatsColumns
+        ...
+
+Opting in is per handler and does not change the parser for other
+applications. When every handler of EventOFPFlowStatsReply opted in,
+the parser only decodes the columns and ``msg.body`` is parsed into
+objects when it is first accessed. If any handler did not opt in, the
+regular parser runs and the columns are decoded from ``msg.buf`` just
+before the decorated handler is called.
+"""
+
+import functools
+import socket
+import struct
+
+import numpy as np
+
+from ryu.ofproto import ofproto_v1_3 as ofproto
+from ryu.ofproto import ofproto_v1_3_parser as parser
+
+
+_U16 = struct.Struct('!H')
+_U32 = struct.Struct('!I')
+
+_BE16 = np.dtype('>u2')
+_BE32 = np.dtype('>u4')
+# ofp_flow_stats up to the match (OFP_FLOW_STATS_0_PACK_STR)
+_FLOW_STATS_0_DTYPE = np.dtype([
+    ('length', '>u2'), ('table_id', 'u1'), ('pad', 'u1'),
+    ('duration_sec', '>u4'), ('duration_nsec', '>u4'),
+    ('priority', '>u2'), ('idle_timeout', '>u2'), ('hard_timeout', '>u2'),
+    ('flags', '>u2'), ('pad2', 'V4'), ('cookie', '>u8'),
+    ('packet_count', '>u8'), ('byte_count', '>u8')])
+assert _FLOW_STATS_0_DTYPE.itemsize == ofproto.OFP_FLOW_STATS_0_SIZE
+_HEADER_COLUMNS = ('table_id', 'priority', 'cookie', 'duration_sec',
+                   'duration_nsec', 'packet_count', 'byte_count')
+
+# OXM field number -> (column, value dtype, OFPMatch keyword)
+_OXM_FIELDS = {
+    ofproto.OFPXMT_OFB_IN_PORT: ('in_port', _BE32, 'in_port'),
+    ofproto.OFPXMT_OFB_ETH_TYPE: ('eth_type', _BE16, 'eth_type'),
+    ofproto.OFPXMT_OFB_IP_PROTO: ('ip_proto', np.dtype('u1'), 'ip_proto'),
+    ofproto.OFPXMT_OFB_IPV4_SRC: ('ipv4_src', _BE32, 'ipv4_src'),
+    ofproto.OFPXMT_OFB_IPV4_DST: ('ipv4_dst', _BE32, 'ipv4_dst'),
+    ofproto.OFPXMT_OFB_TCP_SRC: ('l4_src', _BE16, 'tcp_src'),
+    ofproto.OFPXMT_OFB_TCP_DST: ('l4_dst', _BE16, 'tcp_dst'),
+    ofproto.OFPXMT_OFB_UDP_SRC: ('l4_src', _BE16, 'udp_src'),
+    ofproto.OFPXMT_OFB_UDP_DST: ('l4_dst', _BE16, 'udp_dst'),
+}
+# Bit of the ``fields`` column set when the OXM field is present
+FIELD_BITS = dict((field, 1 << field) for field in _OXM_FIELDS)
+
+_ACTION_INSTRUCTIONS = (ofproto.OFPIT_APPLY_ACTIONS,
+                        ofproto.OFPIT_WRITE_ACTIONS)
+
+
+def _gather(data, positions, dtype):
+    """Values of dtype (big endian) starting at each position of data"""
+    index = positions[:, None] + np.arange(dtype.itemsize)
+    return data[index].view(dtype).ravel().astype(dtype.newbyteorder('='))
+
+
+class FlowStatsColumns(object):
+    """
+    Flow stats entries of one (or several concatenated) OFPMP_FLOW replies,
+    one NumPy array per field.
+
+    ============= ========= =============================================
+    Column        dtype     Description
+    ============= ========= =============================================
+    table_id      uint8
+    priority      uint16
+    cookie        uint64
+    duration_sec  uint32
+    duration_nsec uint32
+    packet_count  uint64
+    byte_count    uint64
+    fields        uint32    Bitmask of present OXM fields (FIELD_BITS)
+    in_port       uint32    0 when absent
+    eth_type      uint16    0 when absent
+    ip_proto      uint8     0 when absent
+    ipv4_src      uint32    Host order integer, 0 when absent
+    ipv4_dst      uint32    Host order integer, 0 when absent
+    l4_src        uint16    TCP or UDP source port, 0 when absent
+    l4_dst        uint16    TCP or UDP destination port, 0 when absent
+    out_port      uint32    Port of the first output action, 0 when none
+    ============= ========= =============================================
+
+    Masked match fields are decoded as their value only.
+    """
+
+    COLUMNS = (('table_id', np.uint8), ('priority', np.uint16),
+               ('cookie', np.uint64), ('duration_sec', np.uint32),
+               ('duration_nsec', np.uint32), ('packet_count', np.uint64),
+               ('byte_count', np.uint64), ('fields', np.uint32),
+               ('in_port', np.uint32), ('eth_type', np.uint16),
+               ('ip_proto', np.uint8), ('ipv4_src', np.uint32),
+               ('ipv4_dst', np.uint32), ('l4_src', np.uint16),
+               ('l4_dst', np.uint16), ('out_port', np.uint32))
+
+    def __init__(self, **columns):
+        for name, dtype in self.COLUMNS:
+            setattr(self, name,
+                    np.asarray(columns.get(name, ()), dtype=dtype))
+
+    def __len__(self):
+        return len(self.priority)
+
+    @classmethod
+    def parser(cls, buf, offset, msg_len):
+        """Decode the flow stats entries in buf[offset:msg_len]"""
+        # Entry lengths are chained, everything else is gathered per column
+        offsets = []
+        while offset < msg_len:
+            offsets.append(offset)
+            (length,) = _U16.unpack_from(buf, offset)
+            if length == 0:
+                break
+            offset += length
+        if not offsets:
+            return cls()
+
+        data = np.frombuffer(buf, dtype=np.uint8, count=msg_len)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        n = len(offsets)
+        header = _gather(data, offsets, _FLOW_STATS_0_DTYPE)
+        columns = dict((name, header[name]) for name in _HEADER_COLUMNS)
+        for name, dtype in cls.COLUMNS:
+            columns.setdefault(name, np.zeros(n, dtype=dtype))
+        fields = columns['fields']
+
+        # ofp_match: type, length (without padding), then OXM TLVs.
+        # Walk the TLVs of all entries at once, one field per iteration.
+        match_len = _gather(data, offsets + ofproto.OFP_FLOW_STATS_0_SIZE + 2,
+                            _BE16)
+        pos = offsets + ofproto.OFP_FLOW_STATS_0_SIZE + 4
+        match_end = offsets + ofproto.OFP_FLOW_STATS_0_SIZE + match_len
+        active = pos < match_end
+        while active.any():
+            oxm = _gather(data, np.where(active, pos, 0), _BE32)
+            basic = active & (oxm >> 16 == ofproto.OFPXMC_OPENFLOW_BASIC)
+            field = (oxm >> 9) & 0x7f
+            for num, (name, dtype, _) in _OXM_FIELDS.items():
+                sel = basic & (field == num)
+                if sel.any():
+                    columns[name][sel] = _gather(data, pos[sel] + 4, dtype)
+                    fields[sel] |= FIELD_BITS[num]
+            pos = np.where(active, pos + 4 + (oxm & 0xff), pos)
+            active = pos < match_end
+
+        # Instructions: first output action of apply/write actions
+        out_port = columns['out_port']
+        end = offsets + header['length']
+        found = np.zeros(n, dtype=bool)
+        inst = offsets + ofproto.OFP_FLOW_STATS_0_SIZE + (match_len + 7) // 8 * 8
+        active = inst < end
+        while active.any():
+            inst_type = _gather(data, np.where(active, inst, 0), _BE16)
+            inst_len = _gather(data, np.where(active, inst + 2, 0), _BE16)
+            act = inst + 8
+            act_end = inst + inst_len
+            act_active = active & np.isin(inst_type, _ACTION_INSTRUCTIONS)
+            act_active &= act < act_end
+            while act_active.any():
+                act_type = _gather(data, np.where(act_active, act, 0), _BE16)
+                act_len = _gather(data, np.where(act_active, act + 2, 0),
+                                  _BE16)
+                hit = act_active & (act_type == ofproto.OFPAT_OUTPUT)
+                if hit.any():
+                    out_port[hit] = _gather(data, act[hit] + 4, _BE32)
+                    found |= hit
+                act = np.where(act_active, act + act_len, act)
+                act_active &= ~hit & (act_len > 0) & (act < act_end)
+            inst = np.where(active, inst + inst_len, inst)
+            active &= ~found & (inst_len > 0) & (inst < end)
+
+        return cls(**columns)
+
+    @classmethod
+    def concat(cls, parts):
+        """Join the columns of the parts of a multipart reply"""
+        parts = list(parts)
+        if len(parts) == 1:
+            return parts[0]
+        return cls(**dict((name, np.concatenate([getattr(p, name)
+                                                 for p in parts]))
+                          for name, _ in cls.COLUMNS))
+
+    def take(self, index):
+        """Rows selected by a boolean mask or an index array"""
+        return FlowStatsColumns(**dict((name, getattr(self, name)[index])
+                                       for name, _ in self.COLUMNS))
+
+    def has(self, field):
+        """Boolean array: entries whose match contains the OXM field"""
+        return (self.fields & FIELD_BITS[field]) != 0
+
+    @staticmethod
+    def ipv4_str(value):
+        return socket.inet_ntoa(_U32.pack(int(value)))
+
+    def match(self, i):
+        """Rebuild the OFPMatch of entry i (decoded fields only)"""
+        fields = int(self.fields[i])
+        kwargs = {}
+        for field, (name, _, key) in _OXM_FIELDS.items():
+            if not fields & FIELD_BITS[field]:
+                continue
+            value = int(getattr(self, name)[i])
+            if name.startswith('ipv4'):
+                value = self.ipv4_str(value)
+            kwargs[key] = value
+        return parser.OFPMatch(**kwargs)
+
+
+def columnar_flow_stats(handler):
+    """
+    Handler decorator: opt in to columnar decoding of OFPMP_FLOW replies.
+
+    msg.columns is always set when the handler runs. The reply body is
+    only left undecoded when every handler of the event opted in;
+    otherwise the columns are decoded here from msg.buf.
+    """
+    @functools.wraps(handler)
+    def _handler(self, ev):
+        msg = ev.msg
+        if msg.columns is None:
+            msg.columns = FlowStatsColumns.parser(
+                msg.buf, ofproto.OFP_MULTIPART_REPLY_SIZE, msg.msg_len)
+        return handler(self, ev)
+    _handler.columnar_decoder = FlowStatsColumns
+    return _handler
@@ -3938,6 +3938,16 @@ class OFPMultipartReply(MsgBase):
         msg.flags = flags
 
         offset = ofproto.OFP_MULTIPART_REPLY_SIZE
+        # Every handler of this reply opted in to columnar decoding (see
+        # Datapath.columnar_decoder): msg.body is then parsed lazily.
+        columnar_decoder = getattr(datapath, 'columnar_decoder', None)
+        decoder = None
+        if columnar_decoder is not None:
+            decoder = columnar_decoder(stats_type_cls)
+        if decoder is not None:
+            msg.columns = decoder.parser(msg.buf, offset, msg_len)
+            return msg
+
         body = []
         while offset < msg_len:
             b = stats_type_cls.cls_stats_body_cls.parser(msg.buf, offset)
@@ -4169,6 +4179,9 @@ class OFPFlowStatsReply(OFPMultipartReply):
     Attribute        Description
     ================ ======================================================
     body             List of ``OFPFlowStats`` instance
+    columns          ``FlowStatsColumns`` instance when every handler
+                     of the event opted in to columnar decoding (see
+                     ``ryu.ofproto.ofproto_v1_3_columns``), otherwise None
     ================ ======================================================
 
     Example::
@@ -4192,9 +4205,24 @@ class OFPFlowStatsReply(OFPMultipartReply):
             self.logger.debug('FlowStats: %s', flows)
     """
 
+    _opt_attributes = ['body']
+    columns = None
+
     def __init__(self, datapath, type_=None, **kwargs):
         super(OFPFlowStatsReply, self).__init__(datapath, **kwargs)
 
+    @property
+    def body(self):
+        # Columnar decoding enabled: build the OFPFlowStats list on demand
+        if self._body is None and self.columns is not None:
+            self._body = self.parser_stats_body(
+                self.buf, self.msg_len, ofproto.OFP_MULTIPART_REPLY_SIZE)
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+
 
 class OFPAggregateStats(ofproto_parser.namedtuple('OFPAggregateStats', (
         'packet_count', 'byte_count', 'flow_count'))):
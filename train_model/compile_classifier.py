@@ -0,0 +1,50 @@
+"""
+Compile best_classifier_model.pkl + classifier_scaler.pkl thành best_classifier_compiled.npz
+(mảng node phẳng, scaler đã gộp vào threshold) để Controller không cần import sklearn.
+Chạy: python train_model/compile_classifier.py [thư_mục_classification] [file_csv_kiểm_tra]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import joblib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from tree_compiler import CompiledForest, compile_classifier
+
+CLS_PATH = "/home/nhathoang2612/CNM_Baitap04/model/classification"
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dataset', 'network_traffic_data.csv')
+MIN_AGREEMENT = 0.999
+
+
+def main():
+    cls_path = sys.argv[1] if len(sys.argv) > 1 else CLS_PATH
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else CSV_PATH
+    model = joblib.load(os.path.join(cls_path, 'best_classifier_model.pkl'))
+    scaler = joblib.load(os.path.join(cls_path, 'classifier_scaler.pkl'))
+    out_path = os.path.join(cls_path, 'best_classifier_compiled.npz')
+
+    compiled = compile_classifier(model, scaler)
+    compiled.save(out_path)
+
+    # Kiểm tra lại trên dữ liệu thật: kết quả phải trùng với sklearn
+    df = pd.read_csv(csv_path)
+    if 'avg_packet_size' not in df:
+        df['avg_packet_size'] = np.where(df['packet_count'] > 0, df['byte_count'] / df['packet_count'].clip(lower=1), 0)
+    features = list(getattr(scaler, 'feature_names_in_', [])) or \
+        ['ip_proto', 'packet_count', 'byte_count', 'duration_sec', 'byte_rate', 'packet_rate'][:scaler.n_features_in_]
+    X = df[features]
+    expected = model.predict(scaler.transform(X))
+    actual = CompiledForest.load(out_path).predict(X.to_numpy(dtype=np.float64))
+    agreement = float(np.mean(expected == actual))
+
+    print(f"Saved: {out_path} ({compiled.n_trees} trees, {len(compiled.feature)} nodes, "
+          f"depth {compiled.max_depth}), agreement = {agreement:.4%}")
+    if agreement < MIN_AGREEMENT:
+        os.remove(out_path)
+        sys.exit(f"!!! Độ trùng khớp thấp hơn {MIN_AGREEMENT:.1%}, đã xóa file compile.")
+
+
+if __name__ == '__main__':
+    main()
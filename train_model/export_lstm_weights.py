@@ -0,0 +1,50 @@
+"""
+Export model LSTM (best_prediction_model.keras) sang file .npz cho NumPy runtime của Controller.
+Chạy: python train_model/export_lstm_weights.py [thư_mục_traffic_predict]
+"""
+import os
+import sys
+import json
+
+os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import joblib
+from tensorflow.keras.models import load_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controller'))
+from numpy_lstm import NumpyLSTM, TOLERANCE, export_keras_lstm, max_abs_error
+
+PRED_PATH = "/home/nhathoang2612/CNM_Baitap04/model/traffic_predict"
+
+
+def read_seq_length(pred_path):
+    json_config = os.path.join(pred_path, 'model_config.json')
+    txt_config = os.path.join(pred_path, 'model_config.txt')
+    if os.path.exists(json_config):
+        with open(json_config, 'r') as f:
+            return int(json.load(f).get('sequence_length', 10))
+    if os.path.exists(txt_config):
+        with open(txt_config, 'r') as f:
+            return int(f.read().strip())
+    return 10
+
+
+def main():
+    pred_path = sys.argv[1] if len(sys.argv) > 1 else PRED_PATH
+    keras_model = load_model(os.path.join(pred_path, 'best_prediction_model.keras'))
+    scaler = joblib.load(os.path.join(pred_path, 'prediction_scaler.pkl'))
+    out_path = os.path.join(pred_path, 'best_prediction_model.npz')
+
+    export_keras_lstm(keras_model, scaler, read_seq_length(pred_path), out_path)
+
+    # Kiểm tra lại: NumPy runtime phải cho kết quả giống Keras
+    error = max_abs_error(keras_model, NumpyLSTM.load(out_path))
+    print(f"Saved: {out_path} ({os.path.getsize(out_path) / 1024:.1f} KB), max abs error = {error:.2e}")
+    if error > TOLERANCE:
+        os.remove(out_path)
+        sys.exit(f"!!! Sai số vượt ngưỡng {TOLERANCE}, đã xóa file export.")
+
+
+if __name__ == '__main__':
+    main()